@@ -0,0 +1,80 @@
+"""
+Point queries per second of hotspot hit test over all views with parsed
+navigation: grid lookups one by one and NumPy batches, checked against brute force
+
+    python benchmarks/hittest.py [-t data/tree.json] [-p 200000]
+"""
+
+import argparse
+import json
+import time
+
+import numpy as np
+
+from engine import Program
+from engine.hittest import NO_HIT, HitTestIndex
+from vc_parser.schemas import Node
+
+WIDTH, HEIGHT = 640, 480
+
+
+def brute_force(index: HitTestIndex, view: str, x: int, y: int) -> int:
+    v = index.views[view]
+    for i, (left, top, right, bottom) in enumerate(v.rects.tolist()):
+        if left <= x < right and top <= y < bottom:
+            return i
+    return NO_HIT
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark of hotspot hit test")
+    parser.add_argument("-t", type=str, help="Snapshot file. Default data/tree.json", default="data/tree.json")
+    parser.add_argument("-p", type=int, help="Points to query. Default 200000", default=200000)
+    args = parser.parse_args()
+
+    with open(args.t) as f:
+        program = Program(Node.model_validate(json.load(f)))
+    start = time.perf_counter()
+    index = HitTestIndex(program)
+    print(f"build: {(time.perf_counter() - start) * 1000:.1f}ms, {len(index.views)} views")
+
+    rng = np.random.default_rng(0)
+    views = list(index.views)
+    view_of = rng.integers(0, len(views), args.p)
+    points = np.stack([rng.integers(0, WIDTH, args.p), rng.integers(0, HEIGHT, args.p)], axis=1)
+    queries = [(views[v], x, y) for v, (x, y) in zip(view_of.tolist(), points.tolist())]
+    enabled = program.initial_enabled
+
+    start = time.perf_counter()
+    single = [index.hit(view, x, y) for view, x, y in queries]
+    elapsed = time.perf_counter() - start
+    print(f"single point: {len(queries) / elapsed:,.0f} queries/sec")
+
+    start = time.perf_counter()
+    for view, x, y in queries:
+        index.hit(view, x, y, enabled)
+    elapsed = time.perf_counter() - start
+    print(f"single point with enable state: {len(queries) / elapsed:,.0f} queries/sec")
+
+    order = np.argsort(view_of, kind="stable")
+    bounds = np.searchsorted(view_of[order], np.arange(len(views) + 1))
+    start = time.perf_counter()
+    batch = np.empty(args.p, dtype=np.int64)
+    for v, view in enumerate(views):
+        rows = order[bounds[v] : bounds[v + 1]]
+        batch[rows] = index.views[view].hit_many(points[rows])
+    elapsed = time.perf_counter() - start
+    print(f"NumPy batch per view: {args.p / elapsed:,.0f} queries/sec")
+
+    hits = sum(h is not None for h in single)
+    sample = range(0, len(queries), max(1, len(queries) // 10000))
+    for i in sample:
+        view, x, y = queries[i]
+        expected = brute_force(index, view, x, y)
+        got = NO_HIT if single[i] is None else index.views[view].hits.index(single[i])
+        assert got == expected == batch[i], (queries[i], got, expected, batch[i])
+    print(f"{hits / len(queries):.1%} points hit a hotspot, {len(sample)} checked against brute force")
+
+
+if __name__ == "__main__":
+    main()
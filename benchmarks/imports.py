@@ -0,0 +1,68 @@
+"""
+Import time of read-only entry points in a fresh interpreter, measured with
+`python -X importtime` (interpreter startup excluded), against time budgets
+
+    python benchmarks/imports.py [-n 5]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+
+# Statement -> budget in ms, None only reports
+BUDGETS: dict[str, float | None] = {
+    "import vc_parser": 10,
+    "from vc_parser.loader import load_raw, walk_raw": 30,
+    "from vc_parser.stream import iter_raw": 40,
+    "from vc_parser import load_tree": 30,
+    # Commands: their work modules are imported by `main`, fresh stored index is queried without pydantic
+    "import vc_parser.query": 30,
+    "import engine.lint": 40,
+    "import vc_parser.schemas": None,
+    "import engine": 10,
+}
+
+
+def top_level_imports(statement: str) -> dict[str, int]:
+    """Cumulative import time in us of modules imported at top level of interpreter run"""
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join(filter(None, [os.getcwd(), os.environ.get("PYTHONPATH")]))}
+    out = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement], capture_output=True, text=True, check=True, env=env
+    ).stderr
+    res = {}
+    for line in out.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        _, cumulative, name = line.split("|")
+        # Nested imports are indented and counted in their parent
+        if cumulative.strip().isdigit() and not name.startswith("   "):
+            res[name.strip()] = int(cumulative)
+    return res
+
+
+def import_ms(statement: str, startup: set[str]) -> float:
+    """Import time of statement without modules imported by interpreter startup"""
+    return sum(us for name, us in top_level_imports(statement).items() if name not in startup) / 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark of import time against budgets")
+    parser.add_argument("-n", type=int, help="Runs of every statement, the best one counts. Default 5", default=5)
+    args = parser.parse_args()
+
+    startup = set(top_level_imports("pass"))
+    over = []
+    for statement, budget in BUDGETS.items():
+        ms = min(import_ms(statement, startup) for _ in range(args.n))
+        status = "" if budget is None else ("ok" if ms <= budget else "OVER BUDGET")
+        limit = "" if budget is None else f"/ {budget:.0f}ms"
+        print(f"{ms:8.1f}ms {limit:>8}  {status:<12}{statement}")
+        if budget is not None and ms > budget:
+            over.append(statement)
+    if over:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Throughput of headless runtime: trigger events per second (direct and through
+asyncio queue) and timing wheel ticks with thousands of periodic timers
+
+    python benchmarks/runtime.py [-t data/tree.json] [-e 200000] [--timers 10000]
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+
+from engine import Event, Program, Runtime
+from vc_parser.schemas import Node
+
+
+def make_events(program: Program, count: int) -> list[Event]:
+    keys = [k for k, v in program.triggers.items() if v]
+    random.seed(0)
+    return [Event(path=p, owner=o, trigger=t, params={"Event::TimerID": 1}) for p, o, t in random.choices(keys, k=count)]
+
+
+def bench_direct(program: Program, events: list[Event]) -> float:
+    rt = Runtime(program)
+    start = time.perf_counter()
+    for e in events:
+        rt.handle(e)
+    return rt.events_handled / (time.perf_counter() - start)
+
+
+def bench_asyncio(program: Program, events: list[Event]) -> float:
+    rt = Runtime(program)
+
+    async def feed():
+        task = asyncio.create_task(rt.run())
+        await asyncio.sleep(0)
+        for e in events:
+            rt.post(e)
+        await rt.queue.join()
+        rt.stop()
+        await task
+
+    start = time.perf_counter()
+    asyncio.run(feed())
+    return rt.events_handled / (time.perf_counter() - start)
+
+
+def bench_timers(program: Program, timers: int, ticks: int) -> tuple[float, float]:
+    rt = Runtime(program, tick_ms=10)
+    random.seed(0)
+    for i in range(timers):
+        rt.start_timer("", f"Timer {i}", random.randrange(50, 5000), True)
+    start = time.perf_counter()
+    rt.advance(ticks)
+    elapsed = time.perf_counter() - start
+    return ticks / elapsed, rt.events_handled / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark of headless runtime")
+    parser.add_argument("-t", type=str, help="Snapshot file. Default data/tree.json", default="data/tree.json")
+    parser.add_argument("-e", type=int, help="Events to dispatch. Default 200000", default=200000)
+    parser.add_argument("--timers", type=int, help="Periodic timers. Default 10000", default=10000)
+    parser.add_argument("--ticks", type=int, help="Ticks to advance. Default 10000", default=10000)
+    args = parser.parse_args()
+
+    with open(args.t) as f:
+        root = Node.model_validate(json.load(f))
+    start = time.perf_counter()
+    program = Program(root)
+    print(f"compile: {(time.perf_counter() - start) * 1000:.1f}ms, {len(program.triggers)} triggers")
+    events = make_events(program, args.e)
+    print(f"direct dispatch: {bench_direct(program, events):,.0f} events/sec")
+    print(f"asyncio queue dispatch: {bench_asyncio(program, events):,.0f} events/sec")
+    ticks_per_sec, expired_per_sec = bench_timers(program, args.timers, args.ticks)
+    print(f"{args.timers} periodic timers: {ticks_per_sec:,.0f} ticks/sec, {expired_per_sec:,.0f} expirations/sec")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Streaming reader of tree.json against full load and validation of `Node`:
+time and peak memory to get records of one kind
+
+    python benchmarks/stream.py [-t data/tree.json] [-r 5]
+"""
+
+import argparse
+import json
+import time
+import tracemalloc
+from collections.abc import Callable
+
+from vc_parser.schemas import Node
+from vc_parser.stream import RECORD_KINDS, iter_records
+
+
+def measure(func: Callable[[], int], repeat: int) -> tuple[float, float, int]:
+    """Best time in ms, peak memory in KB and number of records"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        count = func()
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return best * 1000, peak / 1024, count
+
+
+def full_load(snapshot: str) -> int:
+    with open(snapshot) as f:
+        root = Node.model_validate(json.load(f))
+    return sum(len(t.actions) for n in root.walk() for _, t in n.all_triggers())
+
+
+def stream(snapshot: str, kind: str, validate: bool) -> int:
+    with open(snapshot) as f:
+        return sum(1 for _ in iter_records(f, kind, validate))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark of streaming tree.json reader")
+    parser.add_argument("-t", type=str, help="Snapshot file. Default data/tree.json", default="data/tree.json")
+    parser.add_argument("-r", type=int, help="Repeats. Default 5", default=5)
+    args = parser.parse_args()
+
+    ms, kb, count = measure(lambda: full_load(args.t), args.r)
+    print(f"{'full load':<28}{ms:8.1f}ms {kb:10,.0f}KB  {count} actions")
+    for kind in RECORD_KINDS:
+        for validate in (True, False):
+            ms, kb, count = measure(lambda: stream(args.t, kind, validate), args.r)  # noqa: B023
+            label = f"{kind}{'' if validate else ' (raw)'}"
+            print(f"{label:<28}{ms:8.1f}ms {kb:10,.0f}KB  {count} records")
+
+
+if __name__ == "__main__":
+    main()
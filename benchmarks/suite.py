@@ -0,0 +1,173 @@
+"""
+Non-GUI hot paths on snapshot scaled up 1x, 10x and 100x by copying chapters:
+snapshot load and validation, `model_dump` + `json.dump`, cache stores save and load,
+`Node.find_node` and `print_tree`. Reports best wall time, peak memory and live
+allocated blocks (tracemalloc), stores baseline and flags regressions over threshold
+
+    python benchmarks/suite.py [-t data/tree.json] [-s 1 10 100] [-r 3] [--save] [--check] [--threshold 0.2]
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections.abc import Callable
+from pathlib import Path
+
+from vc_parser.cache import FileCache
+from vc_parser.schemas import Node
+from vc_parser.warm_start import cache_records
+
+BASELINE = Path(__file__).with_name("baseline.json")
+# Lookups of one find_node run
+LOOKUPS = 1000
+
+
+def scale_tree(raw: dict, scale: int) -> dict:
+    """Tree with chapters repeated `scale` times, copies get ' #2', ' #3'... suffixes"""
+    chapters = []
+    for i in range(scale):
+        suffix = f" #{i + 1}" if i else ""
+        for chapter in raw["childrens"]:
+            text = json.dumps(chapter)
+            prefix = json.dumps(chapter["path"])[:-1]
+            # Paths of subtree nodes start with chapter path, other strings don't
+            copy = json.loads(text.replace(prefix, prefix + suffix))
+            copy["name"] += suffix
+            chapters.append(copy)
+    return {**raw, "childrens": chapters}
+
+
+def measure(func: Callable[[], object], repeat: int) -> dict[str, float]:
+    """Best time in ms, peak memory in KB and blocks allocated by one run and still alive after it"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    res = func()
+    blocks = sum(s.count for s in tracemalloc.take_snapshot().statistics("filename"))
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    del res
+    return {"ms": best * 1000, "peak_kb": peak / 1024, "blocks": blocks}
+
+
+def operations(snapshot: Path, workdir: Path) -> dict[str, Callable[[], object]]:
+    with open(snapshot) as f:
+        root = Node.model_validate(json.load(f))
+    records = cache_records(root)
+    stores = [FileCache(data=data, klass=klass) for klass, data in records.items()]
+    rng = random.Random(0)
+    paths = [n.path for n in root.walk()]
+    rng.shuffle(paths)
+    lookups = rng.choices([p for p in paths[: LOOKUPS * 2] if _findable(root, p)], k=LOOKUPS)
+
+    def load():
+        with open(snapshot) as f:
+            return Node.model_validate(json.load(f))
+
+    def dump():
+        with open(workdir / "tree.json", "w") as f:
+            json.dump(root.model_dump(), f)
+
+    def cache_save():
+        for store in stores:
+            store.save()
+
+    def cache_load():
+        return [FileCache.load(klass) for klass in records]
+
+    def find_node():
+        return [Node.find_node(root, p) for p in lookups]
+
+    def print_tree():
+        with open(os.devnull, "w") as f, contextlib.redirect_stdout(f):
+            root.print_tree()
+
+    return {
+        "load": load,
+        "dump": dump,
+        "cache_save": cache_save,
+        "cache_load": cache_load,
+        "find_node": find_node,
+        "print_tree": print_tree,
+    }
+
+
+def _findable(root: Node, path: str) -> bool:
+    """find_node splits path by '/', so nodes with it in names aren't found"""
+    try:
+        return Node.find_node(root, path).path == path
+    except Exception:  # noqa: BLE001 find_node raises plain Exception
+        return False
+
+
+def compare(results: dict[str, dict[str, float]], baseline: dict[str, dict[str, float]], threshold: float) -> list[str]:
+    """Keys of results slower or using more memory than baseline by more than threshold"""
+    res = []
+    for key, r in results.items():
+        base = baseline.get(key)
+        if base is not None and any(r[m] > base[m] * (1 + threshold) for m in ("ms", "peak_kb")):
+            res.append(key)
+    return res
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark suite of non-GUI hot paths on scaled snapshots")
+    parser.add_argument("-t", type=str, help="Snapshot file. Default data/tree.json", default="data/tree.json")
+    parser.add_argument("-s", type=int, nargs="+", help="Scales of snapshot. Default 1 10 100", default=[1, 10, 100])
+    parser.add_argument("-r", type=int, help="Repeats. Default 3", default=3)
+    parser.add_argument("-b", type=str, help=f"Baseline file. Default {BASELINE}", default=str(BASELINE))
+    parser.add_argument("--save", action="store_true", help="Store results as baseline")
+    parser.add_argument("--check", action="store_true", help="Exit with error on regressions against baseline")
+    parser.add_argument("--threshold", type=float, help="Allowed slowdown of time and peak memory. Default 0.2", default=0.2)
+    args = parser.parse_args()
+
+    with open(args.t) as f:
+        raw = json.load(f)
+    baseline = {}
+    if os.path.exists(args.b):
+        with open(args.b) as f:
+            baseline = json.load(f)
+    results: dict[str, dict[str, float]] = {}
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = Path(tmp)
+        # FileCache writes into ./cache
+        (workdir / "cache").mkdir()
+        os.chdir(workdir)
+        try:
+            for scale in args.s:
+                snapshot = workdir / f"tree_{scale}x.json"
+                with open(snapshot, "w") as f:
+                    json.dump(scale_tree(raw, scale), f)
+                print(f"{scale}x: {snapshot.stat().st_size / 2**20:.1f}MB")
+                for name, func in operations(snapshot, workdir).items():
+                    key = f"{name}@{scale}x"
+                    r = results[key] = measure(func, args.r)
+                    base = baseline.get(key)
+                    delta = f"{r['ms'] / base['ms'] - 1:+7.1%}" if base else ""
+                    print(f"  {name:<12}{r['ms']:10.1f}ms {delta:>8} {r['peak_kb']:12,.0f}KB {r['blocks']:10,} blocks")
+        finally:
+            os.chdir(cwd)
+
+    regressions = compare(results, baseline, args.threshold)
+    for key in regressions:
+        print(f"REGRESSION {key}: {results[key]} against baseline {baseline[key]}")
+    if args.save:
+        with open(args.b, "w") as f:
+            json.dump({**baseline, **results}, f, indent=1)
+        print(f"baseline stored in {args.b}")
+    if args.check and regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
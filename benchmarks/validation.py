@@ -0,0 +1,127 @@
+"""
+Validation time of full tree and of trigger actions / assets with tagged unions
+(current schemas) against plain unions (schemas before `action_type`/`style` tagging)
+
+    python benchmarks/validation.py [-t data/tree.json] [-n 20]
+"""
+
+import argparse
+import json
+import statistics
+import time
+from typing import Self
+
+from pydantic import BaseModel, TypeAdapter
+
+from vc_parser.schemas import (
+    AnyAsset,
+    AnyTriggerAction,
+    Asset,
+    CharacterProperties,
+    ExplorationProperties,
+    Node,
+    Trigger,
+    TriggerAction,
+    ViewNavigation,
+)
+
+
+# Same tree with `TriggerAction.action_params` validated as plain union
+class PlainTrigger(Trigger):
+    actions: list[TriggerAction]
+
+
+class PlainExplorationProperties(ExplorationProperties):
+    triggers: list[PlainTrigger]
+
+
+class PlainCharacterProperties(CharacterProperties):
+    triggers: list[PlainTrigger]
+
+
+class PlainViewNavigation(ViewNavigation):
+    explorations: list[PlainExplorationProperties]
+    characters: list[PlainCharacterProperties]
+
+
+class PlainNode(Node):
+    childrens: list[Self]
+    triggers: list[PlainTrigger]
+    view_navigation: PlainViewNavigation | None = None
+
+
+def make_assets(count: int) -> list[dict]:
+    """Synthetic asset list with the same mix of styles as the game"""
+    res = []
+    for i in range(count):
+        base = {"name": f"Navs:Bench:{i:05}.mov", "description": None, "category": "Navs", "type": "Movie", "db_id": i}
+        match i % 3:
+            case 0:
+                discs = [
+                    {"disc": str(d), "file": f"{i}.mov", "start": i * 100, "end": i * 100 + 99} for d in range(1, 8)
+                ]
+                resource = {
+                    "file": f"{i}.mov",
+                    "from_": 0,
+                    "to": 1000,
+                    "size_type": "mS",
+                    "first_frame_only": False,
+                    "loop": False,
+                    "hotspots": False,
+                    "status": "Final",
+                    "disc_files": discs,
+                }
+                res.append({**base, "style": "File", "resource": resource})
+            case 1:
+                resource = {"id": i, "type": "Bitmap", "status": "Final"}
+                res.append({**base, "style": "Resource", "resource": resource})
+            case 2:
+                resource = {"left": 0, "top": 0, "right": 640, "bottom": 480, "text": f"Text {i}"}
+                res.append({**base, "style": "Text", "resource": resource})
+    return res
+
+
+def get_validate(target: type[BaseModel] | TypeAdapter, data: object):
+    if isinstance(target, TypeAdapter):
+        return target.validate_json if isinstance(data, bytes) else target.validate_python
+    return target.model_validate_json if isinstance(data, bytes) else target.model_validate
+
+
+def measure(func, data: object, repeat: int) -> tuple[float, float]:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(data)
+        times.append(time.perf_counter() - start)
+    return min(times) * 1000, statistics.median(times) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark of snapshot validation")
+    parser.add_argument("-t", type=str, help="Snapshot file. Default data/tree.json", default="data/tree.json")
+    parser.add_argument("-n", type=int, help="Repeats of every case. Default 20", default=20)
+    args = parser.parse_args()
+
+    with open(args.t, "rb") as f:
+        raw = f.read()
+    tree = json.loads(raw)
+    actions = [a.model_dump() for n in Node.model_validate(tree).walk() for _, t in n.all_triggers() for a in t.actions]
+    actions_raw = json.dumps(actions).encode()
+    assets = make_assets(3000)
+
+    cases = [
+        ("tree python", PlainNode, Node, tree),
+        ("tree json", PlainNode, Node, raw),
+        (f"{len(actions)} actions python", TypeAdapter(list[TriggerAction]), TypeAdapter(list[AnyTriggerAction]), actions),
+        (f"{len(actions)} actions json", TypeAdapter(list[TriggerAction]), TypeAdapter(list[AnyTriggerAction]), actions_raw),
+        (f"{len(assets)} assets python", TypeAdapter(list[Asset]), TypeAdapter(list[AnyAsset]), assets),
+    ]
+    print(f"{'case':<24} {'plain min/median ms':>20} {'tagged min/median ms':>21} {'speedup':>8}")
+    for name, before, after, data in cases:
+        b = measure(get_validate(before, data), data, args.n)
+        a = measure(get_validate(after, data), data, args.n)
+        print(f"{name:<24} {b[0]:>9.2f} / {b[1]:>8.2f} {a[0]:>10.2f} / {a[1]:>8.2f} {b[1] / a[1]:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
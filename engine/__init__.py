@@ -0,0 +1,46 @@
+"""
+Classes are imported on first attribute access, so commands in submodules
+like `engine.lint` don't import the runtime and pydantic models at start
+"""
+
+import importlib
+
+# Attribute -> module which defines it
+_LAZY = {
+    "EnableState": "engine.enable",
+    "PathTable": "engine.enable",
+    "Program": "engine.program",
+    "Event": "engine.runtime",
+    "Hooks": "engine.runtime",
+    "Runtime": "engine.runtime",
+    "TimingWheel": "engine.scheduler",
+    "History": "engine.state",
+    "Snapshot": "engine.state",
+    "StateStore": "engine.state",
+}
+
+__all__ = [
+    "EnableState",
+    "Event",
+    "History",
+    "Hooks",
+    "PathTable",
+    "Program",
+    "Runtime",
+    "Snapshot",
+    "StateStore",
+    "TimingWheel",
+]
+
+
+def __getattr__(name: str):
+    module = _LAZY.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    res = getattr(importlib.import_module(module), name)
+    globals()[name] = res
+    return res
+
+
+def __dir__() -> list[str]:
+    return sorted([*globals(), *_LAZY])
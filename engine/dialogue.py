@@ -0,0 +1,278 @@
+import argparse
+import time
+from pathlib import Path
+
+from pydantic import BaseModel, PrivateAttr
+
+from engine.enable import PathTable
+from vc_parser.index import SourceStamp, load_derived
+from vc_parser.schemas import (
+    CharacterProperties,
+    Conversation,
+    IdeaResponse,
+    Node,
+    NodePath,
+    Variable,
+)
+
+QUESTION, REPLY, ATOM = 0, 1, 2
+# Id of missing string, line or idea
+NONE = -1
+
+
+class DialogueGraph(BaseModel):
+    """
+    Conversations and idea responses of all characters compiled into flat arrays.
+    Ranges of characters, conversations and ideas are offsets: items of `i` are
+    `offsets[i]:offsets[i + 1]`. Lines of one conversation or idea are questions,
+    then replies, then atoms, so the next line is the next index.
+    Triggers stay in snapshot, `Program` compiles them with owner of `owner`
+    """
+
+    source: SourceStamp
+    strings: list[str]
+    assets: list[str]
+    # Node whose asset list declares asset, None if it's not declared in parsed views
+    asset_nodes: list[NodePath | None]
+
+    character_view: list[NodePath]
+    character_index: list[int]
+    character_name: list[int]
+    character_conversations: list[int]
+    character_ideas: list[int]
+    character_acks: list[int]
+    acks: list[int]
+
+    conversation_character: list[int]
+    conversation_name: list[int]
+    # Offsets of conversation dialogs in `dialog_assets`
+    conversation_dialogs: list[int]
+    dialog_assets: list[int]
+    conversation_enabled: list[bool]
+    conversation_db_id: list[int]
+    # Offsets of conversation variables in `variable_*`
+    conversation_variables: list[int]
+    # Bit of conversation in history set, NONE if conversation doesn't support history
+    conversation_history: list[int]
+    conversation_lines: list[int]
+    conversation_atoms: list[int]
+
+    idea_character: list[int]
+    idea_icon: list[int]
+    idea_lines: list[int]
+    idea_atoms: list[int]
+    # Offsets of idea response variables in `variable_*`
+    idea_variables: list[int]
+
+    variable_name: list[int]
+    variable_type: list[int]
+    variable_initial: list[bool | int | str]
+
+    line_kind: list[int]
+    line_asset: list[int]
+
+    _characters: dict[tuple[NodePath, int], int] = PrivateAttr(default_factory=dict)
+    _ideas: dict[tuple[int, int], int] = PrivateAttr(default_factory=dict)
+    _string_ids: dict[str, int] = PrivateAttr(default_factory=dict)
+    _named: dict[int, list[int]] = PrivateAttr(default_factory=dict)
+
+    def model_post_init(self, context, /):
+        self._string_ids = {s: i for i, s in enumerate(self.strings)}
+        for c, name in enumerate(self.conversation_name):
+            self._named.setdefault(name, []).append(c)
+        self._characters = {(v, i): c for c, (v, i) in enumerate(zip(self.character_view, self.character_index))}
+        self._ideas = {(c, icon): i for i, (c, icon) in enumerate(zip(self.idea_character, self.idea_icon))}
+
+    @property
+    def history_bits(self) -> int:
+        return max(self.conversation_history, default=NONE) + 1
+
+    def character(self, view: NodePath, index: int) -> int:
+        """Id of character hotspot `index` of view"""
+        return self._characters.get((view, index), NONE)
+
+    def conversations(self, character: int) -> range:
+        return range(self.character_conversations[character], self.character_conversations[character + 1])
+
+    def ideas(self, character: int) -> range:
+        return range(self.character_ideas[character], self.character_ideas[character + 1])
+
+    def acknowledgements(self, character: int) -> list[str]:
+        return [self.assets[a] for a in self.acks[self.character_acks[character] : self.character_acks[character + 1]]]
+
+    def named(self, name: str) -> list[int]:
+        """Conversations which Enable action with path `name` toggles"""
+        return self._named.get(self._string_ids.get(name, NONE), [])
+
+    def owner(self, conversation: int) -> tuple[NodePath, str]:
+        """View and owner of conversation triggers and enable state in `Program`"""
+        character = self.conversation_character[conversation]
+        index = conversation - self.character_conversations[character]
+        return self.character_view[character], f"character {self.character_index[character]} conversation {index}"
+
+    def variables(self, conversation: int) -> range:
+        """Indexes of conversation variables in `variable_*`"""
+        return range(self.conversation_variables[conversation], self.conversation_variables[conversation + 1])
+
+    def response_variables(self, idea: int) -> range:
+        return range(self.idea_variables[idea], self.idea_variables[idea + 1])
+
+    def dialogs(self, conversation: int) -> list[str]:
+        """Dialog assets of conversation"""
+        start, end = self.conversation_dialogs[conversation], self.conversation_dialogs[conversation + 1]
+        return [self.assets[a] for a in self.dialog_assets[start:end]]
+
+    def lines(self, conversation: int) -> range:
+        """Questions and replies of conversation in playing order"""
+        return range(self.conversation_lines[conversation], self.conversation_atoms[conversation])
+
+    def atoms(self, conversation: int) -> range:
+        return range(self.conversation_atoms[conversation], self.conversation_lines[conversation + 1])
+
+    def next_line(self, conversation: int, line: int = NONE) -> int:
+        """Line played after `line`, first one for NONE, NONE after the last"""
+        line = self.conversation_lines[conversation] if line == NONE else line + 1
+        return line if line < self.conversation_atoms[conversation] else NONE
+
+    def idea(self, character: int, icon: str) -> int:
+        """Idea response of character to idea icon"""
+        return self._ideas.get((character, self._string_ids.get(icon, NONE)), NONE)
+
+    def idea_response(self, idea: int) -> range:
+        return range(self.idea_lines[idea], self.idea_atoms[idea])
+
+    def asset(self, line: int) -> str:
+        return self.assets[self.line_asset[line]]
+
+
+class _Builder:
+    def __init__(self, root: Node):
+        self.strings = PathTable()
+        self.assets = PathTable()
+        self.declared: dict[str, NodePath] = {}
+        for n in root.walk():
+            for a in n.asset_names:
+                self.declared.setdefault(a, n.path)
+        self.data: dict[str, list] = {
+            k: [] for k in DialogueGraph.model_fields if k not in ("source", "strings", "assets", "asset_nodes")
+        }
+        for k in (
+            "character_conversations",
+            "character_ideas",
+            "character_acks",
+            "conversation_lines",
+            "conversation_dialogs",
+            "conversation_variables",
+            "idea_variables",
+        ):
+            self.data[k].append(0)
+        self.history = 0
+        # Ideas are compiled after all conversations, so lines of both are contiguous
+        self.ideas: list[tuple[int, IdeaResponse]] = []
+
+    def string(self, s: str) -> int:
+        return self.strings.intern(s)
+
+    def add_lines(self, questions: list[str], replies: list[str], atoms: list[str]) -> int:
+        """Add lines and return index where atoms start"""
+        d = self.data
+        for kind, names in ((QUESTION, questions), (REPLY, replies)):
+            for name in names:
+                d["line_kind"].append(kind)
+                d["line_asset"].append(self.assets.intern(name))
+        atoms_start = len(d["line_kind"])
+        for name in atoms:
+            d["line_kind"].append(ATOM)
+            d["line_asset"].append(self.assets.intern(name))
+        return atoms_start
+
+    def add_variables(self, offsets: str, variables: list[Variable]):
+        d = self.data
+        for v in variables:
+            d["variable_name"].append(self.string(v.name))
+            d["variable_type"].append(self.string(v.type))
+            d["variable_initial"].append(v.initial_value)
+        d[offsets].append(len(d["variable_name"]))
+
+    def add_character(self, view: NodePath, index: int, c: CharacterProperties):
+        d = self.data
+        character = len(d["character_view"])
+        d["character_view"].append(view)
+        d["character_index"].append(index)
+        d["character_name"].append(self.string(c.character.name))
+        for raw in c.conversations:
+            conv = Conversation.model_validate(raw)
+            d["conversation_character"].append(character)
+            d["conversation_name"].append(self.string(conv.name))
+            d["dialog_assets"].extend(self.assets.intern(name) for name in conv.dialogs)
+            d["conversation_dialogs"].append(len(d["dialog_assets"]))
+            d["conversation_enabled"].append(conv.enabled != "Initially Disabled")
+            d["conversation_db_id"].append(conv.db_id)
+            self.add_variables("conversation_variables", conv.variables)
+            d["conversation_history"].append(self.history if conv.support_history else NONE)
+            self.history += conv.support_history
+            d["conversation_atoms"].append(self.add_lines(conv.questions, conv.replies, conv.atoms))
+            d["conversation_lines"].append(len(d["line_kind"]))
+        d["character_conversations"].append(len(d["conversation_character"]))
+        self.ideas.extend((character, IdeaResponse.model_validate(raw)) for raw in c.idea_responses)
+        d["character_ideas"].append(len(self.ideas))
+        for name in c.acknowledgements:
+            d["acks"].append(self.assets.intern(name))
+        d["character_acks"].append(len(d["acks"]))
+
+    def build(self, root: Node, source: SourceStamp) -> DialogueGraph:
+        for n in root.walk():
+            if n.view_navigation is not None:
+                for i, c in enumerate(n.view_navigation.characters):
+                    self.add_character(n.path, i, c)
+        d = self.data
+        d["idea_lines"].append(len(d["line_kind"]))
+        for character, idea in self.ideas:
+            d["idea_character"].append(character)
+            d["idea_icon"].append(self.string(idea.idea_icon))
+            d["idea_atoms"].append(self.add_lines(idea.questions, idea.replies, idea.atoms))
+            d["idea_lines"].append(len(d["line_kind"]))
+            self.add_variables("idea_variables", idea.variables)
+        return DialogueGraph(
+            source=source,
+            strings=self.strings.paths,
+            assets=self.assets.paths,
+            asset_nodes=[self.declared.get(a) for a in self.assets.paths],
+            **self.data,
+        )
+
+
+def build_dialogue(root: Node, source: SourceStamp) -> DialogueGraph:
+    return _Builder(root).build(root, source)
+
+
+def get_dialogue_path(snapshot: Path) -> Path:
+    return snapshot.with_suffix(".dialogue.json")
+
+
+def load_dialogue(snapshot: Path) -> DialogueGraph:
+    """Load dialogue graph stored next to snapshot. It is recompiled only when snapshot content changed"""
+    return load_derived(snapshot, get_dialogue_path(snapshot), DialogueGraph, build_dialogue)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compile conversations of parsed project into dialogue graph")
+    parser.add_argument("-t", type=str, help="Snapshot file. Default data/tree.json", default="data/tree.json")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    graph = load_dialogue(Path(args.t))
+    elapsed = time.perf_counter() - start
+    declared = sum(p is not None for p in graph.asset_nodes)
+    print(
+        f"{len(graph.character_view)} characters, {len(graph.conversation_character)} conversations, "
+        f"{len(graph.idea_character)} idea responses, {len(graph.dialog_assets)} dialogs, {len(graph.line_kind)} lines, "
+        f"{len(graph.variable_name)} variables "
+        f"in {elapsed * 1000:.1f}ms"
+    )
+    print(f"{len(graph.assets)} assets, {declared} declared in asset lists, {graph.history_bits} history flags")
+    print(f"stored in {get_dialogue_path(Path(args.t))}")
+
+
+if __name__ == "__main__":
+    main()
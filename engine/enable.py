@@ -0,0 +1,79 @@
+import hashlib
+from collections.abc import Iterable
+
+
+class PathTable:
+    """Interned strings: every distinct path gets a dense integer id in order of interning"""
+
+    def __init__(self, paths: Iterable[str] = ()):
+        self.ids: dict[str, int] = {}
+        self.paths: list[str] = []
+        for p in paths:
+            self.intern(p)
+
+    def __len__(self) -> int:
+        return len(self.paths)
+
+    def __contains__(self, path: str) -> bool:
+        return path in self.ids
+
+    def __getitem__(self, i: int) -> str:
+        return self.paths[i]
+
+    def intern(self, path: str) -> int:
+        i = self.ids.get(path)
+        if i is None:
+            i = self.ids[path] = len(self.paths)
+            self.paths.append(path)
+        return i
+
+    def get(self, path: str) -> int | None:
+        return self.ids.get(path)
+
+
+class EnableState:
+    """
+    Enabled flags of interned paths packed into bits, 1 is enabled.
+    Ids out of range are enabled, as everything which is not disabled by project or triggers.
+    Snapshot is `bytes` of the bit array, so copying and hashing cost one memcpy
+    """
+
+    __slots__ = ("bits",)
+
+    def __init__(self, size: int = 0, disabled: Iterable[int] = ()):
+        self.bits = bytearray(b"\xff" * ((size + 7) >> 3))
+        for i in disabled:
+            self.set(i, False)
+
+    def __getitem__(self, i: int) -> bool:
+        byte = i >> 3
+        return byte >= len(self.bits) or bool(self.bits[byte] >> (i & 7) & 1)
+
+    def set(self, i: int, enabled: bool):
+        byte = i >> 3
+        if byte >= len(self.bits):
+            self.bits.extend(b"\xff" * (byte + 1 - len(self.bits)))
+        if enabled:
+            self.bits[byte] |= 1 << (i & 7)
+        else:
+            self.bits[byte] &= ~(1 << (i & 7))
+
+    def toggle(self, i: int):
+        self.set(i, not self[i])
+
+    def disabled(self) -> list[int]:
+        return [i for i in range(len(self.bits) << 3) if not self[i]]
+
+    def snapshot(self) -> bytes:
+        return bytes(self.bits)
+
+    def restore(self, snapshot: bytes):
+        self.bits[:] = snapshot
+
+    def copy(self) -> "EnableState":
+        res = EnableState()
+        res.bits[:] = self.bits
+        return res
+
+    def digest(self) -> bytes:
+        return hashlib.blake2b(self.bits, digest_size=16).digest()
@@ -0,0 +1,232 @@
+import argparse
+import hashlib
+import json
+import multiprocessing
+import pickle
+import struct
+import time
+from contextlib import nullcontext
+from typing import NamedTuple
+
+from pydantic import BaseModel
+
+from engine.program import Program, timer_id
+from engine.runtime import TIMER_EXPIRATION, Event, Runtime
+from engine.state import Values
+from vc_parser.schemas import Node, NodePath
+
+PLAYER_TRIGGERS = ("Mouse Click", "Mouse Double-Click")
+
+
+class GameState(NamedTuple):
+    view: NodePath | None
+    values: Values
+    enabled: bytes
+    inventory: str | None
+    timers: frozenset[tuple[NodePath, str, bool]]
+
+
+class ExploreReport(BaseModel):
+    states: int
+    transitions: int
+    seconds: float
+    states_per_second: float
+    reached_views: int
+    unreachable_views: list[NodePath]
+    dead_ends: list[NodePath]
+    complete: bool
+
+
+def state_digest(state: GameState) -> bytes:
+    """
+    Digest of canonical encoding of state. Pickle depends on object sharing and set order,
+    so it only moves states between processes
+    """
+    meta = json.dumps([state.view, state.values.strings, state.inventory, sorted(state.timers)]).encode()
+    h = hashlib.blake2b(struct.pack("<II", len(meta), len(state.enabled)), digest_size=16)
+    h.update(meta)
+    h.update(state.enabled)
+    for page in state.values.pages:
+        h.update(page)
+    return h.digest()
+
+
+class SymbolicRuntime(Runtime):
+    """Runtime without clock: pending timers are a set and any of them may expire next"""
+
+    def __init__(self, program: Program):
+        super().__init__(program)
+        self.timers: dict[tuple[NodePath, str], bool] = {}
+
+    def start_timer(self, path: NodePath, timer: str, expires_ms: int, periodic: bool):
+        self.timers[(path, timer)] = periodic
+
+    def stop_timer(self, path: NodePath, timer: str):
+        self.timers.pop((path, timer), None)
+
+    def snapshot(self) -> GameState:
+        return GameState(
+            view=self.view,
+            values=self.state.save(),
+            enabled=self.enabled.snapshot(),
+            inventory=self.inventory,
+            timers=frozenset((p, t, periodic) for (p, t), periodic in self.timers.items()),
+        )
+
+    def restore(self, state: GameState):
+        self.view = state.view
+        self.state.restore(state.values)
+        self.enabled.restore(state.enabled)
+        self.inventory = state.inventory
+        self.timers = {(p, t): periodic for p, t, periodic in state.timers}
+
+    def transitions(self) -> list[Event]:
+        """Everything player or clock can do in current state"""
+        res = []
+        n = self.program.nodes.get(self.view)
+        if n is not None and n.view_navigation is not None:
+            for i, nav in enumerate(n.view_navigation.navigations):
+                if not self.is_enabled(self.program.hotspots.get((self.view, f"navigation {i}"))):
+                    continue
+                d = nav.destination_view
+                dest = self.program.views.get((d.node, d.location, d.viewpoint, d.view))
+                if dest is not None:
+                    res.append(Event(path=dest, trigger=""))
+            for i in range(len(n.view_navigation.explorations)):
+                if not self.is_enabled(self.program.hotspots.get((self.view, f"exploration {i}"))):
+                    continue
+                for trigger in PLAYER_TRIGGERS:
+                    if (self.view, f"exploration {i}", trigger) in self.program.triggers:
+                        res.append(Event(path=self.view, owner=f"exploration {i}", trigger=trigger))
+        for trigger in PLAYER_TRIGGERS:
+            if (self.view, "", trigger) in self.program.triggers:
+                res.append(Event(path=self.view, trigger=trigger))
+        for p, timer in self.timers:
+            res.append(Event(path=p, trigger=TIMER_EXPIRATION, params={"Event::TimerID": timer_id(timer)}))
+        return res
+
+    def apply(self, event: Event):
+        if event.trigger == TIMER_EXPIRATION:
+            for (p, timer), periodic in list(self.timers.items()):
+                if p == event.path and timer_id(timer) == event.params["Event::TimerID"] and not periodic:
+                    del self.timers[(p, timer)]
+        self.handle(event)
+
+
+_runtime: SymbolicRuntime | None = None
+# Digests already sent by this worker, they are not sent to parent again
+_sent: set[bytes] = set()
+
+
+def _init_worker(snapshot: str):
+    global _runtime
+    with open(snapshot) as f:
+        _runtime = SymbolicRuntime(Program(Node.model_validate(json.load(f))))
+    _sent.clear()
+
+
+def expand(blob: bytes) -> tuple[list[tuple[bytes, NodePath | None, bytes]], int]:
+    """
+    Children of pickled state as (digest, view, pickled state) and number of
+    transitions which change state. State without them is a dead end
+    """
+    rt = _runtime
+    state = pickle.loads(blob)
+    rt.restore(state)
+    children = []
+    transitions = 0
+    for event in rt.transitions():
+        rt.restore(state)
+        rt.apply(event)
+        child = rt.snapshot()
+        if child == state:
+            continue
+        transitions += 1
+        digest = state_digest(child)
+        if digest not in _sent:
+            _sent.add(digest)
+            children.append((digest, child.view, pickle.dumps(child)))
+    return children, transitions
+
+
+def explore(snapshot: str, start: NodePath | None, max_states: int, workers: int) -> ExploreReport:
+    _init_worker(snapshot)
+    program = _runtime.program
+    if start is None:
+        start = next(p for p in program.views.values() if program.nodes[p].view_navigation is not None)
+    _runtime.start(start)
+    state = _runtime.snapshot()
+    initial = pickle.dumps(state)
+
+    visited = {state_digest(state)}
+    views = {start}
+    # (view, pickled state)
+    frontier = [(start, initial)]
+    dead_ends = set()
+    transitions = 0
+    started = time.perf_counter()
+    # One worker explores in this process
+    if workers > 1:
+        context = multiprocessing.Pool(workers, initializer=_init_worker, initargs=(snapshot,))
+    else:
+        context = nullcontext()
+    with context as pool:
+        while frontier and len(visited) < max_states:
+            blobs = [blob for _, blob in frontier]
+            if pool is not None:
+                results = pool.imap(expand, blobs, max(1, len(frontier) // (workers * 4)))
+            else:
+                results = map(expand, blobs)
+            next_frontier = []
+            for (view, _), (children, state_transitions) in zip(frontier, results):
+                transitions += state_transitions
+                if not state_transitions:
+                    dead_ends.add(view)
+                for digest, child_view, child in children:
+                    if digest not in visited and len(visited) < max_states:
+                        visited.add(digest)
+                        views.add(child_view)
+                        next_frontier.append((child_view, child))
+            frontier = next_frontier
+    elapsed = time.perf_counter() - started
+    all_views = set(program.views.values())
+    return ExploreReport(
+        states=len(visited),
+        transitions=transitions,
+        seconds=elapsed,
+        states_per_second=len(visited) / elapsed if elapsed else 0,
+        reached_views=len(views & all_views),
+        unreachable_views=sorted(all_views - views),
+        dead_ends=sorted(p for p in dead_ends if p is not None),
+        complete=not frontier,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Explore reachable game states of parsed project")
+    parser.add_argument("-t", type=str, help="Snapshot file. Default data/tree.json", default="data/tree.json")
+    parser.add_argument("-s", type=str, help="Path of start view. Default first view with navigations", default=None)
+    parser.add_argument("-n", type=int, help="Max states to explore. Default 100000", default=100000)
+    parser.add_argument(
+        "-w",
+        type=int,
+        help="Worker processes, 1 explores in this process. Default CPU count",
+        default=multiprocessing.cpu_count(),
+    )
+    parser.add_argument("-o", type=str, help="Write report into file", default=None)
+    args = parser.parse_args()
+
+    report = explore(args.t, args.s, args.n, args.w)
+    print(f"{report.states} states, {report.transitions} transitions in {report.seconds:.1f}s ({report.states_per_second:,.0f} states/sec)")
+    print(f"complete: {report.complete}")
+    print(f"reached views: {report.reached_views}, unreachable: {len(report.unreachable_views)}")
+    print(f"views with dead end states: {len(report.dead_ends)}")
+    for p in report.dead_ends:
+        print(f"  {p}")
+    if args.o is not None:
+        with open(args.o, "w") as f:
+            f.write(report.model_dump_json(indent=2))
+
+
+if __name__ == "__main__":
+    main()
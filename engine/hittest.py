@@ -0,0 +1,144 @@
+from typing import NamedTuple
+
+import numpy as np
+
+from engine.enable import EnableState
+from engine.program import Program
+from engine.runtime import Event
+from vc_parser.schemas import HotSpot, NodePath, ViewNavigation
+
+# Kinds of hotspots from top to bottom. Inside one kind the first defined is on top
+Z_ORDER = ("character", "exploration", "navigation")
+# Grid cell is CELL x CELL pixels
+CELL_BITS = 5
+# Hotspot ids of points without hit in batch queries
+NO_HIT = -1
+
+
+class Hit(NamedTuple):
+    kind: str
+    index: int
+    cursor: str
+    # Id of hotspot name in `Program.paths`, None if it can't be disabled
+    key: int | None
+    # View change for navigations, None for others
+    destination: NodePath | None
+
+    @property
+    def owner(self) -> str:
+        """Owner of hotspot triggers as in `Node.all_triggers`"""
+        return f"{self.kind} {self.index}"
+
+
+def _contains(h: HotSpot, x: int, y: int) -> bool:
+    return h.left <= x < h.right and h.top <= y < h.bottom
+
+
+class ViewHitIndex:
+    """
+    Hotspots of one view in a uniform grid. Every cell keeps hotspots crossing it
+    in z-order, so a point query checks only few rectangles of its cell.
+    `table` is the grid as array: row per cell, hotspot ids padded with `NO_HIT`
+    """
+
+    def __init__(self, hits: list[Hit], rects: list[HotSpot]):
+        self.hits = hits
+        self.rects = np.array([(h.left, h.top, h.right, h.bottom) for h in rects], dtype=np.int32).reshape(-1, 4)
+        self.keys = np.array([-1 if h.key is None else h.key for h in hits], dtype=np.int64)
+        self.cols = (int(self.rects[:, 2].max(initial=0)) >> CELL_BITS) + 1
+        self.rows = (int(self.rects[:, 3].max(initial=0)) >> CELL_BITS) + 1
+        self.cells: list[list[tuple[int, HotSpot]]] = [[] for _ in range(self.cols * self.rows)]
+        for i, h in enumerate(rects):
+            if h.right <= h.left or h.bottom <= h.top:
+                continue
+            for row in range(h.top >> CELL_BITS, ((h.bottom - 1) >> CELL_BITS) + 1):
+                for col in range(h.left >> CELL_BITS, ((h.right - 1) >> CELL_BITS) + 1):
+                    self.cells[row * self.cols + col].append((i, h))
+        depth = max((len(c) for c in self.cells), default=0)
+        self.table = np.full((len(self.cells), max(depth, 1)), NO_HIT, dtype=np.int64)
+        for c, items in enumerate(self.cells):
+            self.table[c, : len(items)] = [i for i, _ in items]
+        # Rectangles of `table`, padding takes the appended empty one which contains no point
+        self.table_rects = np.vstack([self.rects, np.zeros((1, 4), dtype=np.int32)])[self.table]
+
+    def hit(self, x: int, y: int, enabled: EnableState | None = None) -> Hit | None:
+        """Topmost enabled hotspot under point"""
+        col, row = x >> CELL_BITS, y >> CELL_BITS
+        if x < 0 or y < 0 or col >= self.cols or row >= self.rows:
+            return None
+        for i, h in self.cells[row * self.cols + col]:
+            if _contains(h, x, y):
+                hit = self.hits[i]
+                if enabled is None or hit.key is None or enabled[hit.key]:
+                    return hit
+        return None
+
+    def hit_many(self, points: np.ndarray, enabled: EnableState | None = None) -> np.ndarray:
+        """Index in `hits` of topmost enabled hotspot for every (x, y) row of `points`, `NO_HIT` if none"""
+        points = np.asarray(points, dtype=np.int64)
+        res = np.full(len(points), NO_HIT, dtype=np.int64)
+        if not self.hits:
+            return res
+        x, y = points[:, 0], points[:, 1]
+        col, row = x >> CELL_BITS, y >> CELL_BITS
+        rows = np.flatnonzero((x >= 0) & (y >= 0) & (col < self.cols) & (row < self.rows))
+        # Candidates of every point are hotspots of its cell
+        cells = row[rows] * self.cols + col[rows]
+        candidates, r = self.table[cells], self.table_rects[cells]
+        x, y = x[rows, None], y[rows, None]
+        inside = (r[..., 0] <= x) & (x < r[..., 2]) & (r[..., 1] <= y) & (y < r[..., 3])
+        if enabled is not None:
+            allowed = np.array([k < 0 or enabled[k] for k in self.keys.tolist()])
+            inside &= allowed[candidates]
+        first = inside.argmax(axis=1)
+        hit = inside[np.arange(len(rows)), first]
+        res[rows[hit]] = candidates[hit, first[hit]]
+        return res
+
+
+class HitTestIndex:
+    """Hit test indexes of all views with parsed navigation"""
+
+    def __init__(self, program: Program):
+        self.program = program
+        self.views: dict[NodePath, ViewHitIndex] = {}
+        for path, n in program.nodes.items():
+            if n.view_navigation is not None:
+                self.views[path] = self.build(path, n.view_navigation)
+
+    def build(self, path: NodePath, v: ViewNavigation) -> ViewHitIndex:
+        hits, rects = [], []
+        for kind in Z_ORDER:
+            if kind == "character":
+                for i, c in enumerate(v.characters):
+                    key = self.program.hotspots.get((path, f"{kind} {i}"))
+                    hits.append(Hit(kind, i, c.hot_spot.cursor, key, None))
+                    rects.append(c.hot_spot)
+            elif kind == "exploration":
+                for i, e in enumerate(v.explorations):
+                    key = self.program.hotspots.get((path, f"{kind} {i}"))
+                    hits.append(Hit(kind, i, e.hot_spot.cursor, key, None))
+                    rects.append(e.hot_spot)
+            else:
+                for i, nav in enumerate(v.navigations):
+                    d = nav.destination_view
+                    destination = self.program.views.get((d.node, d.location, d.viewpoint, d.view))
+                    key = self.program.hotspots.get((path, f"{kind} {i}"))
+                    hits.append(Hit(kind, i, nav.hot_spot.cursor, key, destination))
+                    rects.append(nav.hot_spot)
+        return ViewHitIndex(hits, rects)
+
+    def hit(self, view: NodePath, x: int, y: int, enabled: EnableState | None = None) -> Hit | None:
+        index = self.views.get(view)
+        return None if index is None else index.hit(x, y, enabled)
+
+    def event(
+        self, view: NodePath, x: int, y: int, enabled: EnableState | None = None, trigger: str = "Mouse Click"
+    ) -> Event | None:
+        """Event of click at point: view change for navigation, hotspot trigger for others"""
+        hit = self.hit(view, x, y, enabled)
+        if hit is None:
+            return None
+        if hit.kind == "navigation":
+            return None if hit.destination is None else Event(path=hit.destination, trigger="")
+        return Event(path=view, owner=hit.owner, trigger=trigger)
@@ -0,0 +1,210 @@
+import multiprocessing
+import time
+from typing import Any
+
+from pydantic import BaseModel
+
+from engine.lint import RULES, Rule
+from engine.program import (
+    OWNER_SCOPES,
+    ViewTarget,
+    character_owners,
+    exploration_key,
+    navigation_key,
+    preset_key,
+    under,
+)
+from vc_parser.expressions import SCOPE_DEPTH, parse_variable_ref
+from vc_parser.loader import walk_raw
+from vc_parser.schemas import (
+    ActionParamAsset,
+    ActionParamCppFunction,
+    ActionParamEnable,
+    ActionParamSetView,
+    ActionParamStatement,
+    Node,
+    NodePath,
+    ViewNavigation,
+)
+
+
+class Issue(BaseModel):
+    """
+    Dangling reference. `owner` is as in `Node.all_triggers`, `character_owners` or `navigation <i>`,
+    `trigger`/`index` are None for navigations
+    """
+
+    rule: Rule
+    path: NodePath
+    owner: str
+    trigger: str | None
+    index: int | None
+    target: str
+
+
+class LintReport(BaseModel):
+    issues: list[Issue]
+    # References checked by rule, rules without lookup data are not run
+    checked: dict[Rule, int]
+    seconds: float
+
+
+class Lookups:
+    """
+    Names every reference may point to, built once from the whole project and sent to workers.
+    Enable actions name hotspots, characters, conversations, assets and nodes, so all of them are accepted.
+    Short names of preset hotspots (`Nav : Default Left`) are accepted where a view under the node of action has one
+    """
+
+    def __init__(self, raw: dict[str, Any], assets: set[str] | None = None):
+        self.views: set[ViewTarget] = set()
+        self.enable: set[str] = set()
+        self.declared: set[tuple[NodePath, str]] = set()
+        # (view path, owner, name) of variables of characters, conversations and idea responses
+        self.owned: set[tuple[NodePath, str, str]] = set()
+        # Short names of preset hotspots -> views having them
+        self.presets: dict[str, list[NodePath]] = {}
+        self.assets = assets
+        names = {raw["path"]: (raw["name"],)}
+        for n in walk_raw(raw):
+            chain = names[n["path"]]
+            for c in n["childrens"]:
+                names[c["path"]] = (*chain, c["name"])
+            if len(chain) == 5:
+                self.views.add(chain[1:])
+            self.enable.add(n["name"])
+            self.enable.update(n["asset_names"])
+            self.declared.update((n["path"], v["name"]) for v in n["variables"])
+            if n["view_navigation"] is not None:
+                v = ViewNavigation.model_validate(n["view_navigation"])
+                self.enable.update(exploration_key(e) for e in v.explorations)
+                self.enable.update(navigation_key(nav) for nav in v.navigations)
+                for o in character_owners(v):
+                    if o.name is not None:
+                        self.enable.add(o.name)
+                    # Dialogs are assets
+                    self.enable.update(o.dialogs)
+                    self.owned.update((n["path"], o.owner, var.name) for var in o.variables)
+                hotspots = [("Explorable", e.hot_spot) for e in v.explorations] + [("Nav", nav.hot_spot) for nav in v.navigations]
+                for kind, h in hotspots:
+                    if (preset := preset_key(kind, h)) is not None:
+                        self.presets.setdefault(preset, []).append(n["path"])
+        if assets is not None:
+            self.enable |= assets
+
+
+class Checker:
+    def __init__(self, lookups: Lookups, rules: tuple[Rule, ...]):
+        self.lookups = lookups
+        self.rules = [r for r in rules if r != "asset" or lookups.assets is not None]
+        self.issues: list[Issue] = []
+        self.checked: dict[Rule, int] = dict.fromkeys(self.rules, 0)
+
+    def check(self, rule: Rule, ok: bool, path: NodePath, owner: str, trigger: str | None, index: int | None, target: str):
+        self.checked[rule] += 1
+        if not ok:
+            self.issues.append(Issue(rule=rule, path=path, owner=owner, trigger=trigger, index=index, target=target))
+
+    def declared(self, chain: list[NodePath], scope: str, name: str) -> bool:
+        """Variable is found like `Program.resolve` does: node of its scope, then any ancestor"""
+        depth = SCOPE_DEPTH[scope]
+        d = self.lookups.declared
+        return (depth < len(chain) and (chain[depth], name) in d) or any((p, name) in d for p in chain)
+
+    def owner_declared(self, path: NodePath, owner: str, scope: str, name: str) -> bool:
+        """`Char::` and `Conv::` variable is declared by the owner of trigger like `Program.resolve` finds it"""
+        words = OWNER_SCOPES[scope]
+        parts = owner.split()
+        return len(parts) >= words and (path, " ".join(parts[:words]), name) in self.lookups.owned
+
+    def enable_exists(self, path: NodePath, name: str) -> bool:
+        """Enable path of action in node with `path` names something, resolved like `Program.enable_keys`"""
+        lk = self.lookups
+        return name in lk.enable or any(under(view, path) for view in lk.presets.get(name, ()))
+
+    def check_node(self, n: Node, chain: list[NodePath]):
+        """Check node whose path is the last of `chain`, paths from root"""
+        lk = self.lookups
+        if n.view_navigation is not None and "destination" in self.checked:
+            for i, nav in enumerate(n.view_navigation.navigations):
+                d = nav.destination_view
+                target = (d.node, d.location, d.viewpoint, d.view)
+                self.check("destination", target in lk.views, n.path, f"navigation {i}", None, None, ",".join(target))
+        triggers = list(n.all_triggers())
+        if n.view_navigation is not None:
+            triggers += [(o.owner, t) for o in character_owners(n.view_navigation) for t in o.triggers]
+        for owner, t in triggers:
+            for i, a in enumerate(t.actions):
+                p = a.action_params
+                where = (n.path, owner, t.name, i)
+                exps = [a.exp1, a.exp2]
+                match p:
+                    case ActionParamSetView() if "set_view" in self.checked:
+                        target = (p.node, p.location, p.view_point, p.view)
+                        self.check("set_view", target in lk.views, *where, ",".join(target))
+                    case ActionParamEnable() if "enable" in self.checked:
+                        self.check("enable", self.enable_exists(n.path, p.path), *where, p.path)
+                    case ActionParamAsset() if "asset" in self.checked and p.asset:
+                        self.check("asset", p.asset in lk.assets, *where, p.asset)
+                    case ActionParamStatement():
+                        exps += [p.exp1, p.exp2]
+                    case ActionParamCppFunction():
+                        exps += p.parameters
+                if "variable" not in self.checked:
+                    continue
+                for e in exps:
+                    ref = parse_variable_ref(e)
+                    # Locals and event parameters aren't declared in tree
+                    if ref is None:
+                        continue
+                    if ref.scope in SCOPE_DEPTH:
+                        self.check("variable", self.declared(chain, ref.scope, ref.name), *where, e)
+                    elif ref.scope in OWNER_SCOPES:
+                        self.check("variable", self.owner_declared(n.path, owner, ref.scope, ref.name), *where, e)
+
+    def check_subtree(self, n: Node, chain: list[NodePath]):
+        chain = [*chain, n.path]
+        self.check_node(n, chain)
+        for c in n.childrens:
+            self.check_subtree(c, chain)
+
+
+_lookups: Lookups | None = None
+_rules: tuple[Rule, ...] = RULES
+
+
+def _init_worker(lookups: Lookups, rules: tuple[Rule, ...]):
+    global _lookups, _rules
+    _lookups, _rules = lookups, rules
+
+
+def lint_chapter(task: tuple[dict[str, Any], list[NodePath]]) -> tuple[list[Issue], dict[Rule, int]]:
+    """Check raw chapter subtree, `task` is (chapter, paths of its ancestors)"""
+    raw, chain = task
+    checker = Checker(_lookups, _rules)
+    checker.check_subtree(Node.model_validate(raw), chain)
+    return checker.issues, checker.checked
+
+
+def lint(raw: dict[str, Any], assets: set[str] | None = None, rules: tuple[Rule, ...] = RULES, workers: int = 1) -> LintReport:
+    """
+    Check references of raw snapshot. Lookups are built once in this process,
+    chapters are validated and checked in a pool of `workers` processes
+    """
+    start = time.perf_counter()
+    lookups = Lookups(raw, assets)
+    # Root is checked without children as its own task
+    tasks = [({**raw, "childrens": []}, []), *((c, [raw["path"]]) for c in raw["childrens"])]
+    if workers > 1:
+        with multiprocessing.Pool(workers, initializer=_init_worker, initargs=(lookups, rules)) as pool:
+            results = pool.map(lint_chapter, tasks, chunksize=1)
+    else:
+        _init_worker(lookups, rules)
+        results = list(map(lint_chapter, tasks))
+    issues = []
+    checked: dict[Rule, int] = {}
+    for chapter_issues, chapter_checked in results:
+        issues += chapter_issues
+        for rule, count in chapter_checked.items():
+            checked[rule] = checked.get(rule, 0) + count
+    return LintReport(issues=issues, checked=checked, seconds=time.perf_counter() - start)
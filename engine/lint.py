@@ -0,0 +1,51 @@
+"""
+Lint CLI reporting dangling references of parsed project. Checks are in `engine.integrity`,
+it's imported when the lint runs, so the command starts without engine and schemas
+"""
+
+import argparse
+import multiprocessing
+import sys
+from typing import Literal, get_args
+
+from vc_parser.loader import load_raw
+
+Rule = Literal["set_view", "destination", "enable", "asset", "variable"]
+RULES: tuple[Rule, ...] = get_args(Rule)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report dangling references of parsed project")
+    parser.add_argument("-t", type=str, help="Snapshot file. Default data/tree.json", default="data/tree.json")
+    parser.add_argument("-a", type=str, help="Assets file of ASSETS parse, asset rule needs it", default=None)
+    parser.add_argument("-r", type=str, nargs="+", choices=RULES, help="Rules to run. Default all", default=list(RULES))
+    parser.add_argument(
+        "-w",
+        type=int,
+        help="Worker processes, 1 checks in this process. Default CPU count",
+        default=multiprocessing.cpu_count(),
+    )
+    parser.add_argument("-o", type=str, help="Write report into file", default=None)
+    args = parser.parse_args()
+
+    from engine.integrity import lint
+    from vc_parser.database import load_assets
+
+    assets = {a.name for a in load_assets(args.a)} if args.a else None
+    report = lint(load_raw(args.t), assets, tuple(args.r), args.w)
+    for i in report.issues:
+        where = i.path if not i.owner else f"{i.path} ({i.owner})"
+        if i.trigger is not None:
+            where += f" [{i.trigger} #{i.index}]"
+        print(f"{i.rule:<12} {where}: {i.target}")
+    checked = ", ".join(f"{rule} {n}" for rule, n in report.checked.items())
+    print(f"{len(report.issues)} dangling of {sum(report.checked.values())} references ({checked}) in {report.seconds:.2f}s")
+    if args.o is not None:
+        with open(args.o, "w") as f:
+            f.write(report.model_dump_json(indent=2))
+    if report.issues:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,278 @@
+import argparse
+import json
+from typing import Any
+
+from pydantic import BaseModel
+
+from engine.program import COMPARE_OPERATORS, Program
+from vc_parser.expressions import FRAME_SCOPES, parse_literal, parse_variable_ref
+from vc_parser.schemas import (
+    ActionParamAsset,
+    ActionParamCppFunction,
+    ActionParamEnable,
+    ActionParamStatement,
+    Node,
+    NodePath,
+    Trigger,
+    TriggerAction,
+    Variable,
+)
+
+# Constant value is not known at compile time
+UNKNOWN = object()
+
+
+class Removed(BaseModel):
+    path: NodePath
+    owner: str
+    trigger: str
+    action: str
+    reason: str
+
+
+class OptimizeReport(BaseModel):
+    constants: int
+    substituted: int
+    folded_true: int
+    removed: list[Removed]
+    removed_triggers: int
+    actions_before: int
+    actions_after: int
+    conditions_before: int
+    conditions_after: int
+
+
+def folded_value(v: Variable) -> Any:
+    """Initial value as runtime reads it, `StateStore` reads integers which weren't parsed as 0"""
+    if v.type == "Integer" and not isinstance(v.initial_value, int):
+        return 0
+    return v.initial_value
+
+
+def format_literal(value: Any, type_name: str | None) -> str:
+    """Literal expression which `parse_literal` reads back as `value`"""
+    if isinstance(value, bool):
+        return f"{'TRUE' if value else 'FALSE'} (Bool)"
+    if isinstance(value, int):
+        return f"{value} (Int)"
+    return f"{value} ({type_name or 'Str'})"
+
+
+class Optimizer:
+    """
+    Folds constant variables into trigger actions of parsed tree.
+    Variable is constant if it's declared with `is_constant` and no statement writes it.
+    `keep` are name prefixes of constants which are changed outside of triggers, preferences by default
+    """
+
+    def __init__(self, root: Node, keep: tuple[str, ...] = ("Pref_",)):
+        self.root = root.model_copy(deep=True)
+        self.program = Program(self.root)
+        written = set()
+        triggers = [(n.path, owner, t) for n in self.root.walk() for owner, t in n.all_triggers()]
+        # Triggers of conversations and idea responses aren't optimized, but they write variables too
+        triggers += [(path, owner, t) for path, owner, ts in self.program.owned_triggers for t in ts]
+        for path, owner, t in triggers:
+            for a in t.actions:
+                p = a.action_params
+                ref = parse_variable_ref(p.exp1) if isinstance(p, ActionParamStatement) else None
+                if ref is not None and ref.scope not in FRAME_SCOPES:
+                    written.add(self.program.resolve(path, ref, owner))
+        self.constants: dict[int, Any] = {
+            slot: folded_value(v)
+            for slot, (_, v) in enumerate(self.program.variables)
+            if v.is_constant and slot not in written and not v.name.startswith(keep)
+        }
+        self.substituted = 0
+        self.folded_true = 0
+        self.removed: list[Removed] = []
+        self.removed_triggers = 0
+
+    def constant(self, path: NodePath, exp: str, type_hint: str | None, owner: str = "") -> Any:
+        """Value of operand if it's a literal or constant variable, otherwise `UNKNOWN`"""
+        if not exp.strip():
+            return UNKNOWN
+        ref = parse_variable_ref(exp)
+        if ref is None:
+            return parse_literal(exp, type_hint)
+        if ref.scope in FRAME_SCOPES:
+            return UNKNOWN
+        return self.constants.get(self.program.resolve(path, ref, owner), UNKNOWN)
+
+    def substitute(self, path: NodePath, exp: str, owner: str = "") -> str:
+        """Replace constant variable in operand with literal"""
+        ref = parse_variable_ref(exp)
+        if ref is None or ref.scope in FRAME_SCOPES:
+            return exp
+        value = self.constants.get(self.program.resolve(path, ref, owner), UNKNOWN)
+        if value is UNKNOWN:
+            return exp
+        self.substituted += 1
+        return format_literal(value, ref.type)
+
+    def fold_condition(self, path: NodePath, a: TriggerAction, owner: str = "") -> bool | None:
+        """True or False if condition of action is known at compile time, None otherwise"""
+        if not a.exp1.strip():
+            return True
+        ref1, ref2 = parse_variable_ref(a.exp1), parse_variable_ref(a.exp2)
+        v1 = self.constant(path, a.exp1, ref2.type if ref2 else None, owner)
+        if not a.exp2.strip() and a.op not in ("and", "or"):
+            return None if v1 is UNKNOWN else bool(v1)
+        v2 = self.constant(path, a.exp2, ref1.type if ref1 else None, owner)
+        known = [v for v in (v1, v2) if v is not UNKNOWN]
+        if len(known) == 2:
+            try:
+                return COMPARE_OPERATORS[a.op](v1, v2)
+            except TypeError:
+                return False
+        if a.op == "and" and any(not v for v in known):
+            return False
+        if a.op == "or" and any(known):
+            return True
+        return None
+
+    def optimize_action(self, path: NodePath, a: TriggerAction, owner: str = "") -> TriggerAction | None:
+        """Action with folded constants, None if it is never run or does nothing"""
+        folded = self.fold_condition(path, a, owner)
+        if folded is False:
+            return None
+        update = {}
+        if folded is True and a.exp1.strip():
+            self.folded_true += 1
+            update.update(exp1="", op="=", exp2="")
+        elif folded is None:
+            update.update(exp1=self.substitute(path, a.exp1, owner), exp2=self.substitute(path, a.exp2, owner))
+        p = a.action_params
+        if isinstance(p, ActionParamStatement):
+            update["action_params"] = p.model_copy(update={"exp2": self.substitute(path, p.exp2, owner)})
+        return a.model_copy(update=update) if update else a
+
+    def is_noop(self, a: TriggerAction) -> bool:
+        p = a.action_params
+        match p:
+            case ActionParamCppFunction():
+                return not p.function
+            case ActionParamAsset():
+                return p.asset is None and p.action is None
+            case ActionParamStatement():
+                return parse_variable_ref(p.exp1) is None
+        return False
+
+    def variable(self, path: NodePath, exp: str, owner: str = "") -> int | str | None:
+        """Slot of variable in operand, name for frame variables"""
+        ref = parse_variable_ref(exp)
+        if ref is None:
+            return None
+        if ref.scope in FRAME_SCOPES:
+            return f"{ref.scope}::{ref.name}"
+        return self.program.resolve(path, ref, owner)
+
+    def overwrites(self, path: NodePath, prev: TriggerAction, cur: TriggerAction, owner: str = "") -> bool:
+        """Unconditional `cur` right after unconditional `prev` makes `prev` useless"""
+        if prev.exp1.strip() or cur.exp1.strip() or type(prev.action_params) is not type(cur.action_params):
+            return False
+        p, c = prev.action_params, cur.action_params
+        match c:
+            case ActionParamEnable():
+                return p.path == c.path
+            case ActionParamStatement():
+                target = self.variable(path, c.exp1, owner)
+                return (
+                    c.op == "="
+                    and target == self.variable(path, p.exp1, owner)
+                    and self.variable(path, c.exp2, owner) != target
+                )
+        return False
+
+    def optimize_trigger(self, path: NodePath, owner: str, t: Trigger):
+        actions = []
+        for a in t.actions:
+            optimized = self.optimize_action(path, a, owner)
+            if optimized is None:
+                self.removed.append(Removed(path=path, owner=owner, trigger=t.name, action=a.name, reason="never"))
+                continue
+            if self.is_noop(optimized):
+                self.removed.append(Removed(path=path, owner=owner, trigger=t.name, action=a.name, reason="no-op"))
+                continue
+            if actions and self.overwrites(path, actions[-1], optimized, owner):
+                prev = actions.pop()
+                self.removed.append(
+                    Removed(path=path, owner=owner, trigger=t.name, action=prev.name, reason="overwritten")
+                )
+            actions.append(optimized)
+        t.actions = actions
+
+    def _without_empty(self, triggers: list[Trigger]) -> list[Trigger]:
+        res = [t for t in triggers if t.actions]
+        self.removed_triggers += len(triggers) - len(res)
+        return res
+
+    def run(self) -> tuple[Node, OptimizeReport]:
+        actions_before, conditions_before = _count(self.root)
+        for n in self.root.walk():
+            for owner, t in n.all_triggers():
+                self.optimize_trigger(n.path, owner, t)
+            n.triggers = self._without_empty(n.triggers)
+            if n.view_navigation is not None:
+                for e in [*n.view_navigation.explorations, *n.view_navigation.characters]:
+                    e.triggers = self._without_empty(e.triggers)
+        actions_after, conditions_after = _count(self.root)
+        return self.root, OptimizeReport(
+            constants=len(self.constants),
+            substituted=self.substituted,
+            folded_true=self.folded_true,
+            removed=self.removed,
+            removed_triggers=self.removed_triggers,
+            actions_before=actions_before,
+            actions_after=actions_after,
+            conditions_before=conditions_before,
+            conditions_after=conditions_after,
+        )
+
+
+def _count(root: Node) -> tuple[int, int]:
+    """Number of actions and conditions evaluated by runtime"""
+    actions = conditions = 0
+    for n in root.walk():
+        for _, t in n.all_triggers():
+            actions += len(t.actions)
+            conditions += sum(1 for a in t.actions if a.exp1.strip())
+    return actions, conditions
+
+
+def optimize(root: Node, keep: tuple[str, ...] = ("Pref_",)) -> tuple[Node, OptimizeReport]:
+    """Optimized copy of tree and report of what was changed"""
+    return Optimizer(root, keep).run()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fold constants and remove dead actions of parsed project")
+    parser.add_argument("-t", type=str, help="Snapshot file. Default data/tree.json", default="data/tree.json")
+    parser.add_argument("-o", type=str, help="Optimized snapshot. Default data/tree.optimized.json", default="data/tree.optimized.json")
+    parser.add_argument("-r", type=str, help="Write report into file", default=None)
+    parser.add_argument(
+        "-k",
+        type=str,
+        nargs="*",
+        help="Keep constants with these name prefixes, -k without prefixes folds preferences too. Default Pref_",
+        default=["Pref_"],
+    )
+    args = parser.parse_args()
+
+    with open(args.t) as f:
+        root = Node.model_validate(json.load(f))
+    optimized, report = optimize(root, tuple(args.k))
+    with open(args.o, "w") as f:
+        f.write(optimized.model_dump_json(indent=2))
+    print(f"{report.constants} constants, {report.substituted} operands substituted, {report.folded_true} conditions always true")
+    print(f"actions: {report.actions_before} -> {report.actions_after}, conditions: {report.conditions_before} -> {report.conditions_after}")
+    print(f"removed {len(report.removed)} actions and {report.removed_triggers} empty triggers")
+    for r in report.removed:
+        print(f"  {r.reason}: {r.path} [{r.owner or 'node'}] {r.trigger}: {r.action}")
+    if args.r is not None:
+        with open(args.r, "w") as f:
+            f.write(report.model_dump_json(indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+import argparse
+import json
+import time
+from bisect import bisect_left
+from collections.abc import Iterable
+
+import numpy as np
+
+from vc_parser.database import load_assets
+from vc_parser.schemas import ActionParamEnable, Node
+
+# Separator of levels in asset names and Enable paths, like `Navs:Field OfficeR:13Day:013-Fo-13etk2.mov`
+SEP = ":"
+
+
+class _Node:
+    __slots__ = ("children", "hi", "lo", "name")
+
+    def __init__(self, lo: int):
+        self.children: dict[str, _Node] = {}
+        # Range of sorted names in subtree
+        self.lo = lo
+        self.hi = lo
+        # Sorted position of the name ending at this node
+        self.name: int | None = None
+
+
+class PrefixIndex:
+    """
+    Trie over names split by ':'. Names are sorted by their levels, so every
+    trie node covers a contiguous range of them and a prefix query is a slice.
+    Prefixes are plain string prefixes: `Navs:Field Off` matches `Navs:Field OfficeR:...`,
+    `Navs:Field OfficeR:` matches only names under that group.
+    `ids` are positions of names in the iterable index was built from, e.g. ids of `Program.paths`
+    """
+
+    def __init__(self, names: Iterable[str]):
+        unique = list(dict.fromkeys(names))
+        order = sorted(range(len(unique)), key=lambda i: unique[i].split(SEP))
+        self.names = [unique[i] for i in order]
+        self.ids = np.array(order, dtype=np.int64)
+        self.root = _Node(0)
+        for i, name in enumerate(self.names):
+            node = self.root
+            node.hi = i + 1
+            for level in name.split(SEP):
+                child = node.children.get(level)
+                if child is None:
+                    child = node.children[level] = _Node(i)
+                child.hi = i + 1
+                node = child
+            node.name = i
+
+    @classmethod
+    def from_project(cls, root: Node, assets: Iterable[str] = ()) -> "PrefixIndex":
+        """Index of asset list names, asset names of nodes and Enable paths"""
+        names = list(assets)
+        for n in root.walk():
+            names += n.asset_names
+            for _, t in n.all_triggers():
+                names += [a.action_params.path for a in t.actions if isinstance(a.action_params, ActionParamEnable)]
+        return cls(names)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __contains__(self, name: str) -> bool:
+        node = self._find(name.split(SEP))
+        return node is not None and node.name is not None
+
+    def _find(self, levels: list[str]) -> _Node | None:
+        node = self.root
+        for level in levels:
+            node = node.children.get(level)
+            if node is None:
+                return None
+        return node
+
+    def range(self, prefix: str) -> range:
+        """Sorted positions of names starting with prefix"""
+        *levels, last = prefix.split(SEP)
+        node = self._find(levels)
+        if node is None:
+            return range(0)
+        # Children are in sorted order, those starting with `last` are adjacent
+        keys = list(node.children)
+        first = bisect_left(keys, last)
+        end = first
+        while end < len(keys) and keys[end].startswith(last):
+            end += 1
+        if first == end:
+            return range(0)
+        return range(node.children[keys[first]].lo, node.children[keys[end - 1]].hi)
+
+    def count(self, prefix: str) -> int:
+        return len(self.range(prefix))
+
+    def with_prefix(self, prefix: str) -> list[str]:
+        r = self.range(prefix)
+        return self.names[r.start : r.stop]
+
+    def keys(self, prefix: str) -> np.ndarray:
+        """Ids of names starting with prefix, for group operations on `Program.paths` ids"""
+        r = self.range(prefix)
+        return self.ids[r.start : r.stop]
+
+    def longest_prefix(self, name: str) -> str | None:
+        """The longest indexed name which is `name` itself or a group containing it"""
+        node = self.root
+        found = None
+        for level in name.split(SEP):
+            node = node.children.get(level)
+            if node is None:
+                break
+            if node.name is not None:
+                found = node.name
+        return None if found is None else self.names[found]
+
+    def children(self, group: str) -> list[str]:
+        """Next levels under group, '' is the top level"""
+        node = self._find(group.split(SEP)) if group else self.root
+        return [] if node is None else list(node.children)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query asset names and Enable paths by ':' separated prefix")
+    parser.add_argument("prefix", type=str, help="Name prefix, e.g. 'Navs:Field OfficeR:13Day:'")
+    parser.add_argument("-t", type=str, help="Snapshot file. Default data/tree.json", default="data/tree.json")
+    parser.add_argument("-a", type=str, help="Assets file of ASSETS parse", default=None)
+    parser.add_argument("--children", action="store_true", help="List next levels under prefix instead of names")
+    parser.add_argument("--longest", action="store_true", help="The longest indexed name which is prefix of argument")
+    args = parser.parse_args()
+
+    with open(args.t) as f:
+        root = Node.model_validate(json.load(f))
+    assets = [a.name for a in load_assets(args.a)] if args.a else []
+    start = time.perf_counter()
+    index = PrefixIndex.from_project(root, assets)
+    built = time.perf_counter()
+    if args.children:
+        res = index.children(args.prefix.removesuffix(SEP))
+    elif args.longest:
+        res = [m] if (m := index.longest_prefix(args.prefix)) is not None else []
+    else:
+        res = index.with_prefix(args.prefix)
+    elapsed = time.perf_counter() - built
+    for r in res:
+        print(r)
+    print(f"{len(res)} of {len(index)} names, built in {(built - start) * 1000:.1f}ms, query in {elapsed * 1000:.3f}ms")
+
+
+if __name__ == "__main__":
+    main()
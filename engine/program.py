@@ -0,0 +1,425 @@
+import logging
+import operator
+import re
+from collections.abc import Callable, Iterator
+from dataclasses import dataclass
+from functools import cached_property, partial
+from typing import Any, NamedTuple
+
+from engine.enable import EnableState, PathTable
+from engine.prefix import PrefixIndex
+from engine.state import STRING_TYPES
+from vc_parser.expressions import (
+    FRAME_SCOPES,
+    SCOPE_DEPTH,
+    VariableRef,
+    default_value,
+    parse_literal,
+    parse_variable_ref,
+)
+from vc_parser.schemas import (
+    ActionParamAsset,
+    ActionParamCppFunction,
+    ActionParamEnable,
+    ActionParamInterface,
+    ActionParamInventory,
+    ActionParamSetView,
+    ActionParamStatement,
+    ActionParamTimer,
+    ActionParamUrl,
+    Conversation,
+    ExplorationProperties,
+    HotSpot,
+    IdeaResponse,
+    Navigation,
+    Node,
+    NodePath,
+    Trigger,
+    TriggerAction,
+    Variable,
+    ViewNavigation,
+)
+
+logger = logging.getLogger("engine")
+
+# Frame of one trigger run: `Local::` variables and `Event::` parameters
+Frame = dict[str, Any]
+Getter = Callable[[Any, Frame], Any]
+# (path, owner, trigger name), owner as in `Node.all_triggers`
+TriggerKey = tuple[NodePath, str, str]
+ViewTarget = tuple[str, str, str, str]
+
+VARIABLE_TYPES_BY_REF = {
+    "Int": "Integer",
+    "Bool": "Boolean",
+    "Char": "Character",
+    "Str": "String",
+}
+
+COMPARE_OPERATORS = {
+    "=": operator.eq,
+    "!=": operator.ne,
+    ">": operator.gt,
+    "<": operator.lt,
+    ">=": operator.ge,
+    "<=": operator.le,
+    "and": lambda a, b: bool(a) and bool(b),
+    "or": lambda a, b: bool(a) or bool(b),
+}
+
+ASSIGN_FUNCTIONS = {
+    "=": lambda old, v: v,
+    "++": lambda old, v: old + 1,
+    "+=": operator.add,
+    "-=": operator.sub,
+    "*=": operator.mul,
+    "/=": lambda old, v: int(old / v) if v else old,
+    "%=": lambda old, v: old % v if v else old,
+}
+
+TIMER_ID_RE = re.compile(r"(\d+)$")
+
+# Scopes of variables declared by hotspots -> words of owner which declares it,
+# `Char::` of `character 0`, `Conv::` of `character 0 conversation 1` or `character 0 idea 1`
+OWNER_SCOPES = {"Char": 2, "Conv": 4}
+
+
+def exploration_key(e: ExplorationProperties) -> str:
+    """Name of explorable hotspot as it is used in `ActionParamEnable.path`"""
+    h = e.hot_spot
+    cursor = "" if h.cursor == "None" else h.cursor
+    return f"Explorable : {cursor} (Rect: L: {h.left} T: {h.top} R: {h.right} B: {h.bottom})"
+
+
+def navigation_key(n: Navigation) -> str:
+    """Name of navigation hotspot as it is used in `ActionParamEnable.path`"""
+    h, d = n.hot_spot, n.destination_view
+    cursor = "" if h.cursor == "None" else h.cursor
+    return (
+        f"Nav : {cursor} (Dest: {d.node},{d.location},{d.viewpoint},{d.view}) "
+        f"(Rect L: {h.left} T: {h.top} R: {h.right} B: {h.bottom})"
+    )
+
+
+def preset_key(kind: str, h: HotSpot) -> str | None:
+    """
+    Short name of hotspot with preset shape as `ActionParamEnable.path` uses it, e.g. `Nav : Default Left`.
+    It names such hotspots of the views under the node of action. None for custom hotspots
+    """
+    return None if h.name == "Custom" else f"{kind} : {h.name}"
+
+
+def under(path: NodePath, root: NodePath) -> bool:
+    """Node with `path` is `root` or in its subtree"""
+    return path == root or path.startswith(root + "/")
+
+
+class Owned(NamedTuple):
+    """
+    Character of view, its conversation or idea response. `owner` extends one of `Node.all_triggers`:
+    `character 0`, `character 0 conversation 1`, `character 0 idea 1`
+    """
+
+    owner: str
+    variables: list[Variable]
+    triggers: list[Trigger]
+    # Name used by Enable actions, None for idea responses
+    name: str | None
+    enabled: str | None
+    # Dialog assets of conversation
+    dialogs: list[str]
+
+
+def character_owners(v: ViewNavigation) -> Iterator[Owned]:
+    for i, c in enumerate(v.characters):
+        variables = [Variable.model_validate(var) for var in c.variables]
+        yield Owned(f"character {i}", variables, c.triggers, c.character.name, None, [])
+        for j, raw in enumerate(c.conversations):
+            conv = Conversation.model_validate(raw)
+            yield Owned(f"character {i} conversation {j}", conv.variables, conv.triggers, conv.name, conv.enabled, conv.dialogs)
+        for j, raw in enumerate(c.idea_responses):
+            idea = IdeaResponse.model_validate(raw)
+            yield Owned(f"character {i} idea {j}", idea.variables, idea.triggers, None, None, [])
+
+
+def timer_id(timer: str) -> int:
+    m = TIMER_ID_RE.search(timer)
+    return int(m[1]) if m else 0
+
+
+def _set_enabled(key: int, enabled: bool, rt, frame: Frame):
+    rt.set_enabled(key, enabled)
+
+
+def _set_many_enabled(keys: tuple[int, ...], enabled: bool, rt, frame: Frame):
+    for key in keys:
+        rt.set_enabled(key, enabled)
+
+
+def _set_view(target: NodePath | None, rt, frame: Frame):
+    rt.request_view(target)
+
+
+def _select_inventory(item: str | None, rt, frame: Frame):
+    rt.select_inventory(item)
+
+
+def _start_timer(path: NodePath, p: ActionParamTimer, rt, frame: Frame):
+    rt.start_timer(path, p.timer, p.expires_ms, p.is_periodic)
+
+
+def _stop_timer(path: NodePath, p: ActionParamTimer, rt, frame: Frame):
+    rt.stop_timer(path, p.timer)
+
+
+def _asset(p: ActionParamAsset, rt, frame: Frame):
+    rt.hooks.asset(p.action, p.asset, getattr(p, "coordinates", None))
+
+
+def _interface(p: ActionParamInterface, rt, frame: Frame):
+    rt.hooks.interface(p.action, p.interface)
+
+
+def _cpp_function(p: ActionParamCppFunction, rt, frame: Frame):
+    rt.hooks.cpp_function(p.function, p.parameters)
+
+
+def _url(p: ActionParamUrl, rt, frame: Frame):
+    rt.hooks.url(p.url)
+
+
+def _nothing(rt, frame: Frame):
+    pass
+
+
+@dataclass(slots=True)
+class CompiledAction:
+    source: TriggerAction
+    cond: Callable[[Any, Frame], bool] | None
+    run: Callable[[Any, Frame], None]
+
+
+class Program:
+    """
+    Parsed tree compiled for execution. Every declared variable gets a slot, variables of
+    characters, conversations and idea responses get one per owner.
+    Every hotspot, conversation, asset and Enable action path gets an id in `paths`,
+    short Enable paths of preset hotspots are resolved to ids of hotspots they name,
+    string values get ids in `strings` and every action is compiled into
+    closures taking `(runtime, frame)`.
+    Runtime must provide `values`, `state`, `hooks` and methods used by actions:
+    `set_enabled`, `request_view`, `select_inventory`, `start_timer`, `stop_timer`
+    """
+
+    def __init__(self, root: Node):
+        self.root = root
+        self.nodes: dict[NodePath, Node] = {}
+        self.parents: dict[NodePath, NodePath | None] = {root.path: None}
+        self.views: dict[ViewTarget, NodePath] = {}
+        self.variables: list[tuple[NodePath, Variable]] = []
+        self.slots: dict[tuple[NodePath, str], int] = {}
+        # (view path, owner, name) of variables declared by characters, conversations and idea responses
+        self.owner_slots: dict[tuple[NodePath, str, str], int] = {}
+        # Referenced but not declared variables get slots with path ''
+        self.undeclared: dict[str, int] = {}
+        self.triggers: dict[TriggerKey, list[CompiledAction]] = {}
+        self.paths = PathTable()
+        self.strings = PathTable()
+        # (path, owner) of hotspots and conversations -> id of name used by Enable actions,
+        # owner as in `Node.all_triggers`, `character_owners` or `navigation <i>`
+        self.hotspots: dict[tuple[NodePath, str], int] = {}
+        # Short names of preset hotspots -> (view path, hotspot id)
+        self.presets: dict[str, list[tuple[NodePath, int]]] = {}
+        # Triggers of conversations and idea responses, they aren't in `Node.all_triggers`
+        self.owned_triggers: list[tuple[NodePath, str, list[Trigger]]] = []
+        disabled = []
+
+        for n in root.walk():
+            self.nodes[n.path] = n
+            for c in n.childrens:
+                self.parents[c.path] = n.path
+            for v in n.variables:
+                self.slots[(n.path, v.name)] = len(self.variables)
+                self.variables.append((n.path, v))
+            if n.view_navigation is not None:
+                hotspots = [
+                    *((f"exploration {i}", exploration_key(e), preset_key("Explorable", e.hot_spot), e.enabled)
+                      for i, e in enumerate(n.view_navigation.explorations)),
+                    *((f"navigation {i}", navigation_key(nav), preset_key("Nav", nav.hot_spot), nav.enabled)
+                      for i, nav in enumerate(n.view_navigation.navigations)),
+                ]  # fmt: skip
+                for owner, name, preset, enabled in hotspots:
+                    key = self.hotspots[(n.path, owner)] = self.paths.intern(name)
+                    if preset is not None:
+                        self.presets.setdefault(preset, []).append((n.path, key))
+                    if enabled == "Initially Disabled":
+                        disabled.append(key)
+                for o in character_owners(n.view_navigation):
+                    # Enable actions name characters and conversations
+                    if o.name is not None:
+                        key = self.hotspots[(n.path, o.owner)] = self.paths.intern(o.name)
+                        if o.enabled == "Initially Disabled":
+                            disabled.append(key)
+                    for v in o.variables:
+                        self.owner_slots[(n.path, o.owner, v.name)] = len(self.variables)
+                        self.variables.append((n.path, v))
+                    self.owned_triggers.append((n.path, o.owner, o.triggers))
+            for name in n.asset_names:
+                self.paths.intern(name)
+        for path in self.nodes:
+            chain = self.chain(path)
+            if len(chain) == 5:
+                self.views[tuple(self.nodes[p].name for p in chain[1:])] = path
+        for n in root.walk():
+            for owner, t in n.all_triggers():
+                key = (n.path, owner, t.name)
+                actions = [self.compile_action(n.path, a, owner) for a in t.actions]
+                self.triggers.setdefault(key, []).extend(actions)
+        for path, owner, triggers in self.owned_triggers:
+            for t in triggers:
+                actions = [self.compile_action(path, a, owner) for a in t.actions]
+                self.triggers.setdefault((path, owner, t.name), []).extend(actions)
+        self.initial_enabled = EnableState(len(self.paths), disabled)
+        for _, v in self.variables:
+            if v.type in STRING_TYPES:
+                self.strings.intern(str(v.initial_value))
+        # Strings interned later are created while running
+        self.compiled_strings = len(self.strings)
+
+    @cached_property
+    def prefixes(self) -> PrefixIndex:
+        """Prefix index of `paths`, its ids are path ids"""
+        return PrefixIndex(self.paths.paths)
+
+    def chain(self, path: NodePath) -> list[NodePath]:
+        """Paths from root to node with `path`"""
+        res = []
+        p = path
+        while p is not None:
+            res.append(p)
+            p = self.parents[p]
+        return res[::-1]
+
+    def initial_values(self) -> list:
+        return [v.initial_value for _, v in self.variables]
+
+    def resolve(self, path: NodePath, ref: VariableRef, owner: str = "") -> int:
+        """Slot of variable referenced from trigger of `owner` in node with `path`"""
+        words = OWNER_SCOPES.get(ref.scope)
+        if words is not None and len(owner.split()) >= words:
+            slot = self.owner_slots.get((path, " ".join(owner.split()[:words]), ref.name))
+            if slot is not None:
+                return slot
+        chain = self.chain(path)
+        depth = SCOPE_DEPTH.get(ref.scope)
+        if depth is not None and depth < len(chain) and (chain[depth], ref.name) in self.slots:
+            return self.slots[(chain[depth], ref.name)]
+        for p in reversed(chain):
+            if (p, ref.name) in self.slots:
+                return self.slots[(p, ref.name)]
+        # Referenced from triggers which don't own the scope or not declared at all
+        key = f"{ref.scope}::{ref.name}"
+        if key not in self.undeclared:
+            self.undeclared[key] = len(self.variables)
+            v = Variable(
+                name=key,
+                type=VARIABLE_TYPES_BY_REF.get(ref.type, "Integer"),
+                is_constant=False,
+                initial_value=default_value(ref.type),
+            )
+            self.variables.append(("", v))
+        return self.undeclared[key]
+
+    def enable_keys(self, path: NodePath, name: str) -> tuple[int, ...]:
+        """Ids of `ActionParamEnable.path` of action in node with `path`"""
+        keys = tuple(key for view, key in self.presets.get(name, ()) if under(view, path))
+        return keys or (self.paths.intern(name),)
+
+    def compile_operand(self, path: NodePath, exp: str, type_hint: str | None = None, owner: str = "") -> Getter:
+        ref = parse_variable_ref(exp)
+        if ref is None:
+            value = parse_literal(exp, type_hint)
+            if isinstance(value, str):
+                self.strings.intern(value)
+            return lambda rt, frame: value
+        if ref.scope in FRAME_SCOPES:
+            key, default = f"{ref.scope}::{ref.name}", default_value(ref.type)
+            return lambda rt, frame: frame.get(key, default)
+        slot = self.resolve(path, ref, owner)
+        if self.variables[slot][1].type in STRING_TYPES:
+            strings = self.strings.paths
+            return lambda rt, frame: strings[rt.values[slot]]
+        return lambda rt, frame: rt.values[slot]
+
+    def compile_condition(self, path: NodePath, exp1: str, op: str, exp2: str, owner: str = "") -> Callable | None:
+        """Compile `exp1 op exp2`. Empty condition is compiled into None"""
+        if not exp1.strip():
+            return None
+        ref1, ref2 = parse_variable_ref(exp1), parse_variable_ref(exp2)
+        a = self.compile_operand(path, exp1, ref2.type if ref2 else None, owner)
+        if not exp2.strip() and op not in ("and", "or"):
+            return lambda rt, frame: bool(a(rt, frame))
+        b = self.compile_operand(path, exp2, ref1.type if ref1 else None, owner)
+        compare = COMPARE_OPERATORS[op]
+
+        def cond(rt, frame) -> bool:
+            try:
+                return compare(a(rt, frame), b(rt, frame))
+            except TypeError:
+                return False
+
+        return cond
+
+    def compile_statement(self, path: NodePath, p: ActionParamStatement, owner: str = "") -> Callable:
+        ref = parse_variable_ref(p.exp1)
+        if ref is None:
+            logger.warning(f"Statement without variable {p.exp1=} in {path=}")
+            return _nothing
+        value = self.compile_operand(path, p.exp2, ref.type, owner)
+        assign = ASSIGN_FUNCTIONS[p.op]
+        if ref.scope in FRAME_SCOPES:
+            key, default = f"{ref.scope}::{ref.name}", default_value(ref.type)
+
+            def run_frame(rt, frame):
+                frame[key] = assign(frame.get(key, default), value(rt, frame))
+
+            return run_frame
+        slot = self.resolve(path, ref, owner)
+        old = self.compile_operand(path, p.exp1, owner=owner)
+
+        def run(rt, frame):
+            rt.state.set(slot, assign(old(rt, frame), value(rt, frame)))
+
+        return run
+
+    def compile_action(self, path: NodePath, a: TriggerAction, owner: str = "") -> CompiledAction:
+        p = a.action_params
+        match p:
+            case ActionParamStatement():
+                run = self.compile_statement(path, p, owner)
+            case ActionParamEnable():
+                keys = self.enable_keys(path, p.path)
+                if len(keys) == 1:
+                    run = partial(_set_enabled, keys[0], p.action == "Enable")
+                else:
+                    run = partial(_set_many_enabled, keys, p.action == "Enable")
+            case ActionParamSetView():
+                target = self.views.get((p.node, p.location, p.view_point, p.view))
+                if target is None:
+                    logger.warning(f"Set View target not found {p=} in {path=}")
+                run = partial(_set_view, target)
+            case ActionParamInventory():
+                run = partial(_select_inventory, p.item if a.action_type == "Select Inventory" else None)
+            case ActionParamTimer():
+                run = partial(_start_timer if p.action == "Start" else _stop_timer, path, p)
+            case ActionParamAsset():
+                run = partial(_asset, p)
+            case ActionParamInterface():
+                run = partial(_interface, p)
+            case ActionParamCppFunction():
+                run = partial(_cpp_function, p)
+            case ActionParamUrl():
+                run = partial(_url, p)
+            case _:
+                run = _nothing
+        return CompiledAction(source=a, cond=self.compile_condition(path, a.exp1, a.op, a.exp2, owner), run=run)
@@ -0,0 +1,204 @@
+import asyncio
+import logging
+from collections import deque
+from typing import NamedTuple
+
+from engine.program import Frame, Program, timer_id
+from engine.scheduler import TimingWheel
+from engine.state import Snapshot, StateStore
+from vc_parser.schemas import Coordinates, NodePath
+
+logger = logging.getLogger("engine")
+
+ACTIVATION = "Object Activation"
+DEACTIVATION = "Object Deactivation"
+TIMER_EXPIRATION = "Timer Expiration"
+
+
+class Event(NamedTuple):
+    """Run triggers named `trigger` of node `path`. `owner` as in `Node.all_triggers`"""
+
+    path: NodePath
+    trigger: str
+    owner: str = ""
+    params: Frame | None = None
+
+
+class Hooks:
+    """Rendering and media side effects. Default implementation does nothing"""
+
+    def set_view(self, path: NodePath):
+        pass
+
+    def asset(self, action: str | None, asset: str | None, coordinates: Coordinates | None):
+        pass
+
+    def interface(self, action: str, interface: str):
+        pass
+
+    def cpp_function(self, function: str, parameters: list[str]):
+        pass
+
+    def url(self, url: str):
+        pass
+
+
+class Runtime:
+    """
+    Headless executor of parsed triggers.
+    Events are handled one by one; events caused by actions (view changes,
+    timers) are queued and handled after the current one is finished
+    """
+
+    # Events caused by one event before the chain is considered a loop
+    max_chain = 1000
+
+    def __init__(self, program: Program, hooks: Hooks | None = None, tick_ms: int = 10):
+        self.program = program
+        self.hooks = hooks or Hooks()
+        self.tick_ms = tick_ms
+        self.state = StateStore(program.variables, program.strings, program.compiled_strings)
+        self.values = self.state.values
+        self.enabled = program.initial_enabled.copy()
+        self.inventory: str | None = None
+        self.view: NodePath | None = None
+        self.wheel = TimingWheel()
+        self.pending: deque[Event] = deque()
+        self.events_handled = 0
+        self.queue: asyncio.Queue[Event | None] | None = None
+        self.running = False
+
+    # Actions API used by compiled program
+
+    def set_enabled(self, key: int, enabled: bool):
+        self.enabled.set(key, enabled)
+
+    def set_group_enabled(self, prefix: str, enabled: bool):
+        """Set every path starting with prefix, e.g. all assets under `Navs:Field OfficeR:13Day:`"""
+        for key in self.program.prefixes.keys(prefix):
+            self.enabled.set(int(key), enabled)
+
+    def is_enabled(self, key: int | None) -> bool:
+        """Is path with id `key` from `Program.paths` enabled. None is a hotspot without name"""
+        return key is None or self.enabled[key]
+
+    def request_view(self, path: NodePath | None):
+        if path is not None:
+            self.pending.append(Event(path=path, trigger=""))
+
+    def select_inventory(self, item: str | None):
+        self.inventory = item
+
+    def start_timer(self, path: NodePath, timer: str, expires_ms: int, periodic: bool):
+        ticks = max(expires_ms // self.tick_ms, 1)
+        self.wheel.schedule((path, timer), ticks, ticks if periodic else 0, timer_id(timer))
+
+    def stop_timer(self, path: NodePath, timer: str):
+        self.wheel.cancel((path, timer))
+
+    # Save points
+
+    def save(self) -> Snapshot:
+        """Snapshot of game state. Unchanged pages of values are shared with previous snapshots"""
+        return Snapshot(
+            values=self.state.save(),
+            enabled=self.enabled.snapshot(),
+            view=self.view,
+            inventory=self.inventory,
+            timers=self.wheel.save(),
+        )
+
+    def load(self, snapshot: Snapshot):
+        self.state.restore(snapshot.values)
+        self.enabled.restore(snapshot.enabled)
+        self.view = snapshot.view
+        self.inventory = snapshot.inventory
+        self.wheel.restore(snapshot.timers)
+        self.pending.clear()
+
+    # Event handling
+
+    def run_triggers(self, event: Event):
+        actions = self.program.triggers.get((event.path, event.owner, event.trigger))
+        if not actions:
+            return
+        frame = dict(event.params) if event.params else {}
+        for a in actions:
+            if a.cond is None or a.cond(self, frame):
+                a.run(self, frame)
+
+    def set_view(self, path: NodePath):
+        """Deactivate nodes which are left and activate entered ones from root to the view"""
+        old = self.program.chain(self.view) if self.view is not None else []
+        new = self.program.chain(path)
+        common = 0
+        while common < min(len(old), len(new)) and old[common] == new[common]:
+            common += 1
+        for p in reversed(old[common:]):
+            self.run_triggers(Event(path=p, trigger=DEACTIVATION))
+        self.view = path
+        self.hooks.set_view(path)
+        for p in new[common:]:
+            self.run_triggers(Event(path=p, trigger=ACTIVATION))
+
+    def handle(self, event: Event):
+        """Handle event and all events caused by it"""
+        self.pending.append(event)
+        chain = 0
+        while self.pending:
+            e = self.pending.popleft()
+            self.events_handled += 1
+            chain += 1
+            if chain > self.max_chain:
+                logger.warning(f"Events loop after {event=}, dropped {len(self.pending)} events")
+                self.pending.clear()
+                break
+            if not e.trigger:
+                self.set_view(e.path)
+            elif e.owner and not self.is_enabled(self.program.hotspots.get((e.path, e.owner))):
+                continue
+            else:
+                self.run_triggers(e)
+
+    def start(self, view: NodePath):
+        self.handle(Event(path=view, trigger=""))
+
+    def advance(self, ticks: int = 1):
+        """Advance virtual time and handle expired timers"""
+        for _ in range(ticks):
+            for t in self.wheel.tick():
+                path, _ = t.key
+                self.handle(Event(path=path, trigger=TIMER_EXPIRATION, params={"Event::TimerID": t.payload}))
+
+    # asyncio loop
+
+    def post(self, event: Event):
+        """Post event from outside, e.g. a mouse click. Works only while `run` is running"""
+        self.queue.put_nowait(event)
+
+    async def _ticker(self):
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        while self.running:
+            await asyncio.sleep(self.tick_ms / 1000)
+            due = int((loop.time() - start) * 1000 / self.tick_ms) - self.wheel.now
+            self.advance(due)
+
+    async def run(self):
+        self.queue = asyncio.Queue()
+        self.running = True
+        ticker = asyncio.create_task(self._ticker())
+        try:
+            while self.running:
+                event = await self.queue.get()
+                if event is not None:
+                    self.handle(event)
+                self.queue.task_done()
+        finally:
+            self.running = False
+            ticker.cancel()
+
+    def stop(self):
+        self.running = False
+        if self.queue is not None:
+            self.queue.put_nowait(None)
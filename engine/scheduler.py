@@ -0,0 +1,101 @@
+from collections.abc import Hashable
+from dataclasses import dataclass
+from typing import Any
+
+
+@dataclass(slots=True)
+class Timer:
+    key: Hashable
+    deadline: int
+    period: int
+    payload: Any
+
+
+class TimingWheel:
+    """
+    Hierarchical timing wheel. Time is counted in ticks.
+    Schedule and cancel are O(1), one tick costs O(expired timers) plus
+    amortized cascading of timers from higher levels, regardless of how
+    many timers are waiting
+    """
+
+    def __init__(self, bits: int = 6, levels: int = 4):
+        self.bits = bits
+        self.mask = (1 << bits) - 1
+        self.span = 1 << (bits * levels)
+        self.levels: list[list[dict[Hashable, Timer]]] = [
+            [{} for _ in range(1 << bits)] for _ in range(levels)
+        ]
+        self.timers: dict[Hashable, tuple[int, int]] = {}
+        self.now = 0
+
+    def __len__(self) -> int:
+        return len(self.timers)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self.timers
+
+    def schedule(self, key: Hashable, delay: int, period: int = 0, payload: Any = None):
+        """Schedule timer after `delay` ticks, repeating every `period` ticks if it's not 0"""
+        self.cancel(key)
+        self._insert(Timer(key=key, deadline=self.now + max(delay, 1), period=period, payload=payload))
+
+    def cancel(self, key: Hashable) -> bool:
+        where = self.timers.pop(key, None)
+        if where is None:
+            return False
+        level, slot = where
+        del self.levels[level][slot][key]
+        return True
+
+    def save(self) -> tuple[tuple[Hashable, int, int, Any], ...]:
+        """Pending timers as (key, ticks left, period, payload)"""
+        res = []
+        for key, (level, slot) in self.timers.items():
+            t = self.levels[level][slot][key]
+            res.append((key, t.deadline - self.now, t.period, t.payload))
+        return tuple(res)
+
+    def restore(self, timers: tuple[tuple[Hashable, int, int, Any], ...]):
+        """Replace pending timers with saved ones"""
+        for key, (level, slot) in self.timers.items():
+            del self.levels[level][slot][key]
+        self.timers.clear()
+        for key, left, period, payload in timers:
+            self.schedule(key, left, period, payload)
+
+    def _insert(self, t: Timer):
+        delta = t.deadline - self.now
+        if delta >= self.span:
+            raise ValueError(f"Timer {t.key} is too far: {delta} ticks, max is {self.span - 1}")
+        level = 0
+        while delta >= 1 << (self.bits * (level + 1)):
+            level += 1
+        slot = (t.deadline >> (self.bits * level)) & self.mask
+        self.levels[level][slot][t.key] = t
+        self.timers[t.key] = (level, slot)
+
+    def tick(self) -> list[Timer]:
+        """Advance one tick and return expired timers. Periodic ones are scheduled again"""
+        self.now += 1
+        for level in range(1, len(self.levels)):
+            if self.now & ((1 << (self.bits * level)) - 1):
+                break
+            slot = (self.now >> (self.bits * level)) & self.mask
+            cascade = self.levels[level][slot]
+            self.levels[level][slot] = {}
+            for t in cascade.values():
+                self._insert(t)
+        slot = self.now & self.mask
+        expired = self.levels[0][slot]
+        if not expired:
+            return []
+        self.levels[0][slot] = {}
+        res = list(expired.values())
+        for t in res:
+            if t.period:
+                t.deadline += t.period
+                self._insert(t)
+            else:
+                del self.timers[t.key]
+        return res
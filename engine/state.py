@@ -0,0 +1,179 @@
+import json
+import struct
+from array import array
+from collections import deque
+from typing import Any, NamedTuple
+
+from engine.enable import PathTable
+from vc_parser.schemas import NodePath, Variable
+
+# Slots per copy-on-write page, 512 bytes of `array('q')`
+PAGE_SLOTS = 64
+PAGE_BYTES = PAGE_SLOTS * array("q").itemsize
+STRING_TYPES = ("Character", "String")
+
+# Pending timer: key, ticks left, period, payload
+SavedTimer = tuple[Any, int, int, Any]
+
+
+class Values(NamedTuple):
+    """Variable values as immutable pages, shared between snapshots while they are not written"""
+
+    pages: tuple[bytes, ...]
+    # Strings interned while running which string slots hold, sorted. Saved slots hold
+    # `base + index` of them, so equal values are equal however the strings were interned
+    strings: tuple[str, ...]
+
+
+class Snapshot(NamedTuple):
+    values: Values
+    enabled: bytes
+    view: NodePath | None
+    inventory: str | None
+    timers: tuple[SavedTimer, ...]
+
+    def to_bytes(self) -> bytes:
+        meta = json.dumps(
+            {
+                "strings": self.values.strings,
+                "view": self.view,
+                "inventory": self.inventory,
+                "timers": self.timers,
+            }
+        ).encode()
+        return struct.pack("<II", len(meta), len(self.enabled)) + meta + self.enabled + b"".join(self.values.pages)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "Snapshot":
+        meta_size, enabled_size = struct.unpack_from("<II", data)
+        start = struct.calcsize("<II")
+        meta = json.loads(data[start : start + meta_size])
+        start += meta_size
+        enabled = data[start : start + enabled_size]
+        start += enabled_size
+        pages = tuple(data[i : i + PAGE_BYTES] for i in range(start, len(data), PAGE_BYTES))
+        return cls(
+            values=Values(pages=pages, strings=tuple(meta["strings"])),
+            enabled=enabled,
+            view=meta["view"],
+            inventory=meta["inventory"],
+            timers=tuple((tuple(key), left, period, payload) for key, left, period, payload in meta["timers"]),
+        )
+
+
+def _encode_bool(v: Any) -> int:
+    return 1 if v else 0
+
+
+def _encode_int(v: Any) -> int:
+    try:
+        return int(v)
+    except (TypeError, ValueError):
+        return 0
+
+
+class StateStore:
+    """
+    Values of program variables in one `array('q')`, every variable has a fixed slot.
+    Integers and booleans are stored as is, strings as ids in `strings`.
+    Strings with ids from `base` are interned while running and saved with values.
+    Saved values are copy-on-write: only pages written since last save are copied,
+    pages holding ids of strings interned while running are saved with canonical ids
+    """
+
+    def __init__(self, variables: list[tuple[NodePath, Variable]], strings: PathTable, base: int):
+        self.strings = strings
+        self.base = base
+        self.is_string = [v.type in STRING_TYPES for _, v in variables]
+        self.string_slots = [i for i, is_string in enumerate(self.is_string) if is_string]
+        self.encoders = [
+            strings.intern if is_string else _encode_bool if v.type == "Boolean" else _encode_int
+            for is_string, (_, v) in zip(self.is_string, variables)
+        ]
+        self.values = array("q", (encode(v.initial_value) for encode, (_, v) in zip(self.encoders, variables)))
+        data = self.values.tobytes()
+        self.pages = tuple(data[i : i + PAGE_BYTES] for i in range(0, len(data), PAGE_BYTES))
+        self.dirty: set[int] = set()
+        # String slots holding ids of strings interned while running
+        self.held: set[int] = set()
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def get(self, slot: int) -> Any:
+        v = self.values[slot]
+        return self.strings[v] if self.is_string[slot] else v
+
+    def set(self, slot: int, value: Any):
+        v = self.values[slot] = self.encoders[slot](value)
+        self.dirty.add(slot // PAGE_SLOTS)
+        if self.is_string[slot]:
+            if v >= self.base:
+                self.held.add(slot)
+            else:
+                self.held.discard(slot)
+
+    def save(self) -> Values:
+        if self.dirty:
+            pages = list(self.pages)
+            for p in self.dirty:
+                pages[p] = self.values[p * PAGE_SLOTS : (p + 1) * PAGE_SLOTS].tobytes()
+            self.pages = tuple(pages)
+            self.dirty.clear()
+        if not self.held:
+            return Values(pages=self.pages, strings=())
+        strings = sorted({self.strings[self.values[slot]] for slot in self.held})
+        ids = {self.strings.get(s): self.base + i for i, s in enumerate(strings)}
+        pages = list(self.pages)
+        for p in {slot // PAGE_SLOTS for slot in self.held if ids[self.values[slot]] != self.values[slot]}:
+            page = self.values[p * PAGE_SLOTS : (p + 1) * PAGE_SLOTS]
+            for slot in self.held:
+                if slot // PAGE_SLOTS == p:
+                    page[slot % PAGE_SLOTS] = ids[page[slot % PAGE_SLOTS]]
+            pages[p] = page.tobytes()
+        return Values(pages=tuple(pages), strings=tuple(strings))
+
+    def restore(self, saved: Values):
+        """Copy pages which differ from current values"""
+        raw = memoryview(self.values).cast("B")
+        for i, (old, new) in enumerate(zip(self.pages, saved.pages)):
+            if i in self.dirty or (old is not new and old != new):
+                raw[i * PAGE_BYTES : i * PAGE_BYTES + len(new)] = new
+        raw.release()
+        self.pages = saved.pages
+        self.dirty.clear()
+        self.held.clear()
+        if saved.strings:
+            self._remap(saved.strings)
+
+    def _remap(self, strings: tuple[str, ...]):
+        """Saved canonical ids of strings interned while running are replaced with ids in this table"""
+        ids = {self.base + i: self.strings.intern(s) for i, s in enumerate(strings)}
+        for slot in self.string_slots:
+            v = self.values[slot]
+            if v >= self.base:
+                self.held.add(slot)
+                if ids[v] != v:
+                    self.values[slot] = ids[v]
+                    self.dirty.add(slot // PAGE_SLOTS)
+
+
+class History:
+    """Ring buffer of last `capacity` snapshots. Snapshots share unchanged pages, so memory is bounded"""
+
+    def __init__(self, capacity: int = 256):
+        self.snapshots: deque[Snapshot] = deque(maxlen=capacity)
+
+    def __len__(self) -> int:
+        return len(self.snapshots)
+
+    def push(self, snapshot: Snapshot):
+        self.snapshots.append(snapshot)
+
+    def rewind(self, steps: int = 1) -> Snapshot:
+        """Drop last `steps` snapshots and return the oldest of them"""
+        if not 0 < steps <= len(self.snapshots):
+            raise IndexError(f"Can't rewind {steps} steps, history has {len(self.snapshots)}")
+        for _ in range(steps - 1):
+            self.snapshots.pop()
+        return self.snapshots.pop()
@@ -1,10 +1,36 @@
-import platform
+"""
+Submodules and loader functions are imported on first attribute access, so
+`import vc_parser` doesn't build pydantic models or import GUI libraries
+"""
 
-from . import schemas
+import importlib
+import sys
 
-__all__ = ["schemas"]
+# Attribute -> module which defines it
+_LAZY = {
+    "schemas": "vc_parser.schemas",
+    "load_raw": "vc_parser.loader",
+    "load_tree": "vc_parser.loader",
+    "walk_raw": "vc_parser.loader",
+}
 
-if platform.system() == "Windows":
-    from . import parsing, utils
+__all__ = ["load_raw", "load_tree", "schemas", "walk_raw"]
 
+if sys.platform == "win32":
+    _LAZY |= {"parsing": "vc_parser.parsing", "utils": "vc_parser.utils"}
     __all__ += ["parsing", "utils"]
+
+
+def __getattr__(name: str):
+    module = _LAZY.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    res = importlib.import_module(module)
+    if module != f"{__name__}.{name}":
+        res = getattr(res, name)
+    globals()[name] = res
+    return res
+
+
+def __dir__() -> list[str]:
+    return sorted([*globals(), *_LAZY])
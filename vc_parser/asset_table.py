@@ -0,0 +1,224 @@
+import argparse
+import time
+from functools import cached_property
+from pathlib import Path
+from typing import get_args
+
+import numpy as np
+
+from vc_parser.database import load_assets
+from vc_parser.schemas import (
+    Asset,
+    AssetStyle,
+    ResourceStatus,
+    ResourceType,
+    RStyleFile,
+    RStyleResource,
+)
+
+STYLES: tuple[AssetStyle, ...] = get_args(AssetStyle)
+RESOURCE_TYPES: tuple[ResourceType, ...] = get_args(ResourceType)
+STATUSES: tuple[ResourceStatus, ...] = get_args(ResourceStatus)
+SIZE_TYPES = get_args(RStyleFile.model_fields["size_type"].annotation)
+# Code of missing value in code, string and integer columns
+NONE = -1
+# Columns with one row per asset and per disc file entry
+ASSET_COLUMNS = (
+    "db_id", "name", "category", "type", "style", "status", "resource_type", "resource_id",
+    "file_name", "from_", "to", "size_type", "first_frame_only", "loop", "hotspots",
+)  # fmt: skip
+DISC_COLUMNS = ("asset", "disc", "disc_file", "start", "end")
+# Other columns are int64
+DTYPES = {
+    **dict.fromkeys(("style", "status", "resource_type", "size_type"), np.int8),
+    **dict.fromkeys(("name", "category", "type", "file_name", "asset", "disc", "disc_file"), np.int32),
+    **dict.fromkeys(("first_frame_only", "loop", "hotspots"), np.bool_),
+}
+
+
+def _code(values: tuple[str, ...], value: str | None) -> int:
+    return NONE if value is None else values.index(value)
+
+
+class AssetTable:
+    """
+    Asset list of ASSETS parse as NumPy columns. Strings (names, categories, types, files,
+    discs) are ids in `strings`, closed sets like style and status are codes of their
+    Literal values, missing values are NONE. Disc columns have a row per filled disc entry
+    of File assets, `asset` is the asset row
+    """
+
+    def __init__(self, columns: dict[str, np.ndarray], strings: list[str]):
+        self.columns = columns
+        self.strings = strings
+        for name, column in columns.items():
+            setattr(self, name, column)
+
+    @classmethod
+    def from_assets(cls, assets: list[Asset]) -> "AssetTable":
+        strings: dict[str, int] = {}
+
+        def string(s: str | None) -> int:
+            return NONE if s is None else strings.setdefault(s, len(strings))
+
+        rows = {c: [] for c in ASSET_COLUMNS}
+        discs = {c: [] for c in DISC_COLUMNS}
+        for i, a in enumerate(assets):
+            r = a.resource
+            file = r if isinstance(r, RStyleFile) else None
+            res = r if isinstance(r, RStyleResource) else None
+            row = {
+                "db_id": a.db_id,
+                "name": string(a.name),
+                "category": string(a.category),
+                "type": string(a.type),
+                "style": _code(STYLES, a.style),
+                "status": _code(STATUSES, getattr(r, "status", None)),
+                "resource_type": _code(RESOURCE_TYPES, res and res.type),
+                "resource_id": res.id if res else NONE,
+                "file_name": string(file and file.file),
+                "from_": file.from_ if file else NONE,
+                "to": file.to if file else NONE,
+                "size_type": _code(SIZE_TYPES, file and file.size_type),
+                "first_frame_only": bool(file and file.first_frame_only),
+                "loop": bool(file and file.loop),
+                "hotspots": bool(file and file.hotspots),
+            }
+            for c, v in row.items():
+                rows[c].append(v)
+            for d in file.disc_files if file else ():
+                # Parser reads every disc slot of the dialog, most of them are empty
+                if not d.file and d.start is None and d.end is None:
+                    continue
+                for c, v in zip(DISC_COLUMNS, (i, string(d.disc), string(d.file), d.start, d.end)):
+                    discs[c].append(NONE if v is None else v)
+        columns = {c: np.array(values, dtype=DTYPES.get(c, np.int64)) for c, values in (rows | discs).items()}
+        return cls(columns, list(strings))
+
+    def save(self, path: Path):
+        """Uncompressed .npz, strings are joined with NUL into one UTF-8 array"""
+        data = "\0".join(self.strings).encode()
+        with open(path, "wb") as f:
+            np.savez(f, strings=np.frombuffer(data, dtype=np.uint8), **self.columns)
+
+    @classmethod
+    def load(cls, path: Path) -> "AssetTable":
+        with np.load(path) as f:
+            columns = {c: f[c] for c in (*ASSET_COLUMNS, *DISC_COLUMNS)}
+            data = f["strings"].tobytes().decode()
+        return cls(columns, data.split("\0") if data else [])
+
+    @cached_property
+    def string_ids(self) -> dict[str, int]:
+        return {s: i for i, s in enumerate(self.strings)}
+
+    def string_id(self, s: str) -> int:
+        """Id of string, NONE if no asset has it, so filters on it match nothing"""
+        return self.string_ids.get(s, NONE)
+
+    def __len__(self) -> int:
+        return len(self.db_id)
+
+    def select(
+        self,
+        style: AssetStyle | None = None,
+        status: ResourceStatus | None = None,
+        resource_type: ResourceType | None = None,
+        type: str | None = None,
+        category: str | None = None,
+    ) -> np.ndarray:
+        """Mask of asset rows matching all given values, e.g. `select(status="Final", resource_type="Bitmap")`"""
+        mask = np.ones(len(self), dtype=np.bool_)
+        if style is not None:
+            mask &= self.style == STYLES.index(style)
+        if status is not None:
+            mask &= self.status == STATUSES.index(status)
+        if resource_type is not None:
+            mask &= self.resource_type == RESOURCE_TYPES.index(resource_type)
+        if type is not None:
+            mask &= self.type == self.string_id(type)
+        if category is not None:
+            mask &= self.category == self.string_id(category)
+        return mask
+
+    def names(self, rows: np.ndarray) -> list[str]:
+        """Names of asset rows given by mask or indexes"""
+        return [self.strings[i] for i in self.name[rows]]
+
+    def disc_bytes(self) -> dict[str, int]:
+        """Total bytes of disc entries with known range by disc"""
+        known = (self.start != NONE) & (self.end != NONE)
+        sizes = np.bincount(self.disc[known], weights=self.end[known] - self.start[known], minlength=len(self.strings))
+        return {self.strings[i]: int(sizes[i]) for i in np.unique(self.disc[known])}
+
+    def overlapping(self, disc: str, start: int, end: int, file: str | None = None) -> np.ndarray:
+        """Disc rows whose range intersects [start, end) on disc, optionally only in one file of it"""
+        mask = (self.disc == self.string_id(disc)) & (self.start != NONE) & (self.start < end) & (self.end > start)
+        if file is not None:
+            mask &= self.disc_file == self.string_id(file)
+        return np.flatnonzero(mask)
+
+    def read_plan(self, disc: str | None = None) -> np.ndarray:
+        """Disc rows with known start sorted by disc, file and offset, the order of sequential reads"""
+        mask = self.start != NONE
+        if disc is not None:
+            mask &= self.disc == self.string_id(disc)
+        rows = np.flatnonzero(mask)
+        # lexsort sorts by the last key first
+        return rows[np.lexsort((self.start[rows], self.disc_file[rows], self.disc[rows]))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Columnar asset table and disc layout queries")
+    parser.add_argument("-n", type=str, help="Table file. Default data/assets.npz", default="data/assets.npz")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    export = subparsers.add_parser("export", help="Build table from assets file of ASSETS parse")
+    export.add_argument("-a", type=str, help="Assets file. Default assets.json", default="assets.json")
+    select = subparsers.add_parser("select", help="Names of assets matching all filters")
+    select.add_argument("--style", choices=STYLES)
+    select.add_argument("--status", choices=STATUSES)
+    select.add_argument("--resource-type", choices=RESOURCE_TYPES)
+    select.add_argument("--type")
+    select.add_argument("--category")
+    subparsers.add_parser("discs", help="Total bytes per disc")
+    overlap = subparsers.add_parser("overlap", help="Disc entries intersecting byte range")
+    overlap.add_argument("disc")
+    overlap.add_argument("start", type=int)
+    overlap.add_argument("end", type=int)
+    overlap.add_argument("--file")
+    plan = subparsers.add_parser("plan", help="Disc entries in read order")
+    plan.add_argument("--disc")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    if args.command == "export":
+        table = AssetTable.from_assets(load_assets(Path(args.a)))
+        table.save(Path(args.n))
+        print(f"{len(table)} assets, {len(table.disc)} disc entries written to {args.n} in {(time.perf_counter() - start) * 1000:.1f}ms")
+        return
+    table = AssetTable.load(Path(args.n))
+    loaded = time.perf_counter() - start
+    match args.command:
+        case "select":
+            mask = table.select(args.style, args.status, args.resource_type, args.type, args.category)
+            for name in table.names(mask):
+                print(name)
+            print(f"{int(mask.sum())} found")
+        case "discs":
+            for disc, size in table.disc_bytes().items():
+                print(f"{disc:<14}{size:16,}")
+        case "overlap" | "plan":
+            if args.command == "overlap":
+                rows = table.overlapping(args.disc, args.start, args.end, args.file)
+            else:
+                rows = table.read_plan(args.disc)
+            s = table.strings
+            for r in rows:
+                name = s[table.name[table.asset[r]]]
+                print(f"{s[table.disc[r]]:<14}{s[table.disc_file[r]]:<24}{table.start[r]:12}{table.end[r]:12}  {name}")
+            print(f"{len(rows)} entries")
+    print(f"loaded in {loaded * 1000:.1f}ms, query in {(time.perf_counter() - start - loaded) * 1000:.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
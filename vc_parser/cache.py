@@ -1,29 +1,71 @@
 import json
 import os
+from collections.abc import Iterator
+from contextlib import ExitStack, contextmanager
 from pathlib import Path
 from typing import Self
 
-from pydantic import BaseModel
+from pydantic import BaseModel, PrivateAttr, TypeAdapter
 
-from vc_parser.schemas import NodePath
+from vc_parser.schemas import AnyAsset, AnyTriggerAction, Asset, NodePath, TriggerAction
 
 CACHE_DIR = Path('cache')
 
+# Records validated through tagged unions instead of their generic base model
+TAGGED_RECORDS = {
+    TriggerAction: AnyTriggerAction,
+    Asset: AnyAsset,
+}
+
+
+def trigger_actions_key(path: NodePath, index: int, trigger_name: str) -> str:
+    """Key of `trigger_actions` store for trigger `index` of node"""
+    return path + f"_{index}_{trigger_name}"
+
 
 class FileCache(BaseModel):
     data: dict[NodePath, list[BaseModel]]
     klass: type[BaseModel]
+    _batches: int = PrivateAttr(default=0)
+    _pending: bool = PrivateAttr(default=False)
 
     def get(self, path: NodePath):
         return self.data.get(path, list())
 
     def set(self, path: NodePath, data: list):
         self.data[path] = data
-        self.save()
+        self.changed()
 
     def has_key(self, path: NodePath):
         return path in self.data
 
+    def delete(self, path: NodePath):
+        if self.data.pop(path, None) is not None:
+            self.changed()
+
+    def delete_many(self, paths: list[NodePath]):
+        deleted = [p for p in paths if self.data.pop(p, None) is not None]
+        if deleted:
+            self.changed()
+
+    def changed(self):
+        if self._batches:
+            self._pending = True
+        else:
+            self.save()
+
+    @contextmanager
+    def batch(self) -> Iterator[Self]:
+        """Keep changes made inside the block in memory and save the store once when it ends"""
+        self._batches += 1
+        try:
+            yield self
+        finally:
+            self._batches -= 1
+            if not self._batches and self._pending:
+                self._pending = False
+                self.save()
+
     @staticmethod
     def get_file_path(klass: type[BaseModel]) -> str:
         return CACHE_DIR / (klass.__name__.lower() + "_cache" + ".json")
@@ -33,16 +75,18 @@ class FileCache(BaseModel):
         data = {}
         name = cls.get_file_path(klass)
         if os.path.exists(name):
-            with open(name) as f:
-                data = json.load(f)
-                for k, v in data.items():
-                    data[k] = [klass(**x) for x in v]
+            adapter = TypeAdapter(dict[NodePath, list[TAGGED_RECORDS.get(klass, klass)]])
+            with open(name, "rb") as f:
+                data = adapter.validate_json(f.read())
         return cls(data=data, klass=klass)
 
     def save(self):
+        self.write(self.data)
+
+    def write(self, data: dict[NodePath, list[BaseModel]]):
         with open(self.get_file_path(self.klass), "w") as f:
             to_dump = {}
-            for k, v in self.data.items():
+            for k, v in data.items():
                 to_dump[k] = [x.model_dump() for x in v]
             json.dump(to_dump, f)
 
@@ -54,3 +98,12 @@ class Cache(BaseModel):
     assets: FileCache
     asset_names: FileCache
     view_navigation: FileCache
+    fingerprints: FileCache
+
+    @contextmanager
+    def batch(self) -> Iterator[Self]:
+        """Batch saves of all stores, see `FileCache.batch`"""
+        with ExitStack() as stack:
+            for name in type(self).model_fields:
+                stack.enter_context(getattr(self, name).batch())
+            yield self
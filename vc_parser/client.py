@@ -0,0 +1,136 @@
+"""
+Client of project server (`vc_parser/server.py`). It imports only standard library,
+so tools asking the server start without pydantic and snapshot load.
+Frames are 4-byte big-endian length followed by UTF-8 JSON, request is
+`{"op": ..., **args}`, response is `{"ok": true, "result": ...}` or `{"ok": false, "error": ...}`
+"""
+
+import argparse
+import json
+import socket
+import struct
+from typing import Any
+
+SOCKET_PATH = "data/tree.sock"
+HEADER = struct.Struct(">I")
+MAX_FRAME = 1 << 30
+
+
+class ServerError(Exception):
+    pass
+
+
+def encode_frame(message: Any) -> bytes:
+    body = json.dumps(message, ensure_ascii=False, separators=(",", ":")).encode()
+    return HEADER.pack(len(body)) + body
+
+
+def decode_size(header: bytes) -> int:
+    (size,) = HEADER.unpack(header)
+    if size > MAX_FRAME:
+        raise ServerError(f"Frame of {size} bytes is too large")
+    return size
+
+
+class ProjectClient:
+    """Connection to project server, it is opened on first request and kept for next ones"""
+
+    def __init__(self, socket_path: str = SOCKET_PATH, timeout: float | None = 60.0):
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self.sock: socket.socket | None = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self.sock is not None:
+            self.sock.close()
+            self.sock = None
+
+    def _recv(self, size: int) -> bytes:
+        buf = bytearray()
+        while len(buf) < size:
+            chunk = self.sock.recv(size - len(buf))
+            if not chunk:
+                raise ConnectionError("Server closed connection")
+            buf += chunk
+        return bytes(buf)
+
+    def request(self, op: str, **args) -> Any:
+        if self.sock is None:
+            self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.sock.settimeout(self.timeout)
+            self.sock.connect(self.socket_path)
+        try:
+            self.sock.sendall(encode_frame({"op": op, **args}))
+            response = json.loads(self._recv(decode_size(self._recv(HEADER.size))))
+        except BaseException:
+            # Connection state is unknown after partial exchange
+            self.close()
+            raise
+        if not response["ok"]:
+            raise ServerError(response["error"])
+        return response["result"]
+
+    def ping(self) -> dict[str, Any]:
+        """Snapshot stamp, counts of loaded nodes and assets"""
+        return self.request("ping")
+
+    def node(self, path: str) -> dict[str, Any]:
+        """Node fields without `childrens`, `children` is list of child paths"""
+        return self.request("node", path=path)
+
+    def subtree(self, path: str) -> dict[str, Any]:
+        """Node with its subtree in the shape of `Node.model_dump()`"""
+        return self.request("subtree", path=path)
+
+    def children(self, path: str) -> list[str]:
+        return self.request("children", path=path)
+
+    def records(self, kind: str, path: str | None = None) -> list[tuple[str, Any]]:
+        """(node path, record) of one kind in subtree of path (whole tree by default) in tree order"""
+        return [tuple(r) for r in self.request("records", kind=kind, path=path)]
+
+    def asset(self, name: str) -> dict[str, Any] | None:
+        return self.request("asset", name=name)
+
+    def query(self, kind: str, key: str) -> list[dict[str, Any]]:
+        """References matching inverted index key, see `ProjectIndex.query`"""
+        return self.request("query", kind=kind, key=key)
+
+    def reload(self) -> dict[str, Any]:
+        """Reload snapshot and assets now, returns the same as `ping`"""
+        return self.request("reload")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ask project server and print result as JSON")
+    parser.add_argument("op", type=str, choices=["ping", "node", "subtree", "children", "records", "asset", "query", "reload"])
+    parser.add_argument("args", type=str, nargs="*", help="node: path; records: kind [path]; asset: name; query: kind key")
+    parser.add_argument("-s", type=str, help=f"Server socket. Default {SOCKET_PATH}", default=SOCKET_PATH)
+    args = parser.parse_args()
+
+    with ProjectClient(args.s) as client:
+        match args.op, args.args:
+            case "records", [kind, *path]:
+                res = client.records(kind, *path)
+            case "query", [kind, *words]:
+                # Parts of view key are joined like `query.view_key`
+                res = client.query(kind, (" | " if kind == "view" else " ").join(words))
+            case ("node" | "subtree" | "children") as op, [path]:
+                res = getattr(client, op)(path)
+            case "asset", [name]:
+                res = client.asset(name)
+            case ("ping" | "reload") as op, []:
+                res = getattr(client, op)()
+            case _:
+                parser.error(f"wrong arguments of {args.op}")
+    print(json.dumps(res, ensure_ascii=False, indent=1))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Cache of resolved controls of the main authoring window. `app["VC Authoring Tool -"]["NameEdit"]`
+runs pywinauto best-match search over all child windows on every use, the main window and its
+controls live as long as the tool process, so wrappers are resolved once and reused
+"""
+
+from weakref import WeakKeyDictionary
+
+from pywinauto import Application, handleprops
+from pywinauto.controls.hwndwrapper import HwndWrapper
+from pywinauto.findbestmatch import MatchError
+from pywinauto.findwindows import ElementNotFoundError
+from pywinauto.timings import TimeoutError as WaitTimeoutError
+
+MAIN_WINDOW = "VC Authoring Tool -"
+
+
+class ControlCache:
+    """
+    Wrappers of main window and its controls by best-match name. Cache is cleared when the
+    tool process changes. Wrapper whose window was destroyed or hidden (right pane depends
+    on selected node kind) is resolved again
+    """
+
+    def __init__(self, app: Application):
+        self.app = app
+        self.process = app.process
+        self.wrappers: dict[str, HwndWrapper] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def invalidate(self):
+        self.wrappers.clear()
+        self.process = self.app.process
+
+    def _resolve(self, name: str, timeout: float | None) -> HwndWrapper:
+        spec = self.app[MAIN_WINDOW] if name == "" else self.app[MAIN_WINDOW][name]
+        return spec.wait("exists", timeout) if timeout else spec.wrapper_object()
+
+    def get(self, name: str, timeout: float | None = None) -> HwndWrapper:
+        """Wrapper of control, '' is the main window. `timeout` waits for control to appear"""
+        if self.app.process != self.process:
+            self.invalidate()
+        w = self.wrappers.get(name)
+        if w is not None and handleprops.iswindow(w.handle) and handleprops.isvisible(w.handle):
+            self.hits += 1
+            return w
+        self.misses += 1
+        w = self.wrappers[name] = self._resolve(name, timeout)
+        return w
+
+    def __getitem__(self, name: str) -> HwndWrapper:
+        return self.get(name)
+
+    @property
+    def window(self) -> HwndWrapper:
+        return self.get("")
+
+    def exists(self, name: str, timeout: float | None = None) -> bool:
+        """Like `WindowSpecification.exists`, but found control is cached"""
+        try:
+            self.get(name, timeout)
+        except (ElementNotFoundError, MatchError, WaitTimeoutError):
+            return False
+        return True
+
+
+# A new Application is created when the tool is restarted, so its cache starts empty
+_caches: WeakKeyDictionary[Application, ControlCache] = WeakKeyDictionary()
+
+
+def main_controls(app: Application) -> ControlCache:
+    res = _caches.get(app)
+    if res is None:
+        res = _caches[app] = ControlCache(app)
+    return res
@@ -0,0 +1,369 @@
+import argparse
+import json
+import os
+import sqlite3
+import time
+from collections import defaultdict
+from pathlib import Path
+
+from pydantic import TypeAdapter
+
+from vc_parser.schemas import (
+    ActionParam3DSound,
+    ActionParamAsset,
+    ActionParamCppFunction,
+    ActionParamEnable,
+    ActionParamInterface,
+    ActionParamInventory,
+    ActionParamSetView,
+    ActionParamStatement,
+    ActionParamTimer,
+    ActionParamUrl,
+    AnyAsset,
+    Asset,
+    Conversation,
+    HotSpot,
+    IdeaResponse,
+    Node,
+    RStyleFile,
+    RStyleResource,
+    RStyleText,
+    Trigger,
+    Variable,
+)
+
+# Nodes are numbered in tree order, subtree of node is `id BETWEEN node.id AND node.last`
+SCHEMA = """
+CREATE TABLE nodes (
+    id INTEGER PRIMARY KEY,
+    parent_id INTEGER REFERENCES nodes(id),
+    path TEXT NOT NULL UNIQUE,
+    name TEXT NOT NULL,
+    depth INTEGER NOT NULL,
+    chapter TEXT,
+    last INTEGER NOT NULL
+);
+CREATE TABLE node_assets (
+    node_id INTEGER NOT NULL REFERENCES nodes(id),
+    position INTEGER NOT NULL,
+    asset TEXT NOT NULL,
+    PRIMARY KEY (node_id, position)
+);
+CREATE TABLE variables (
+    id INTEGER PRIMARY KEY,
+    node_id INTEGER NOT NULL REFERENCES nodes(id),
+    hotspot_id INTEGER REFERENCES hotspots(id),
+    owner TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    type TEXT NOT NULL,
+    is_constant INTEGER NOT NULL,
+    initial_value
+);
+CREATE TABLE hotspots (
+    id INTEGER PRIMARY KEY,
+    node_id INTEGER NOT NULL REFERENCES nodes(id),
+    kind TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    cursor TEXT NOT NULL,
+    "left" INTEGER NOT NULL,
+    top INTEGER NOT NULL,
+    "right" INTEGER NOT NULL,
+    bottom INTEGER NOT NULL,
+    enabled TEXT,
+    db_id INTEGER,
+    character TEXT,
+    destination_node TEXT,
+    destination_location TEXT,
+    destination_viewpoint TEXT,
+    destination_view TEXT
+);
+CREATE TABLE conversations (
+    id INTEGER PRIMARY KEY,
+    node_id INTEGER NOT NULL REFERENCES nodes(id),
+    hotspot_id INTEGER NOT NULL REFERENCES hotspots(id),
+    owner TEXT NOT NULL,
+    name TEXT NOT NULL,
+    enabled TEXT NOT NULL,
+    db_id INTEGER NOT NULL,
+    support_history INTEGER NOT NULL,
+    UNIQUE (node_id, owner)
+);
+CREATE TABLE conversation_dialogs (
+    conversation_id INTEGER NOT NULL REFERENCES conversations(id),
+    position INTEGER NOT NULL,
+    dialog TEXT NOT NULL,
+    PRIMARY KEY (conversation_id, position)
+);
+CREATE TABLE triggers (
+    id INTEGER PRIMARY KEY,
+    node_id INTEGER NOT NULL REFERENCES nodes(id),
+    hotspot_id INTEGER REFERENCES hotspots(id),
+    owner TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    name TEXT NOT NULL
+);
+CREATE TABLE actions (
+    id INTEGER PRIMARY KEY,
+    trigger_id INTEGER NOT NULL REFERENCES triggers(id),
+    position INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    exp1 TEXT NOT NULL,
+    op TEXT NOT NULL,
+    exp2 TEXT NOT NULL,
+    action TEXT NOT NULL,
+    action_type TEXT NOT NULL
+);
+CREATE TABLE params_statement (action_id INTEGER PRIMARY KEY REFERENCES actions(id), exp1 TEXT, op TEXT, exp2 TEXT);
+CREATE TABLE params_asset (action_id INTEGER PRIMARY KEY REFERENCES actions(id), action TEXT, asset TEXT, x INTEGER, y INTEGER);
+CREATE TABLE params_timer (
+    action_id INTEGER PRIMARY KEY REFERENCES actions(id), action TEXT, timer TEXT, expires_ms INTEGER, is_periodic INTEGER
+);
+CREATE TABLE params_enable (action_id INTEGER PRIMARY KEY REFERENCES actions(id), action TEXT, path TEXT);
+CREATE TABLE params_set_view (
+    action_id INTEGER PRIMARY KEY REFERENCES actions(id), node TEXT, location TEXT, view_point TEXT, view TEXT
+);
+CREATE TABLE params_cpp_function (action_id INTEGER PRIMARY KEY REFERENCES actions(id), function TEXT);
+CREATE TABLE params_cpp_parameters (
+    action_id INTEGER NOT NULL REFERENCES actions(id), position INTEGER NOT NULL, value TEXT,
+    PRIMARY KEY (action_id, position)
+);
+CREATE TABLE params_inventory (action_id INTEGER PRIMARY KEY REFERENCES actions(id), item TEXT);
+CREATE TABLE params_url (action_id INTEGER PRIMARY KEY REFERENCES actions(id), url TEXT);
+CREATE TABLE params_interface (action_id INTEGER PRIMARY KEY REFERENCES actions(id), action TEXT, interface TEXT);
+CREATE TABLE assets (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    description TEXT,
+    category TEXT NOT NULL,
+    style TEXT NOT NULL,
+    type TEXT NOT NULL,
+    db_id INTEGER NOT NULL
+);
+CREATE TABLE asset_files (
+    asset_id INTEGER PRIMARY KEY REFERENCES assets(id),
+    file TEXT, "from" INTEGER, "to" INTEGER, size_type TEXT,
+    first_frame_only INTEGER, loop INTEGER, hotspots INTEGER, status TEXT
+);
+CREATE TABLE asset_resources (asset_id INTEGER PRIMARY KEY REFERENCES assets(id), resource_id INTEGER, type TEXT, status TEXT);
+CREATE TABLE asset_texts (
+    asset_id INTEGER PRIMARY KEY REFERENCES assets(id), "left" INTEGER, top INTEGER, "right" INTEGER, bottom INTEGER, text TEXT
+);
+CREATE TABLE disc_files (
+    id INTEGER PRIMARY KEY,
+    asset_id INTEGER NOT NULL REFERENCES assets(id),
+    position INTEGER NOT NULL,
+    disc TEXT NOT NULL,
+    file TEXT NOT NULL,
+    start INTEGER,
+    "end" INTEGER
+);
+"""
+
+# Created after bulk insert, it's faster than updating them on every row
+INDEXES = """
+CREATE INDEX nodes_parent ON nodes(parent_id);
+CREATE INDEX nodes_chapter ON nodes(chapter);
+CREATE INDEX node_assets_asset ON node_assets(asset);
+CREATE INDEX variables_node ON variables(node_id);
+CREATE INDEX variables_name ON variables(name);
+CREATE INDEX variables_owner ON variables(node_id, owner);
+CREATE INDEX conversations_hotspot ON conversations(hotspot_id);
+CREATE INDEX conversations_name ON conversations(name);
+CREATE INDEX hotspots_node ON hotspots(node_id, kind, position);
+CREATE INDEX triggers_node ON triggers(node_id);
+CREATE INDEX triggers_hotspot ON triggers(hotspot_id);
+CREATE INDEX actions_trigger ON actions(trigger_id);
+CREATE INDEX actions_type ON actions(action_type);
+CREATE INDEX params_statement_exp1 ON params_statement(exp1);
+CREATE INDEX params_asset_asset ON params_asset(asset);
+CREATE INDEX params_timer_timer ON params_timer(timer);
+CREATE INDEX params_enable_path ON params_enable(path);
+CREATE INDEX params_set_view_view ON params_set_view(node, location, view_point, view);
+CREATE INDEX params_cpp_function_function ON params_cpp_function(function);
+CREATE INDEX assets_name ON assets(name);
+CREATE INDEX disc_files_asset ON disc_files(asset_id);
+CREATE INDEX disc_files_disc ON disc_files(disc);
+"""
+
+_assets_adapter = TypeAdapter(list[AnyAsset])
+
+
+class _Rows:
+    """Rows of all tables collected before one bulk insert, ids are assigned here"""
+
+    def __init__(self):
+        self.tables: dict[str, list[tuple]] = defaultdict(list)
+
+    def add(self, table: str, *row) -> int:
+        """Append row whose first column is id and return this id"""
+        rows = self.tables[table]
+        rows.append((len(rows) + 1, *row))
+        return len(rows)
+
+    def add_hotspot(self, node_id: int, kind: str, position: int, h: HotSpot, *extra) -> int:
+        return self.add("hotspots", node_id, kind, position, h.name, h.cursor, h.left, h.top, h.right, h.bottom, *extra)
+
+    def add_variables(self, node_id: int, hotspot_id: int | None, owner: str, variables: list[Variable]):
+        for i, v in enumerate(variables):
+            self.add("variables", node_id, hotspot_id, owner, i, v.name, v.type, v.is_constant, v.initial_value)
+
+    def add_owned(self, node_id: int, hotspot_id: int | None, owner: str, variables: list[Variable], triggers: list[Trigger]):
+        self.add_variables(node_id, hotspot_id, owner, variables)
+        self.add_triggers(node_id, hotspot_id, owner, triggers)
+
+    def add_triggers(self, node_id: int, hotspot_id: int | None, owner: str, triggers: list[Trigger]):
+        for i, t in enumerate(triggers):
+            trigger_id = self.add("triggers", node_id, hotspot_id, owner, i, t.name)
+            for j, a in enumerate(t.actions):
+                action_id = self.add("actions", trigger_id, j, a.name, a.exp1, a.op, a.exp2, a.action, a.action_type)
+                self.add_params(action_id, a.action_params)
+
+    def add_params(self, action_id: int, p):
+        t = self.tables
+        match p:
+            case ActionParamStatement():
+                t["params_statement"].append((action_id, p.exp1, p.op, p.exp2))
+            case ActionParam3DSound():
+                t["params_asset"].append((action_id, p.action, p.asset, p.coordinates.x, p.coordinates.y))
+            case ActionParamAsset():
+                t["params_asset"].append((action_id, p.action, p.asset, None, None))
+            case ActionParamTimer():
+                t["params_timer"].append((action_id, p.action, p.timer, p.expires_ms, p.is_periodic))
+            case ActionParamEnable():
+                t["params_enable"].append((action_id, p.action, p.path))
+            case ActionParamSetView():
+                t["params_set_view"].append((action_id, p.node, p.location, p.view_point, p.view))
+            case ActionParamCppFunction():
+                t["params_cpp_function"].append((action_id, p.function))
+                t["params_cpp_parameters"].extend((action_id, i, v) for i, v in enumerate(p.parameters))
+            case ActionParamInventory():
+                t["params_inventory"].append((action_id, p.item))
+            case ActionParamUrl():
+                t["params_url"].append((action_id, p.url))
+            case ActionParamInterface():
+                t["params_interface"].append((action_id, p.action, p.interface))
+
+    def add_node(self, n: Node, parent_id: int | None, depth: int, chapter: str | None) -> int:
+        node_id = self.add("nodes", parent_id, n.path, n.name, depth, chapter, 0)
+        self.tables["node_assets"].extend((node_id, i, a) for i, a in enumerate(n.asset_names))
+        self.add_owned(node_id, None, "", n.variables, n.triggers)
+        if n.view_navigation is not None:
+            for i, nav in enumerate(n.view_navigation.navigations):
+                d = nav.destination_view
+                self.add_hotspot(
+                    node_id, "navigation", i, nav.hot_spot, nav.enabled, nav.db_id, None, d.node, d.location, d.viewpoint, d.view
+                )
+            for i, e in enumerate(n.view_navigation.explorations):
+                hotspot_id = self.add_hotspot(node_id, "exploration", i, e.hot_spot, e.enabled, e.db_id, *[None] * 5)
+                variables = [Variable.model_validate(v) for v in e.variable]
+                self.add_owned(node_id, hotspot_id, f"exploration {i}", variables, e.triggers)
+            for i, c in enumerate(n.view_navigation.characters):
+                hotspot_id = self.add_hotspot(
+                    node_id, "character", i, c.hot_spot, None, c.character.db_id, c.character.name, *[None] * 4
+                )
+                variables = [Variable.model_validate(v) for v in c.variables]
+                self.add_owned(node_id, hotspot_id, f"character {i}", variables, c.triggers)
+                # Conversations and idea responses are kept as raw dicts in the tree
+                for j, raw in enumerate(c.conversations):
+                    conv = Conversation.model_validate(raw)
+                    owner = f"character {i} conversation {j}"
+                    conversation_id = self.add(
+                        "conversations", node_id, hotspot_id, owner, conv.name, conv.enabled, conv.db_id, conv.support_history
+                    )
+                    self.tables["conversation_dialogs"].extend((conversation_id, k, d) for k, d in enumerate(conv.dialogs))
+                    self.add_owned(node_id, hotspot_id, owner, conv.variables, conv.triggers)
+                for j, raw in enumerate(c.idea_responses):
+                    idea = IdeaResponse.model_validate(raw)
+                    self.add_owned(node_id, hotspot_id, f"character {i} idea {j}", idea.variables, idea.triggers)
+        for c in n.childrens:
+            self.add_node(c, node_id, depth + 1, chapter or (c.path if depth == 0 else None))
+        # Id of the last node of subtree
+        nodes = self.tables["nodes"]
+        nodes[node_id - 1] = (*nodes[node_id - 1][:-1], len(nodes))
+        return node_id
+
+    def add_asset(self, a: Asset):
+        asset_id = self.add("assets", a.name, a.description, a.category, a.style, a.type, a.db_id)
+        r = a.resource
+        match r:
+            case RStyleFile():
+                self.tables["asset_files"].append(
+                    (asset_id, r.file, r.from_, r.to, r.size_type, r.first_frame_only, r.loop, r.hotspots, r.status)
+                )
+                for i, d in enumerate(r.disc_files):
+                    self.add("disc_files", asset_id, i, d.disc, d.file, d.start, d.end)
+            case RStyleResource():
+                self.tables["asset_resources"].append((asset_id, r.id, r.type, r.status))
+            case RStyleText():
+                self.tables["asset_texts"].append((asset_id, r.left, r.top, r.right, r.bottom, r.text))
+
+
+def _statements(script: str) -> list[str]:
+    # `executescript` commits pending transaction, so statements are run one by one
+    return [s for s in script.split(";") if s.strip()]
+
+
+def export_database(root: Node, assets: list[Asset], path: Path) -> dict[str, int]:
+    """
+    Write project into new SQLite database in one transaction and return row counts by table.
+    Database is built in temporary file and replaces `path` when complete
+    """
+    rows = _Rows()
+    rows.add_node(root, None, 0, None)
+    for a in assets:
+        rows.add_asset(a)
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.unlink(missing_ok=True)
+    con = sqlite3.connect(tmp, isolation_level=None)
+    try:
+        con.execute("PRAGMA journal_mode = OFF")
+        con.execute("PRAGMA synchronous = OFF")
+        con.execute("BEGIN")
+        for statement in _statements(SCHEMA):
+            con.execute(statement)
+        for table, values in rows.tables.items():
+            if values:
+                con.executemany(f"INSERT INTO {table} VALUES ({', '.join('?' * len(values[0]))})", values)
+        for statement in _statements(INDEXES):
+            con.execute(statement)
+        con.execute("COMMIT")
+        con.execute("ANALYZE")
+    finally:
+        con.close()
+    os.replace(tmp, path)
+    return {table: len(values) for table, values in rows.tables.items() if values}
+
+
+def load_assets(path: Path) -> list[Asset]:
+    """Assets written by ASSETS parse"""
+    with open(path, "rb") as f:
+        return _assets_adapter.validate_json(f.read())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export parsed project to SQLite database or query it")
+    parser.add_argument("-t", type=str, help="Snapshot file. Default data/tree.json", default="data/tree.json")
+    parser.add_argument("-a", type=str, help="Assets file written by ASSETS parse. Default None", default=None)
+    parser.add_argument("-o", type=str, help="Database file. Default data/tree.sqlite", default="data/tree.sqlite")
+    parser.add_argument("-q", type=str, help="Run SQL query against existing database instead of export", default=None)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    if args.q is not None:
+        con = sqlite3.connect(f"file:{args.o}?mode=ro", uri=True)
+        for row in con.execute(args.q):
+            print(*row, sep="\t")
+        print(f"in {(time.perf_counter() - start) * 1000:.1f}ms")
+        return
+    with open(args.t) as f:
+        root = Node.model_validate(json.load(f))
+    assets = load_assets(Path(args.a)) if args.a is not None else []
+    counts = export_database(root, assets, Path(args.o))
+    print(", ".join(f"{n} {table}" for table, n in counts.items()))
+    print(f"written to {args.o} in {(time.perf_counter() - start) * 1000:.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
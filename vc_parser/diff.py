@@ -0,0 +1,231 @@
+import argparse
+import hashlib
+import json
+import time
+from typing import Any, Literal
+
+from pydantic import BaseModel
+
+from vc_parser.schemas import Node, NodePath, Trigger, TriggerAction, Variable
+
+ChangeKind = Literal["node", "variable", "trigger", "action"]
+ChangeType = Literal["added", "removed", "changed", "reordered"]
+
+# Node fields compared and patched. `childrens` handled by walking the tree
+NODE_FIELDS = ("name", "variables", "triggers", "asset_names", "view_navigation")
+
+
+class Change(BaseModel):
+    kind: ChangeKind
+    change: ChangeType
+    path: NodePath
+    name: str
+    trigger: str | None = None
+
+
+class PatchOp(BaseModel):
+    """
+    One operation of a patch from old snapshot to new one.
+    `add` - insert `data` (full dumped subtree) into `parent` at `index`
+    `remove` - drop node with `path` with all its subtree
+    `replace` - overwrite own fields of node with `path` by `data`
+    `reorder` - sort children of node with `path` as `data["order"]` lists their paths
+    """
+
+    op: Literal["add", "remove", "replace", "reorder"]
+    path: NodePath
+    parent: NodePath | None = None
+    index: int | None = None
+    data: dict[str, Any] | None = None
+
+
+class TreeDiff(BaseModel):
+    changes: list[Change]
+    patch: list[PatchOp]
+    skipped_subtrees: int
+
+
+def _sha1(data: str) -> bytes:
+    return hashlib.sha1(data.encode()).digest()
+
+
+def subtree_hashes(root: Node) -> dict[NodePath, tuple[bytes, bytes]]:
+    """Bottom-up hashes of every node: path -> (own fields hash, subtree hash)"""
+    res = {}
+
+    def walk(n: Node) -> bytes:
+        own = _sha1(n.model_dump_json(include=set(NODE_FIELDS)))
+        h = hashlib.sha1(own)
+        for c in n.childrens:
+            h.update(walk(c))
+        res[n.path] = (own, h.digest())
+        return res[n.path][1]
+
+    walk(root)
+    return res
+
+
+def _keyed(items: list, key) -> dict[str, Any]:
+    """Index list by key, numbering repeated keys so they stay unique"""
+    res = {}
+    for x in items:
+        k = key(x)
+        i = 1
+        while (k if i == 1 else f"{k} #{i}") in res:
+            i += 1
+        res[k if i == 1 else f"{k} #{i}"] = x
+    return res
+
+
+def _diff_variables(path: NodePath, old: list[Variable], new: list[Variable]) -> list[Change]:
+    res = []
+    o, n = _keyed(old, lambda x: x.name), _keyed(new, lambda x: x.name)
+    for k in o.keys() - n.keys():
+        res.append(Change(kind="variable", change="removed", path=path, name=k))
+    for k in n.keys() - o.keys():
+        res.append(Change(kind="variable", change="added", path=path, name=k))
+    for k in o.keys() & n.keys():
+        if o[k] != n[k]:
+            res.append(Change(kind="variable", change="changed", path=path, name=k))
+    return res
+
+
+def _diff_actions(
+    path: NodePath, trigger: str, old: list[TriggerAction], new: list[TriggerAction]
+) -> list[Change]:
+    res = []
+    for i in range(max(len(old), len(new))):
+        if i >= len(new):
+            change, name = "removed", old[i].name
+        elif i >= len(old):
+            change, name = "added", new[i].name
+        elif old[i] != new[i]:
+            change, name = "changed", new[i].name
+        else:
+            continue
+        res.append(Change(kind="action", change=change, path=path, name=name, trigger=trigger))
+    return res
+
+
+def _diff_triggers(path: NodePath, old: list[Trigger], new: list[Trigger]) -> list[Change]:
+    res = []
+    o, n = _keyed(old, lambda x: x.name), _keyed(new, lambda x: x.name)
+    for k in o.keys() - n.keys():
+        res.append(Change(kind="trigger", change="removed", path=path, name=k))
+    for k in n.keys() - o.keys():
+        res.append(Change(kind="trigger", change="added", path=path, name=k))
+    for k in o.keys() & n.keys():
+        if o[k] != n[k]:
+            res.append(Change(kind="trigger", change="changed", path=path, name=k))
+            res += _diff_actions(path, k, o[k].actions, n[k].actions)
+    return res
+
+
+def diff_trees(old: Node, new: Node) -> TreeDiff:
+    """
+    Structural diff of two snapshots. Nodes are matched by `Node.path`,
+    subtrees with equal hashes are skipped without walking into them
+    """
+    old_hashes, new_hashes = subtree_hashes(old), subtree_hashes(new)
+    changes = []
+    patch = []
+    skipped = 0
+
+    def walk(o: Node, n: Node):
+        nonlocal skipped
+        if old_hashes[o.path][1] == new_hashes[n.path][1]:
+            skipped += 1
+            return
+        if old_hashes[o.path][0] != new_hashes[n.path][0]:
+            changes.append(Change(kind="node", change="changed", path=n.path, name=n.name))
+            changes.extend(_diff_variables(n.path, o.variables, n.variables))
+            changes.extend(_diff_triggers(n.path, o.triggers, n.triggers))
+            fields = {f for f in NODE_FIELDS if getattr(o, f) != getattr(n, f)}
+            patch.append(PatchOp(op="replace", path=n.path, data=n.model_dump(include=fields)))
+        old_children = {c.path: c for c in o.childrens}
+        new_paths = {c.path for c in n.childrens}
+        for c in o.childrens:
+            if c.path not in new_paths:
+                changes.append(Change(kind="node", change="removed", path=c.path, name=c.name))
+                patch.append(PatchOp(op="remove", path=c.path))
+        for i, c in enumerate(n.childrens):
+            if c.path in old_children:
+                walk(old_children[c.path], c)
+            else:
+                changes.append(Change(kind="node", change="added", path=c.path, name=c.name))
+                patch.append(PatchOp(op="add", path=c.path, parent=n.path, index=i, data=c.model_dump()))
+        # Adds are inserted at their new index, which is right only if kept children didn't move
+        kept_old = [c.path for c in o.childrens if c.path in new_paths]
+        kept_new = [c.path for c in n.childrens if c.path in old_children]
+        if kept_old != kept_new:
+            changes.append(Change(kind="node", change="reordered", path=n.path, name=n.name))
+            patch.append(PatchOp(op="reorder", path=n.path, data={"order": [c.path for c in n.childrens]}))
+
+    if old.path != new.path:
+        raise ValueError(f"Snapshots have different roots {old.path=} {new.path=}")
+    walk(old, new)
+    return TreeDiff(changes=changes, patch=patch, skipped_subtrees=skipped)
+
+
+def apply_patch(root: Node, patch: list[PatchOp]) -> Node:
+    """Apply patch made by `diff_trees` to copy of older snapshot"""
+    root = root.model_copy(deep=True)
+    index: dict[NodePath, Node] = {}
+    parents: dict[NodePath, Node] = {}
+
+    def walk(n: Node):
+        index[n.path] = n
+        for c in n.childrens:
+            parents[c.path] = n
+            walk(c)
+
+    walk(root)
+    for op in patch:
+        match op.op:
+            case "remove":
+                p = parents[op.path]
+                p.childrens = [c for c in p.childrens if c.path != op.path]
+            case "add":
+                c = Node.model_validate(op.data)
+                index[op.parent].childrens.insert(op.index, c)
+                walk(c)
+                parents[c.path] = index[op.parent]
+            case "replace":
+                n = index[op.path]
+                for k, v in Node.model_validate({"name": n.name, "path": op.path, **op.data}):
+                    if k in op.data:
+                        setattr(n, k, v)
+            case "reorder":
+                n = index[op.path]
+                order = {p: i for i, p in enumerate(op.data["order"])}
+                n.childrens.sort(key=lambda c: order[c.path])
+    return root
+
+
+def load_tree(file_name: str) -> Node:
+    with open(file_name) as f:
+        return Node.model_validate(json.load(f))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Structural diff of two tree.json snapshots")
+    parser.add_argument("old", type=str, help="Older tree.json")
+    parser.add_argument("new", type=str, help="Newer tree.json")
+    parser.add_argument("-o", type=str, help="Write patch into file", default=None)
+    args = parser.parse_args()
+
+    old, new = load_tree(args.old), load_tree(args.new)
+    start = time.perf_counter()
+    res = diff_trees(old, new)
+    elapsed = time.perf_counter() - start
+    for c in res.changes:
+        trigger = f" [{c.trigger}]" if c.trigger is not None else ""
+        print(f"{c.change:>8} {c.kind:<8} {c.path}{trigger}: {c.name}")
+    print(f"{len(res.changes)} changes, {res.skipped_subtrees} identical subtrees skipped in {elapsed * 1000:.1f}ms")
+    if args.o is not None:
+        with open(args.o, "w") as f:
+            json.dump([x.model_dump(exclude_none=True) for x in res.patch], f)
+
+
+if __name__ == "__main__":
+    main()
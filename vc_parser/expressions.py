@@ -0,0 +1,80 @@
+import re
+from functools import cache
+
+from pydantic import BaseModel
+
+# Expressions in trigger actions look like `Title:: bHasGameBegun (Bool)`,
+# `Title::  bTRUE (const Bool)`, `Local::Integer` or plain literals `3`, `r`, `0 (Int)`
+VARIABLE_REF_RE = re.compile(
+    r"^(?P<scope>\w+)::\s*(?P<name>.+?)(?: \((?P<const>const )?(?P<type>\w+)\))?$"
+)
+
+# Operators of `ActionParamStatement` which write into `exp1`
+ASSIGN_OPERATORS = ("=", "++", "+=", "-=", "*=", "/=", "%=")
+
+
+class VariableRef(BaseModel):
+    scope: str
+    name: str
+    type: str | None
+    is_constant: bool
+
+
+@cache
+def parse_variable_ref(exp: str) -> VariableRef | None:
+    """Parse variable reference from expression. Returns None for literals and empty expressions"""
+    m = VARIABLE_REF_RE.match(exp.strip())
+    if m is None:
+        return None
+    return VariableRef(
+        scope=m["scope"],
+        name=m["name"].strip(),
+        type=m["type"],
+        is_constant=m["const"] is not None,
+    )
+
+
+# Scope of variable reference -> depth of tree node which declares it
+SCOPE_DEPTH = {
+    "Title": 0,
+    "Node": 1,
+    "Loc": 2,
+    "ViewPt": 3,
+    "View": 4,
+}
+# Scopes which are not declared in tree: trigger locals and event parameters
+FRAME_SCOPES = ("Local", "Event")
+
+LITERAL_RE = re.compile(r"^(?P<value>.*?)(?: \((?P<type>\w+)\))?$")
+
+TYPE_DEFAULTS = {
+    "Bool": False,
+    "Int": 0,
+    "Char": "",
+    "Str": "",
+}
+
+
+def default_value(type_name: str | None) -> bool | int | str:
+    return TYPE_DEFAULTS.get(type_name, 0)
+
+
+def parse_literal(exp: str, type_hint: str | None = None) -> bool | int | str | None:
+    """
+    Parse literal expression like `3`, `r` or `0 (Int)`.
+    `type_hint` is a type of the other operand, used when literal has no type
+    """
+    exp = exp.strip()
+    if not exp:
+        return None
+    m = LITERAL_RE.match(exp)
+    value, type_name = m["value"], m["type"] or type_hint
+    match type_name:
+        case "Char" | "Str":
+            return value
+        case "Bool":
+            return value.upper() in ("TRUE", "1")
+    try:
+        return int(value)
+    except ValueError:
+        return value
@@ -0,0 +1,33 @@
+import hashlib
+
+from pydantic import BaseModel
+
+
+class NodeFingerprint(BaseModel):
+    """
+    Cheap description of a node which is read from the main window without opening any dialogs.
+    Items of Variables/Triggers list boxes are only read when asked for, as that opens both dialogs.
+    Edits inside a variable, trigger or action dialog keep their list item text and aren't seen
+    """
+
+    has_asset_list: bool
+    childrens: list[str]
+    variables: list[str] | None = None
+    triggers: list[str] | None = None
+
+    def digest(self) -> str:
+        return hashlib.sha1(self.model_dump_json().encode()).hexdigest()
+
+
+class NodeHash(BaseModel):
+    """Stored per path between runs. `subtree` is a Merkle hash over children"""
+
+    local: str
+    subtree: str
+
+
+def subtree_digest(local: str, children_subtrees: list[str]) -> str:
+    h = hashlib.sha1(local.encode())
+    for c in children_subtrees:
+        h.update(c.encode())
+    return h.hexdigest()
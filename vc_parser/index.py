@@ -0,0 +1,148 @@
+import hashlib
+import json
+import os
+from collections import defaultdict
+from collections.abc import Callable
+from pathlib import Path
+from typing import Protocol
+
+from pydantic import BaseModel
+
+from vc_parser.expressions import ASSIGN_OPERATORS, parse_variable_ref
+from vc_parser.query import (
+    INDEX_KINDS,
+    WORD_RE,
+    IndexKind,
+    find,
+    get_index_path,
+    view_key,
+)
+from vc_parser.schemas import (
+    ActionParamAsset,
+    ActionParamCppFunction,
+    ActionParamSetView,
+    ActionParamStatement,
+    Node,
+    NodePath,
+    TriggerAction,
+)
+
+
+class Ref(BaseModel):
+    """
+    Place in project which matched an index key.
+    `trigger`/`index` are None for references from node asset list
+    """
+
+    path: NodePath
+    owner: str
+    trigger: str | None
+    index: int | None
+    name: str
+
+
+class SourceStamp(BaseModel):
+    size: int
+    mtime_ns: int
+    sha1: str
+
+
+class ProjectIndex(BaseModel):
+    source: SourceStamp
+    refs: list[Ref]
+    indexes: dict[IndexKind, dict[str, list[int]]]
+
+    def query(self, kind: IndexKind, key: str) -> list[Ref]:
+        return [self.refs[i] for i in find(self.indexes, kind, key)]
+
+
+def _action_keys(action: TriggerAction) -> list[tuple[IndexKind, str]]:
+    res = []
+    exps = [action.exp1, action.exp2]
+    p = action.action_params
+    match p:
+        case ActionParamStatement():
+            exps.append(p.exp2)
+            ref = parse_variable_ref(p.exp1)
+            if ref is not None and p.op in ASSIGN_OPERATORS:
+                res.append(("writes", ref.name))
+        case ActionParamAsset() if p.asset:
+            res.append(("asset", p.asset))
+        case ActionParamCppFunction():
+            exps += p.parameters
+            if p.function:
+                res.append(("cpp", p.function))
+        case ActionParamSetView():
+            parts = [p.node, p.location, p.view_point, p.view]
+            res += [("view", view_key(*parts[:i])) for i in range(1, len(parts) + 1)]
+    for e in exps:
+        ref = parse_variable_ref(e)
+        if ref is not None:
+            res.append(("reads", ref.name))
+    res += [("text", w) for w in set(WORD_RE.findall(action.name.lower()))]
+    return res
+
+
+def build_index(root: Node, source: SourceStamp) -> ProjectIndex:
+    refs = []
+    indexes: dict[IndexKind, dict[str, list[int]]] = {k: defaultdict(list) for k in INDEX_KINDS}
+
+    def add(ref: Ref, keys: list[tuple[IndexKind, str]]):
+        refs.append(ref)
+        for kind, key in keys:
+            ids = indexes[kind][key]
+            if not ids or ids[-1] != len(refs) - 1:
+                ids.append(len(refs) - 1)
+
+    for n in root.walk():
+        for name in n.asset_names:
+            add(Ref(path=n.path, owner="asset list", trigger=None, index=None, name=name), [("asset_list", name)])
+        for owner, t in n.all_triggers():
+            for i, a in enumerate(t.actions):
+                add(Ref(path=n.path, owner=owner, trigger=t.name, index=i, name=a.name), _action_keys(a))
+    return ProjectIndex(source=source, refs=refs, indexes=indexes)
+
+
+def stamp_snapshot(snapshot: Path, prev: SourceStamp | None = None) -> SourceStamp:
+    """Stamp of snapshot file. Content hash is reused while size and mtime are the same"""
+    st = os.stat(snapshot)
+    if prev is not None and prev.size == st.st_size and prev.mtime_ns == st.st_mtime_ns:
+        return prev
+    with open(snapshot, "rb") as f:
+        sha1 = hashlib.sha1(f.read()).hexdigest()
+    return SourceStamp(size=st.st_size, mtime_ns=st.st_mtime_ns, sha1=sha1)
+
+
+class Derived(Protocol):
+    source: SourceStamp
+
+
+def load_derived[T: Derived](snapshot: Path, path: Path, klass: type[T], build: Callable[[Node, SourceStamp], T]) -> T:
+    """
+    Load data built from snapshot and stored next to it at `path`, like index or dialogue graph.
+    It is rebuilt only when snapshot content changed or stored data doesn't match `klass`, e.g. of older version
+    """
+    data = None
+    if path.exists():
+        with open(path, "rb") as f:
+            try:
+                data = klass.model_validate_json(f.read())
+            except ValueError:
+                # pydantic ValidationError is a ValueError
+                data = None
+    stamp = stamp_snapshot(snapshot, data.source if data is not None else None)
+    if data is not None and data.source == stamp:
+        return data
+    if data is not None and data.source.sha1 == stamp.sha1:
+        data.source = stamp
+    else:
+        with open(snapshot) as f:
+            data = build(Node.model_validate(json.load(f)), stamp)
+    with open(path, "w") as f:
+        f.write(data.model_dump_json())
+    return data
+
+
+def load_index(snapshot: Path) -> ProjectIndex:
+    """Load index stored next to snapshot. It is rebuilt only when snapshot content changed"""
+    return load_derived(snapshot, get_index_path(snapshot), ProjectIndex, build_index)
@@ -0,0 +1,114 @@
+"""
+Batched keyboard and mouse input for the GUI driver. pywinauto `send_keys` injects every key
+with its own SendInput call and sleeps after each of them, control `click` waits after every
+click. InputBatch queues keys and clicks and injects them with one SendInput call, then waits
+once: until a check of the expected window state passes, or for a short settle time without check
+"""
+
+import ctypes
+import time
+from collections.abc import Callable
+from typing import Self
+
+import win32api
+import win32con
+from pywinauto import Application, keyboard, win32functions, win32structures
+from pywinauto.findwindows import ElementNotFoundError
+
+# MOUSEINPUT values of WinUser.h
+INPUT_MOUSE = 0
+MOUSEEVENTF_MOVE = 0x0001
+MOUSEEVENTF_LEFTDOWN = 0x0002
+MOUSEEVENTF_LEFTUP = 0x0004
+MOUSEEVENTF_ABSOLUTE = 0x8000
+# Seconds to wait after injection without check
+SETTLE = 0.05
+# Seconds between checks of expected state
+POLL = 0.01
+
+
+class InputBatch:
+    def __init__(self, settle: float = SETTLE, timeout: float = 10.0):
+        self.settle = settle
+        self.timeout = timeout
+        self.events: list[win32structures.INPUT] = []
+        # Injections and events sent by them, to compare with one call per key
+        self.injections = 0
+        self.injected = 0
+
+    def keys(self, keys: str) -> Self:
+        """Queue keys in `send_keys` syntax, e.g. '{ESC}{VK_DOWN}{ENTER}'"""
+        for action in keyboard.parse_keys(keys):
+            self.events.extend(action.GetInput())
+        return self
+
+    def click(self, x: int, y: int) -> Self:
+        """Queue left click at screen point"""
+        # Absolute coordinates are normalized to 0..65535 of the primary screen
+        width = win32api.GetSystemMetrics(win32con.SM_CXSCREEN)
+        height = win32api.GetSystemMetrics(win32con.SM_CYSCREEN)
+        dx, dy = x * 65535 // max(width - 1, 1), y * 65535 // max(height - 1, 1)
+        for flags in (MOUSEEVENTF_MOVE, MOUSEEVENTF_LEFTDOWN, MOUSEEVENTF_LEFTUP):
+            event = win32structures.INPUT()
+            event.type = INPUT_MOUSE
+            event.mi.dx, event.mi.dy = dx, dy
+            event.mi.dwFlags = flags | MOUSEEVENTF_ABSOLUTE
+            self.events.append(event)
+        return self
+
+    def click_control(self, control) -> Self:
+        """Queue left click at the middle of control wrapper"""
+        p = control.rectangle().mid_point()
+        return self.click(p.x, p.y)
+
+    def flush(self, until: Callable[[], bool] | None = None, timeout: float | None = None) -> bool:
+        """
+        Inject queued events at once and wait until `until` returns True.
+        Returns False if it didn't pass in timeout. Without check waits `settle` seconds
+        """
+        if self.events:
+            count = len(self.events)
+            inputs = (win32structures.INPUT * count)(*self.events)
+            self.events.clear()
+            sent = win32functions.SendInput(count, ctypes.byref(inputs), ctypes.sizeof(win32structures.INPUT))
+            self.injections += 1
+            self.injected += sent
+            if sent != count:
+                raise RuntimeError(f"Only {sent} of {count} input events injected, input is blocked")
+        if until is None:
+            time.sleep(self.settle)
+            return True
+        deadline = time.perf_counter() + (self.timeout if timeout is None else timeout)
+        while not _passes(until):
+            if time.perf_counter() > deadline:
+                return False
+            time.sleep(POLL)
+        return True
+
+    def press_until(self, keys: str, until: Callable[[], bool], attempts: int = 10) -> bool:
+        """Send keys one batch at a time until check passes, e.g. ESC until dialogs are closed"""
+        for _ in range(attempts):
+            if _passes(until):
+                return True
+            self.keys(keys).flush(until, timeout=self.settle * 10)
+        return _passes(until)
+
+
+def _passes(check: Callable[[], bool]) -> bool:
+    # Windows may disappear between finding and reading them while the app reacts
+    try:
+        return check()
+    except ElementNotFoundError:
+        return False
+
+
+def window_open(app: Application, title: str) -> Callable[[], bool]:
+    return lambda: bool(app.windows(title=title))
+
+
+def window_closed(app: Application, title: str) -> Callable[[], bool]:
+    return lambda: not app.windows(title=title)
+
+
+def top_window_title(app: Application, prefix: str) -> Callable[[], bool]:
+    return lambda: app.top_window().window_text().startswith(prefix)
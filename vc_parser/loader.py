@@ -0,0 +1,61 @@
+"""
+Loader of parsed snapshot for read-only tools. It imports only standard library,
+`schemas` and pydantic are imported when `load_tree` is first called
+"""
+
+import json
+import os
+from collections.abc import Iterator
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from vc_parser.schemas import Node
+
+
+def load_raw(path: str | os.PathLike) -> dict[str, Any]:
+    """Snapshot as decoded JSON, in the shape of `Node.model_dump()`"""
+    with open(path, "rb") as f:
+        return json.loads(f.read())
+
+
+def walk_raw(node: dict[str, Any]) -> Iterator[dict[str, Any]]:
+    """Iterate over raw node and all its subtree in tree order, like `Node.walk`"""
+    stack = [node]
+    while stack:
+        n = stack.pop()
+        yield n
+        stack.extend(reversed(n["childrens"]))
+
+
+def load_tree(path: str | os.PathLike) -> "Node":
+    """Snapshot validated into `Node`"""
+    from vc_parser.schemas import Node
+
+    with open(path, "rb") as f:
+        return Node.model_validate_json(f.read())
+
+
+def raw_records(node: dict[str, Any], kind: str) -> Iterator[Any]:
+    """
+    Records of one kind of raw node: variables, triggers, actions, asset_names or
+    view_navigation. Triggers and actions include ones of view hotspots as in `Node.all_triggers`
+    """
+    v = node["view_navigation"]
+    match kind:
+        case "variables" | "asset_names":
+            yield from node[kind]
+        case "view_navigation":
+            if v is not None:
+                yield v
+        case "triggers" | "actions":
+            triggers = list(node["triggers"])
+            if v is not None:
+                for hotspot in (*v["explorations"], *v["characters"]):
+                    triggers += hotspot["triggers"]
+            for t in triggers:
+                if kind == "triggers":
+                    yield t
+                else:
+                    yield from t["actions"]
+        case _:
+            raise ValueError(f"Unknown record kind {kind!r}")
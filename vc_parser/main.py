@@ -3,6 +3,7 @@ import json
 import logging
 import os
 from enum import Enum
+from pathlib import Path
 
 from pydantic import BaseModel
 from pywinauto import WindowSpecification
@@ -10,15 +11,26 @@ from pywinauto.application import Application
 from pywinauto.controls.common_controls import _treeview_element
 
 from vc_parser.cache import Cache, FileCache
-from vc_parser.parsing import open_all_nodes, parse_assets, parse_nodes
+from vc_parser.controls import main_controls
+from vc_parser.fingerprint import NodeHash
+from vc_parser.parsing import (
+    open_all_nodes,
+    parse_assets,
+    parse_nodes,
+    sweep_fingerprints,
+)
+from vc_parser.pipeline import CrawlPipeline
+from vc_parser.planner import CrawlPlanner, TimingHistory, load_snapshot
 from vc_parser.schemas import (
     Asset,
     AssetName,
+    Node,
     Trigger,
     TriggerAction,
     Variable,
     ViewNavigation,
 )
+from vc_parser.shards import export_shards
 
 logger = logging.getLogger("parser")
 
@@ -35,6 +47,10 @@ class Config(BaseModel):
     debug: bool
     just_open: bool
     what_parse: WhatParse
+    incremental: bool
+    fingerprint_lists: bool
+    shards_dir: str | None
+    pipeline: bool
 
 
 def parse_config_from_args() -> Config:
@@ -69,6 +85,30 @@ def parse_config_from_args() -> Config:
         help="What kind of parse use. NODES or ASSETS. Default ASSETS",
         default=WhatParse.ASSETS,
     )
+    parser.add_argument(
+        "-i",
+        action="store_true",
+        help="Incremental NODES parse: compare per-node fingerprints with previous run, "
+        "parse again only changed nodes and take unchanged subtrees from cache. Default False",
+    )
+    parser.add_argument(
+        "--fingerprint-lists",
+        action="store_true",
+        help="With -i also put Variables/Triggers list items into fingerprints. Detects added, removed "
+        "and renamed variables and triggers, but opens both dialogs for every node. Default False",
+    )
+    parser.add_argument(
+        "-s",
+        type=str,
+        help="Also write tree as sharded directory with a file per chapter. Default None",
+        default=None,
+    )
+    parser.add_argument(
+        "--pipeline",
+        action="store_true",
+        help="Keep cache changes in memory and write them, progress and output in background thread, "
+        "so reading the authoring tool never waits on disk. Default False",
+    )
     args = vars(parser.parse_args())
     return Config(
         game_path=args["d"],
@@ -77,9 +117,20 @@ def parse_config_from_args() -> Config:
         debug=args["debug"],
         just_open=args["jo"],
         what_parse=args["p"],
+        incremental=args["i"],
+        fingerprint_lists=args["fingerprint_lists"],
+        shards_dir=args["s"],
+        pipeline=args["pipeline"],
     )
 
 
+def write_output(n: Node, config: Config):
+    with open(config.output_file_name, "w") as f:
+        json.dump(n.model_dump(), f)
+    if config.shards_dir is not None:
+        export_shards(n, Path(config.shards_dir))
+
+
 def start_app(game_path: str, vc_exe_name: str) -> Application:
     if not os.path.exists(game_path):
         raise ValueError(f"{game_path=} not found")
@@ -112,32 +163,57 @@ def main():
     if config.just_open:
         logger.info("App started.")
         exit(0)
+    pipeline = CrawlPipeline() if config.pipeline else None
+    load = FileCache.load if pipeline is None else pipeline.load
     cache = Cache(
-        variables=FileCache.load(Variable),
-        triggers=FileCache.load(Trigger),
-        trigger_actions=FileCache.load(TriggerAction),
-        assets=FileCache.load(Asset),
-        asset_names=FileCache.load(AssetName),
-        view_navigation=FileCache.load(ViewNavigation),
+        variables=load(Variable),
+        triggers=load(Trigger),
+        trigger_actions=load(TriggerAction),
+        assets=load(Asset),
+        asset_names=load(AssetName),
+        view_navigation=load(ViewNavigation),
+        fingerprints=load(NodeHash),
     )
-    app["VC Authoring Tool -"].menu_select(r"View -> Screen View")
-    app["VC Authoring Tool -"].menu_select(r"View -> Preview")
-    app["VC Authoring Tool -"].menu_select(r"View -> Interface List")
-    app["VC Authoring Tool -"].menu_select(r"View -> Asset List")
+    controls = main_controls(app)
+    controls.window.menu_select(r"View -> Screen View")
+    controls.window.menu_select(r"View -> Preview")
+    controls.window.menu_select(r"View -> Interface List")
+    controls.window.menu_select(r"View -> Asset List")
     match config.what_parse:
         case WhatParse.NODES:
-            tw = app["VC Authoring Tool -"]["TreeView"]
+            tw = controls["TreeView"]
             el: _treeview_element = tw.tree_root()
             open_all_nodes(el)
             el.select()
             el.click()
             n = None
+            unchanged = None
+            if config.incremental:
+                unchanged = set()
+                sweep_fingerprints(app, el, cache, unchanged, is_first=True, lists=config.fingerprint_lists)
+                print(f"{len(unchanged)} nodes in unchanged subtrees are taken from cache")
+            planner = CrawlPlanner(cache, TimingHistory.load(), load_snapshot(Path(config.output_file_name)))
+            planner.start()
             try:
-                n = parse_nodes(app, app_uia, el, is_first=True, cache=cache)
+                n = parse_nodes(
+                    app,
+                    app_uia,
+                    el,
+                    is_first=True,
+                    cache=cache,
+                    unchanged=unchanged,
+                    pipeline=pipeline,
+                    planner=planner,
+                )
+                planner.close(complete=True)
 
-                n.print_tree()
-                with open(config.output_file_name, "w") as f:
-                    json.dump(n.model_dump(), f)
+                if pipeline is None:
+                    n.print_tree()
+                    write_output(n, config)
+                else:
+                    pipeline.submit(n.print_tree)
+                    pipeline.submit(write_output, n, config)
+                    pipeline.close()
 
                 if config.debug:
                     input("Press enter to quit...")
@@ -149,11 +225,17 @@ def main():
                 if config.debug:
                     input("Press enter to quit...")
                 app.kill()
+                planner.close()
+                if pipeline is not None:
+                    pipeline.close()
                 main()
             finally:
                 app.kill()
+                planner.close()
+                if pipeline is not None:
+                    pipeline.close()
         case WhatParse.ASSETS:
-            app["VC Authoring Tool -"].menu_select(r"View -> Asset List")
+            controls.window.menu_select(r"View -> Asset List")
             try:
                 assets = parse_assets(app, cache)
                 with open("assets.json", "w") as f:
@@ -166,9 +248,13 @@ def main():
                 if config.debug:
                     input("Press enter to quit...")
                 app.kill()
+                if pipeline is not None:
+                    pipeline.close()
                 main()
             finally:
                 app.kill()
+                if pipeline is not None:
+                    pipeline.close()
 
 
 if __name__ == "__main__":
@@ -1,3 +1,4 @@
+import re
 import time
 
 from pydantic import ValidationError
@@ -11,8 +12,20 @@ from pywinauto.controls.win32_controls import ComboBoxWrapper
 from tqdm.auto import tqdm
 
 from vc_parser import utils
-from vc_parser.cache import Cache
+from vc_parser.cache import Cache, trigger_actions_key
+from vc_parser.controls import main_controls
+from vc_parser.fingerprint import NodeFingerprint, NodeHash, subtree_digest
+from vc_parser.input_batch import (
+    InputBatch,
+    top_window_title,
+    window_closed,
+    window_open,
+)
+from vc_parser.pipeline import CrawlPipeline
+from vc_parser.planner import CrawlPlanner, PhaseClock
 from vc_parser.schemas import (
+    ASSETS_BY_STYLE,
+    TRIGGER_ACTIONS_BY_TYPE,
     ActionParam3DSound,
     ActionParamAsset,
     ActionParamCppFunction,
@@ -52,8 +65,7 @@ def parse_assets(app: Application, cache: Cache) -> list[Asset]:
     aw: WindowSpecification = app['Asset List']
     lv: WindowSpecification = aw["List View"]
     header = lv.header
-    h_click = header.click
-    h_click()
+    header.click()
     items = lv.items()
     columns = lv.columns()
     pbar = tqdm(
@@ -62,11 +74,11 @@ def parse_assets(app: Application, cache: Cache) -> list[Asset]:
         total=int(len(items) / len(columns)),
     )
     items[0].click()
-    ai = None
-    for it in pbar:
-        keyboard.send_keys('{ENTER}')
-        if ai is None:
-            ai = app['Asset Information']
+    ai = app['Asset Information']
+    rows = lv.wrapper_object()
+    batch = InputBatch()
+    batch.keys('{ENTER}').flush(window_open(app, 'Asset Information'))
+    for i, it in enumerate(pbar):
         name = ai['NameEdit'].window_text().strip()
         if cache.assets.has_key(name):
             asset: Asset = cache.assets.get(name)[0]  # type: ignore
@@ -129,7 +141,7 @@ def parse_assets(app: Application, cache: Cache) -> list[Asset]:
                             end=end.strip() or None,
                         )
                         disc_files.append(f)
-                    keyboard.send_keys('{ESC}')
+                    batch.keys('{ESC}').flush(window_closed(app, 'Disc Files'))
                     resource = RStyleFile(
                         file=ai["File(s)Edit1"].window_text(),
                         from_=ai["FromEdit1"].window_text(),
@@ -165,7 +177,7 @@ def parse_assets(app: Application, cache: Cache) -> list[Asset]:
                     ai.print_control_identifiers()
                     input(f"Not implemented for {resource_style=}")
                     raise Exception(f"Not implemented for {resource_style=}")
-            asset = Asset(
+            asset = ASSETS_BY_STYLE[resource_style](
                 name=name,
                 description=description,
                 category=category,
@@ -174,12 +186,22 @@ def parse_assets(app: Application, cache: Cache) -> list[Asset]:
                 db_id=db_id,
                 resource=resource,
             )
-            keyboard.send_keys('{ESC}')
+            batch.keys('{ESC}')
             cache.assets.set(name, [asset])
         res.append(asset)
-        keyboard.send_keys('{ESC}')
-        h_click()
-        keyboard.send_keys('{VK_DOWN}')
+        # The dialog is modal, the header click can't reach the list before it's closed
+        if not batch.keys('{ESC}').flush(window_closed(app, 'Asset Information')):
+            raise TimeoutError(f"Asset Information of {name=} wasn't closed")
+        if i == pbar.total - 1:
+            break
+        header.click()
+
+        def next_opened(row: int = i + 1) -> bool:
+            # Rows may share a name, so the selected row tells that the next one is opened
+            return rows.is_selected(row) and bool(app.windows(title='Asset Information'))
+
+        if not batch.keys('{VK_DOWN}{ENTER}').flush(next_opened):
+            raise TimeoutError(f"Asset Information of the row after {name=} wasn't opened")
     return res
 
 
@@ -285,7 +307,7 @@ def parse_trigger_action(app: Application, name: str) -> TriggerAction:
     except ValidationError as e:
         w.print_control_identifiers()
         raise e
-    ta = TriggerAction(
+    ta = TRIGGER_ACTIONS_BY_TYPE[action_type](
         name=name,
         exp1=w["IfEdit"].window_text(),
         op=w["Evaluate ExpressionComboBox"].window_text(),
@@ -322,9 +344,10 @@ def parse_asset_names(app: Application, path: NodePath, cache: Cache) -> list[Tr
         res = [x.name for x in cache.asset_names.get(path)]
     else:
         res = []
-        if app["VC Authoring Tool -"][">>Button"].exists(1):
+        controls = main_controls(app)
+        if controls.exists(">>Button", 1):
             try:
-                b = app["VC Authoring Tool -"][">>Button"]
+                b = controls[">>Button"]
                 if b.is_enabled():
                     for t in b.texts():
                         if t == ">>":
@@ -349,7 +372,7 @@ def parse_triggers(app: Application, path: NodePath, cache: Cache | None) -> lis
         res = cache.triggers.get(path)
     else:
         res = []
-        app["VC Authoring Tool -"]["Triggers"].click()
+        main_controls(app)["Triggers"].click()
         w = app["Triggers"]["ListBox"]
         texts = w.item_texts()
         for i in range(w.item_count()):
@@ -357,7 +380,7 @@ def parse_triggers(app: Application, path: NodePath, cache: Cache | None) -> lis
             app["Triggers"]["Edit"].click()
             while not app.windows(title="Trigger"):
                 app["Triggers"]["Edit"].click()
-            res.append(parse_trigger(app, texts[i], path + f"_{i}_{texts[i]}", cache))
+            res.append(parse_trigger(app, texts[i], trigger_actions_key(path, i, texts[i]), cache))
             app["Edit Trigger"]["OK"].click()
         app["Triggers"]["Cancel"].click()
         if cache is not None:
@@ -371,7 +394,7 @@ def parse_variables(app: Application, path: NodePath, cache: Cache | None, from_
     else:
         res = []
         if not from_conversation:
-            app["VC Authoring Tool -"]["Variables"].click()
+            main_controls(app)["Variables"].click()
             w = app["Variables"]["ListBox"]
             edit_btn = app["Variables"]["Edit"]
         else:
@@ -391,6 +414,150 @@ def parse_variables(app: Application, path: NodePath, cache: Cache | None, from_
     return res
 
 
+def has_asset_list(app: Application) -> bool:
+    controls = main_controls(app)
+    if not controls.exists(">>Button", 1):
+        return False
+    b = controls[">>Button"]
+    return b.is_enabled() and any([x == ">>" for x in b.texts()])
+
+
+def read_list_box_texts(app: Application, button: str) -> list[str]:
+    """Open Variables or Triggers dialog of current node and read items without editing them"""
+    main_controls(app)[button].click()
+    texts = app[button]["ListBox"].item_texts()
+    app[button]["Cancel"].click()
+    return texts
+
+
+def read_node_fingerprint(app: Application, childrens: list[_treeview_element], lists: bool) -> NodeFingerprint:
+    """`lists` also reads Variables/Triggers list items, opening both dialogs"""
+    fingerprint = NodeFingerprint(has_asset_list=has_asset_list(app), childrens=[x.text() for x in childrens])
+    if lists:
+        fingerprint.variables = read_list_box_texts(app, "Variables")
+        fingerprint.triggers = read_list_box_texts(app, "Triggers")
+    return fingerprint
+
+
+def invalidate_node_cache(path: NodePath, cache: Cache):
+    """Drop cached drill-down results of node, so they will be parsed again. Each store is saved once"""
+    with cache.batch():
+        cache.asset_names.delete(path)
+        cache.variables.delete(path)
+        cache.triggers.delete(path)
+        cache.view_navigation.delete(path)
+        action_key = re.compile(re.escape(path) + r"_\d+_")
+        cache.trigger_actions.delete_many(
+            [k for k in cache.trigger_actions.data if action_key.match(k)]
+        )
+
+
+def check_node_fingerprint(
+    app: Application, path: NodePath, childrens: list[_treeview_element], cache: Cache, lists: bool
+) -> tuple[NodeFingerprint, NodeHash | None]:
+    """
+    Read fingerprint of node and compare it with one stored on previous run.
+    If it changed, cached data of node is invalidated. Returns it with the stored hash,
+    nodes without stored fingerprint trust the cache as before
+    """
+    fingerprint = read_node_fingerprint(app, childrens, lists)
+    prev: NodeHash | None = next(iter(cache.fingerprints.get(path)), None)
+    if prev is not None and prev.local != fingerprint.digest():
+        print(f"{path=} changed since previous run, parse it again")
+        invalidate_node_cache(path, cache)
+    return fingerprint, prev
+
+
+def parses_navigations(path: NodePath, maybe_has_navigations: bool) -> bool:
+    return maybe_has_navigations and 'X-Files/Node 1: Setup/' in path
+
+
+def is_node_cached(path: NodePath, cache: Cache, has_navigations: bool) -> bool:
+    """All drill-down results of node are in cache, so it can be built without the tool"""
+    stores = [cache.asset_names, cache.variables, cache.triggers]
+    if has_navigations:
+        stores.append(cache.view_navigation)
+    return all(store.has_key(path) for store in stores)
+
+
+def select_node(app: Application, node: _treeview_element, is_first: bool = False) -> str:
+    """Select tree node and wait until right window shows it. Returns node text"""
+    node_text = node.text()
+    node.select()
+    # Need because sometimes right window not updated after tree node select called.
+    # Both keys are injected at once and the right window is checked instead of fixed pauses
+    controls = main_controls(app)
+    InputBatch().keys("{VK_DOWN}{VK_UP}" if is_first else "{VK_UP}{VK_DOWN}").flush(
+        lambda: node_text == "X-Files" or controls["NameEdit"].window_text() == node_text
+    )
+
+    name = controls["NameEdit"].window_text()
+    if node_text != "X-Files" and name != node_text:
+        raise Exception(
+            f"Parsing node with text '{node_text}' != right window title '{name}'"
+        )
+    return node_text
+
+
+def sweep_fingerprints(
+    app: Application,
+    node: _treeview_element,
+    cache: Cache,
+    unchanged: set[NodePath],
+    prev_path: None | NodePath = None,
+    is_first: bool = False,
+    lists: bool = False,
+) -> str:
+    """
+    First pass of incremental parse. Read fingerprints of all nodes, store their Merkle
+    subtree hashes and add to `unchanged` paths whose subtree hash equals the one of previous
+    run and whose nodes are all cached. Those subtrees are built from cache without visiting them.
+    Only nodes are selected, dialogs are opened just with `lists`, see `NodeFingerprint`.
+    Cache stores are saved once after the sweep. Returns subtree hash of node
+    """
+    with cache.batch():
+        return _sweep_fingerprints(app, node, cache, unchanged, prev_path, is_first, lists)
+
+
+def _sweep_fingerprints(
+    app: Application,
+    node: _treeview_element,
+    cache: Cache,
+    unchanged: set[NodePath],
+    prev_path: None | NodePath,
+    is_first: bool,
+    lists: bool,
+) -> str:
+    node_text = select_node(app, node, is_first)
+    path = node_text if prev_path is None else f"{prev_path}/{node_text}"
+    childrens = node.children()
+    fingerprint, prev = check_node_fingerprint(app, path, childrens, cache, lists)
+    cached = is_node_cached(path, cache, parses_navigations(path, fingerprint.has_asset_list))
+    children_subtrees = [_sweep_fingerprints(app, c, cache, unchanged, path, False, lists) for c in childrens]
+    local = fingerprint.digest()
+    res = NodeHash(local=local, subtree=subtree_digest(local, children_subtrees))
+    cache.fingerprints.set(path, [res])
+    children_unchanged = all(f"{path}/{c.text()}" in unchanged for c in childrens)
+    if prev is not None and prev.subtree == res.subtree and cached and children_unchanged:
+        unchanged.add(path)
+    return res.subtree
+
+
+def cached_subtree(
+    node: _treeview_element, path: NodePath, cache: Cache, prev_path: None | NodePath, planner: CrawlPlanner | None
+) -> Node:
+    """Build unchanged subtree from cached records, its nodes aren't selected in the tool"""
+    n = Node(name=node.text(), path=path)
+    n.asset_names = [x.name for x in cache.asset_names.get(path)]
+    n.variables = cache.variables.get(path)
+    n.triggers = cache.triggers.get(path)
+    n.view_navigation = next(iter(cache.view_navigation.get(path)), None)
+    if planner is not None:
+        planner.skipped(n, prev_path)
+    n.childrens = [cached_subtree(c, f"{path}/{c.text()}", cache, path, planner) for c in node.children()]
+    return n
+
+
 def open_all_nodes(node):
     """Open all nodes on main nodes view in the app"""
     elements = [node, *node.sub_elements()]
@@ -406,42 +573,52 @@ def parse_nodes(
     cache: Cache,
     prev_path: None | NodePath = None,
     is_first: bool = False,
+    unchanged: set[NodePath] | None = None,
+    pipeline: CrawlPipeline | None = None,
+    planner: CrawlPlanner | None = None,
 ) -> Node:
+    """`unchanged` are paths of subtrees found unchanged by `sweep_fingerprints`, they are taken from cache"""
     node_text = node.text()
-    node.select()
-    if prev_path is None:
-        path = [
-            node_text,
-        ]
-    else:
-        path = [prev_path, node_text]
-    path = "/".join(path)
+    path = node_text if prev_path is None else f"{prev_path}/{node_text}"
+    if unchanged is not None and path in unchanged:
+        return cached_subtree(node, path, cache, prev_path, planner)
 
-    # Need because sometimes right window not updated after tree node select called
-    if is_first:
-        keyboard.send_keys("{VK_DOWN}{VK_UP}")
-    else:
-        keyboard.send_keys("{VK_UP}{VK_DOWN}")
-
-    name = app["VC Authoring Tool -"]["NameEdit"].window_text()
-    if node_text != "X-Files" and name != node_text:
-        raise Exception(
-            f"Parsing node with text '{node_text}' != right window title '{name}'"
-        )
-    n = Node(name=node.text(), path=path)
+    clock = PhaseClock()
+    select_node(app, node, is_first)
+    n = Node(name=node_text, path=path)
+    childrens = node.children()
+    misses = planner.misses(path) if planner is not None else []
+    clock.lap("select")
     n.asset_names = parse_asset_names(app, path, cache)
+    clock.lap("asset_names")
     n.variables = parse_variables(app, path, cache)
+    clock.lap("variables")
     n.triggers = parse_triggers(app, path, cache)
-    maybe_has_navigations = app["VC Authoring Tool -"][">>Button"].exists(1) and app["VC Authoring Tool -"][">>Button"].is_enabled() and any([x == '>>' for x in app["VC Authoring Tool -"][">>Button"].texts()])
-    print(path, maybe_has_navigations)
-    if maybe_has_navigations and 'X-Files/Node 1: Setup/' in path:
+    clock.lap("triggers")
+    maybe_has_navigations = has_asset_list(app)
+    if pipeline is None:
+        print(path, maybe_has_navigations)
+    else:
+        pipeline.submit(print, path, maybe_has_navigations)
+    if parses_navigations(path, maybe_has_navigations):
         n.view_navigation = parse_navigations(app, path, cache)
-        
-    childrens = node.children()
-    n.childrens = [
-        parse_nodes(app, app_uia, child, prev_path=path, cache=cache) for child in childrens
-    ]
+    clock.lap("navigation")
+    if planner is not None:
+        planner.done(n, prev_path, clock.seconds, misses)
+
+    # Chapters are parsed from the cheapest one, but kept in tree order
+    order = range(len(childrens))
+    if planner is not None and is_first:
+        order = planner.order(path, [c.text() for c in childrens])
+    parsed = {
+        i: parse_nodes(
+            app, app_uia, childrens[i], prev_path=path, cache=cache, unchanged=unchanged, pipeline=pipeline, planner=planner
+        )
+        for i in order
+    }
+    n.childrens = [parsed[i] for i in range(len(childrens))]
     return n
+
 def wait_window_or_ctrl_c(app: Application, titles: str) -> str | None:
     '''
     Function waiting for window of any title appears
@@ -652,7 +829,7 @@ def parse_acknowledgements_properties(elements: list) -> list[str]:
 def parse_navigations(app: Application, path: str, cache: Cache) -> ViewNavigation:
     if cache.view_navigation.has_key(path):
         return cache.view_navigation.get(path)[0]
-    app["VC Authoring Tool -"].menu_select(r"View -> Screen View")
+    main_controls(app).window.menu_select(r"View -> Screen View")
     navigations = []
     character_properties = []
     explorable_properties = []
@@ -748,12 +925,13 @@ def parse_navigations(app: Application, path: str, cache: Cache) -> ViewNavigati
                 character_properties.append(cp)
             else:
                 print("This cp already added")
-        while not app.top_window().window_text().startswith('Current View -'):
-            keyboard.send_keys('{ESC}')
+        # One ESC per open dialog, each waits for the dialog to close instead of a pause
+        if not InputBatch().press_until('{ESC}', top_window_title(app, 'Current View -')):
+            raise TimeoutError("Can't return to Current View window")
         print(f"{len(navigations)=}")
         print(f"{len(explorable_properties)=}")
         print(f"{len(character_properties)=}")
     res = ViewNavigation(navigations=navigations, explorations=explorable_properties, characters=character_properties)
     cache.view_navigation.set(path, [res])
-    app["VC Authoring Tool -"].menu_select(r"View -> Screen View")
+    main_controls(app).window.menu_select(r"View -> Screen View")
     return res
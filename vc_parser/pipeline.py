@@ -0,0 +1,105 @@
+import logging
+import queue
+import threading
+import time
+from collections.abc import Callable
+from functools import partial
+from typing import Self
+
+from pydantic import BaseModel, PrivateAttr
+
+from vc_parser.cache import FileCache
+
+logger = logging.getLogger("parser")
+
+
+def _idle():
+    pass
+
+
+class DeferredFileCache(FileCache):
+    """
+    Cache store whose changes are kept in memory and written by pipeline worker.
+    Reads and writes of crawler see the current data at once
+    """
+
+    _pipeline: "CrawlPipeline" = PrivateAttr()
+
+    def save(self):
+        self._pipeline.mark_dirty(self)
+
+    def flush(self):
+        # Copy of dict is atomic for other threads, stored lists are replaced and never changed
+        self.write(dict(self.data))
+
+
+class CrawlPipeline:
+    """
+    Background worker of crawler. GUI thread only reads the authoring tool and submits
+    tasks like progress output or writing results into a bounded queue, so it waits only
+    when worker is `maxsize` tasks behind. Changed cache stores are written together
+    every `save_interval` seconds and on close
+    """
+
+    def __init__(self, maxsize: int = 256, save_interval: float = 2.0):
+        self.queue: queue.Queue[Callable[[], None] | None] = queue.Queue(maxsize)
+        self.save_interval = save_interval
+        self.lock = threading.Lock()
+        self.dirty: dict[int, DeferredFileCache] = {}
+        self.error: BaseException | None = None
+        self.thread = threading.Thread(target=self._run, name="crawl-pipeline", daemon=True)
+        self.thread.start()
+
+    def load(self, klass: type[BaseModel]) -> DeferredFileCache:
+        store = DeferredFileCache.load(klass)
+        store._pipeline = self
+        return store
+
+    def mark_dirty(self, store: DeferredFileCache):
+        with self.lock:
+            self.dirty[id(store)] = store
+
+    def submit(self, func: Callable, *args):
+        """Queue task for worker, blocks while queue is full"""
+        if self.error is not None:
+            raise RuntimeError("Crawl pipeline worker failed") from self.error
+        self.queue.put(partial(func, *args))
+
+    def flush(self):
+        with self.lock:
+            stores = list(self.dirty.values())
+            self.dirty.clear()
+        for store in stores:
+            store.flush()
+
+    def _run(self):
+        saved = time.monotonic()
+        while True:
+            try:
+                task = self.queue.get(timeout=self.save_interval)
+            except queue.Empty:
+                task = _idle
+            if task is None:
+                return
+            if self.error is not None:
+                # Failed worker drains queue, so producer isn't blocked
+                continue
+            try:
+                task()
+                if time.monotonic() - saved >= self.save_interval:
+                    self.flush()
+                    saved = time.monotonic()
+            except BaseException as e:
+                logger.exception("Crawl pipeline worker failed")
+                self.error = e
+
+    def close(self) -> Self:
+        """Run queued tasks, write changed cache stores and stop worker. Can be called again"""
+        if self.thread.is_alive():
+            self.queue.put(None)
+            self.thread.join()
+            self.flush()
+        if self.error is not None:
+            error, self.error = self.error, None
+            raise RuntimeError("Crawl pipeline worker failed") from error
+        return self
@@ -0,0 +1,298 @@
+import argparse
+import json
+import os
+import time
+from pathlib import Path
+from statistics import mean
+from typing import TYPE_CHECKING, Literal, Self, get_args
+
+from pydantic import BaseModel
+
+from vc_parser.cache import CACHE_DIR, Cache, FileCache
+from vc_parser.fingerprint import NodeHash
+from vc_parser.schemas import (
+    Asset,
+    AssetName,
+    Node,
+    NodePath,
+    Trigger,
+    TriggerAction,
+    Variable,
+    ViewNavigation,
+)
+
+if TYPE_CHECKING:
+    from tqdm.auto import tqdm
+
+# Phases of NODES parse of one node. `select` is selecting node and reading its fingerprint
+Phase = Literal["select", "asset_names", "variables", "triggers", "navigation"]
+PHASES: tuple[Phase, ...] = get_args(Phase)
+HISTORY_FILE = CACHE_DIR / "timing_history.json"
+# Guesses before the first run with timings: seconds of node which hits cache in every phase
+# and seconds per read item (variable, trigger or action, asset list or navigation) of cache miss
+DEFAULT_HIT = 0.05
+DEFAULT_RATE = 1.0
+
+
+class NodeTiming(BaseModel):
+    parent: NodePath | None
+    chapter: NodePath | None
+    seconds: dict[Phase, float]
+    # Phases which read the authoring tool instead of cache
+    misses: list[Phase]
+    variables: int
+    triggers: int
+    actions: int
+    navigation: bool
+
+    @classmethod
+    def from_node(
+        cls,
+        n: Node,
+        parent: NodePath | None,
+        chapter: NodePath | None,
+        seconds: dict[Phase, float] | None = None,
+        misses: list[Phase] | None = None,
+    ) -> Self:
+        return cls(
+            parent=parent,
+            chapter=chapter,
+            seconds=seconds or {},
+            misses=misses or [],
+            variables=len(n.variables),
+            triggers=len(n.triggers),
+            actions=sum(len(t.actions) for t in n.triggers),
+            navigation=n.view_navigation is not None,
+        )
+
+    def units(self, phase: Phase) -> int:
+        """Items read by phase on cache miss"""
+        match phase:
+            case "variables":
+                return self.variables
+            case "triggers":
+                return self.triggers + self.actions
+        return 1
+
+
+class TimingHistory(BaseModel):
+    nodes: dict[NodePath, NodeTiming] = {}
+
+    @classmethod
+    def load(cls, path: Path = HISTORY_FILE) -> Self:
+        if not os.path.exists(path):
+            return cls()
+        with open(path, "rb") as f:
+            return cls.model_validate_json(f.read())
+
+    def save(self, path: Path = HISTORY_FILE):
+        with open(path, "w") as f:
+            f.write(self.model_dump_json())
+
+
+class CostModel:
+    """
+    Seconds of node phases fitted on history: mean time of cache hit and
+    time per item of cache miss, every miss pays for one more item of dialog opening
+    """
+
+    def __init__(self, history: TimingHistory):
+        self.hit: dict[Phase, float] = {}
+        self.rate: dict[Phase, float] = {}
+        for phase in PHASES:
+            timed = [t for t in history.nodes.values() if phase in t.seconds]
+            hits = [t.seconds[phase] for t in timed if phase not in t.misses]
+            misses = [t for t in timed if phase in t.misses]
+            self.hit[phase] = mean(hits) if hits else DEFAULT_HIT / len(PHASES)
+            units = sum(t.units(phase) + 1 for t in misses)
+            self.rate[phase] = sum(t.seconds[phase] for t in misses) / units if misses else DEFAULT_RATE
+
+    def predict(self, t: NodeTiming, misses: list[Phase]) -> float:
+        return sum(self.rate[p] * (t.units(p) + 1) if p in misses else self.hit[p] for p in PHASES)
+
+
+class PhaseClock:
+    def __init__(self):
+        self.seconds: dict[Phase, float] = {}
+        self.last = time.perf_counter()
+
+    def lap(self, phase: Phase):
+        now = time.perf_counter()
+        self.seconds[phase] = now - self.last
+        self.last = now
+
+
+class CrawlPlanner:
+    """
+    Predicts cost of NODES parse from timing history, node counts of history or previous
+    snapshot and current cache. Chapters are parsed from the cheapest one, history is saved
+    when chapter is done, so restart after an error predicts only what's left.
+    Progress bar counts predicted seconds, so its ETA follows the cost of nodes
+    """
+
+    def __init__(self, cache: Cache, history: TimingHistory, snapshot: Node | None = None):
+        self.cache = cache
+        self.history = history
+        self.model = CostModel(history)
+        self.known: dict[NodePath, NodeTiming] = {}
+        if snapshot is not None:
+            self.known[snapshot.path] = NodeTiming.from_node(snapshot, None, None)
+            for chapter in snapshot.childrens:
+                self._add_known(chapter, snapshot.path, chapter.path)
+        self.known.update(history.nodes)
+        self.visited: dict[NodePath, NodeTiming] = {}
+        self.chapter: NodePath | None = None
+        self.bar: tqdm | None = None
+        self.started = 0.0
+        self.closed = False
+
+    def _add_known(self, n: Node, parent: NodePath, chapter: NodePath):
+        self.known[n.path] = NodeTiming.from_node(n, parent, chapter)
+        for c in n.childrens:
+            self._add_known(c, n.path, chapter)
+
+    def misses(self, path: NodePath) -> list[Phase]:
+        """Phases of node without cached data. Navigation is read only if node turns out to have it"""
+        c = self.cache
+        stores = (
+            ("asset_names", c.asset_names),
+            ("variables", c.variables),
+            ("triggers", c.triggers),
+            ("navigation", c.view_navigation),
+        )
+        return [p for p, store in stores if not store.has_key(path)]
+
+    def expected_misses(self, path: NodePath) -> list[Phase]:
+        """Phases of known node which will read the authoring tool"""
+        navigation = self.known[path].navigation
+        return [p for p in self.misses(path) if p != "navigation" or navigation]
+
+    def cost(self, path: NodePath) -> float:
+        """Predicted seconds of known node with current cache"""
+        return self.model.predict(self.known[path], self.expected_misses(path))
+
+    def plan(self) -> dict[NodePath | None, float]:
+        """Predicted seconds by chapter, root is None"""
+        res: dict[NodePath | None, float] = {}
+        for path, t in self.known.items():
+            res[t.chapter] = res.get(t.chapter, 0.0) + self.cost(path)
+        return res
+
+    def order(self, root: NodePath, names: list[str]) -> list[int]:
+        """Indexes of chapters in parse order: the cheapest first, unknown ones last"""
+        plan = self.plan()
+        return sorted(range(len(names)), key=lambda i: plan.get(f"{root}/{names[i]}", float("inf")))
+
+    def start(self):
+        from tqdm.auto import tqdm
+
+        costs = self.plan()
+        self.started = time.perf_counter()
+        self.bar = tqdm(total=round(sum(costs.values()), 1), desc="Parsing nodes", unit="s")
+
+    def _chapter(self, n: Node, parent: NodePath | None) -> NodePath | None:
+        if parent is None:
+            return None
+        up = self.visited[parent]
+        return n.path if up.parent is None else up.chapter
+
+    def done(self, n: Node, parent: NodePath | None, seconds: dict[Phase, float], misses: list[Phase]):
+        """Record timing of parsed node, its children are parsed after this"""
+        chapter = self._chapter(n, parent)
+        if n.view_navigation is None:
+            # Navigation is parsed only for some views with asset list
+            misses = [p for p in misses if p != "navigation"]
+        t = NodeTiming.from_node(n, parent, chapter, seconds, misses)
+        self.visited[n.path] = t
+        if chapter != self.chapter:
+            self.chapter = chapter
+            self.save()
+        if self.bar is not None:
+            # Nodes are counted by their cost predicted at start, new nodes extend the total
+            if n.path in self.known:
+                predicted = self.model.predict(self.known[n.path], misses)
+            else:
+                predicted = self.model.predict(t, misses)
+                self.bar.total = round(self.bar.total + predicted, 1)
+            self.bar.update(round(predicted, 1))
+            rate = len(self.visited) / (time.perf_counter() - self.started)
+            self.bar.set_postfix(nodes=len(self.visited), nodes_per_sec=f"{rate:.2f}")
+
+    def skipped(self, n: Node, parent: NodePath | None):
+        """
+        Record node of unchanged subtree built from cache. Its timing of previous run is kept,
+        so skipped nodes don't teach the cost model that visiting a node is free
+        """
+        chapter = self._chapter(n, parent)
+        prev = self.history.nodes.get(n.path)
+        if prev is not None:
+            t = prev.model_copy(update={"parent": parent, "chapter": chapter})
+        else:
+            t = NodeTiming.from_node(n, parent, chapter)
+        self.visited[n.path] = t
+        if self.bar is not None and n.path in self.known:
+            # Predicted cost of the node isn't paid, so it leaves the total instead of being counted
+            self.bar.total = round(self.bar.total - self.cost(n.path), 1)
+            self.bar.refresh()
+
+    def save(self):
+        self.history.nodes.update(self.visited)
+        self.history.save()
+
+    def close(self, complete: bool = False):
+        """
+        Save history, after complete parse it keeps only nodes which still exist.
+        Can be called again, only the first call saves
+        """
+        if self.closed:
+            return
+        self.closed = True
+        if complete:
+            self.history.nodes = dict(self.visited)
+        self.save()
+        if self.bar is not None:
+            self.bar.close()
+            self.bar = None
+
+
+def load_cache() -> Cache:
+    return Cache(
+        variables=FileCache.load(Variable),
+        triggers=FileCache.load(Trigger),
+        trigger_actions=FileCache.load(TriggerAction),
+        assets=FileCache.load(Asset),
+        asset_names=FileCache.load(AssetName),
+        view_navigation=FileCache.load(ViewNavigation),
+        fingerprints=FileCache.load(NodeHash),
+    )
+
+
+def load_snapshot(path: Path) -> Node | None:
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return Node.model_validate(json.load(f))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Predict time of NODES parse from timing history and current cache")
+    parser.add_argument("-t", type=str, help="Previous snapshot file. Default data/tree.json", default="data/tree.json")
+    args = parser.parse_args()
+
+    planner = CrawlPlanner(load_cache(), TimingHistory.load(), load_snapshot(Path(args.t)))
+    plan = planner.plan()
+    root = next((p for p, t in planner.known.items() if t.parent is None), "")
+    chapters = [p for p, t in planner.known.items() if t.parent == root]
+    order = planner.order(root, [p[len(root) + 1 :] for p in chapters])
+    print(f"{len(planner.history.nodes)} nodes in timing history")
+    for p in PHASES:
+        print(f"{p:<12} hit {planner.model.hit[p]:6.2f}s  miss {planner.model.rate[p]:6.2f}s per item")
+    for i in order:
+        misses = sum(bool(planner.expected_misses(path)) for path, t in planner.known.items() if t.chapter == chapters[i])
+        print(f"{plan.get(chapters[i], 0.0):9.0f}s  {misses:5} nodes to read  {chapters[i]}")
+    total = sum(plan.values())
+    print(f"total {total / 60:.1f} min")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Query CLI over inverted indexes of parsed project. Index is built and stored by `vc_parser.index`,
+fresh stored index is read as plain JSON, so a query doesn't import pydantic or schemas
+"""
+
+import argparse
+import json
+import os
+import re
+import time
+from pathlib import Path
+from typing import Any, Literal, get_args
+
+IndexKind = Literal["writes", "reads", "asset", "asset_list", "cpp", "view", "text"]
+INDEX_KINDS: tuple[IndexKind, ...] = get_args(IndexKind)
+
+# Separator of Set View target parts. Location names may contain '/'
+VIEW_SEP = " | "
+WORD_RE = re.compile(r"\w+")
+
+
+def view_key(*parts: str) -> str:
+    return VIEW_SEP.join(parts)
+
+
+def get_index_path(snapshot: Path) -> Path:
+    return snapshot.with_suffix(".index.json")
+
+
+def find(indexes: dict[str, dict[str, list[int]]], kind: IndexKind, key: str) -> list[int]:
+    """Ids of refs matching key, text keys match refs having all words"""
+    if kind == "text":
+        ids = None
+        for w in WORD_RE.findall(key.lower()):
+            found = set(indexes[kind].get(w, ()))
+            ids = found if ids is None else ids & found
+        return sorted(ids or ())
+    return indexes[kind].get(key, [])
+
+
+def query_stored(snapshot: Path, kind: IndexKind, key: str) -> list[dict[str, Any]] | None:
+    """
+    Refs matching key from index stored next to snapshot as plain dicts.
+    None if index is missing, of other version or snapshot size or mtime changed since it was built
+    """
+    try:
+        with open(get_index_path(snapshot), "rb") as f:
+            data = json.loads(f.read())
+        st = os.stat(snapshot)
+        if (data["source"]["size"], data["source"]["mtime_ns"]) != (st.st_size, st.st_mtime_ns):
+            return None
+        refs = data["refs"]
+        return [refs[i] for i in find(data["indexes"], kind, key)]
+    except (OSError, ValueError, KeyError, TypeError, IndexError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query parsed project by inverted indexes")
+    parser.add_argument("kind", type=str, choices=INDEX_KINDS, help="Index to query")
+    parser.add_argument(
+        "key",
+        type=str,
+        nargs="+",
+        help="Variable, asset, C++ function name or words of action name. "
+        "For view: node [location [view point [view]]]",
+    )
+    parser.add_argument("-t", type=str, help="Snapshot file. Default data/tree.json", default="data/tree.json")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    key = view_key(*args.key) if args.kind == "view" else " ".join(args.key)
+    res = query_stored(Path(args.t), args.kind, key)
+    if res is None:
+        # Index is built or updated with pydantic models
+        from vc_parser.index import load_index
+
+        res = [r.model_dump() for r in load_index(Path(args.t)).query(args.kind, key)]
+    elapsed = time.perf_counter() - start
+    for r in res:
+        where = r["path"] if not r["owner"] else f"{r['path']} ({r['owner']})"
+        if r["trigger"] is not None:
+            where += f" [{r['trigger']} #{r['index']}]"
+        print(f"{where}: {r['name']}")
+    print(f"{len(res)} found in {elapsed * 1000:.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,7 @@
-from typing import Literal, Self
+from collections.abc import Iterator
+from typing import Annotated, Literal, Self
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 
 NodePath = str
 VariableType = Literal["Integer", "Character", "Boolean", "String"]
@@ -103,6 +104,9 @@ ActionParams = (
 
 
 class TriggerAction(BaseModel):
+    # Subclasses below accept instances of this generic model by reading attributes
+    model_config = ConfigDict(from_attributes=True)
+
     name: str
     exp1: str
     op: Operator
@@ -112,9 +116,90 @@ class TriggerAction(BaseModel):
     action_params: ActionParams
 
 
+# Actions with params model fixed by `action_type`. They are validated as
+# tagged union, so pydantic doesn't try every member of `ActionParams`
+class TriggerActionStatement(TriggerAction):
+    action_type: Literal["Statement"]
+    action_params: ActionParamStatement
+
+
+class TriggerActionAsset(TriggerAction):
+    action_type: Literal["Asset"]
+    action_params: ActionParamAsset
+
+
+class TriggerActionTimer(TriggerAction):
+    action_type: Literal["Timer"]
+    action_params: ActionParamTimer
+
+
+class TriggerActionInventory(TriggerAction):
+    action_type: Literal["Select Inventory", "Deselect Inventory"]
+    action_params: ActionParamInventory
+
+
+class TriggerActionEnable(TriggerAction):
+    action_type: Literal["Enable"]
+    action_params: ActionParamEnable
+
+
+class TriggerActionSetView(TriggerAction):
+    action_type: Literal["Set View"]
+    action_params: ActionParamSetView
+
+
+class TriggerActionCppFunction(TriggerAction):
+    action_type: Literal["C++ Function"]
+    action_params: ActionParamCppFunction
+
+
+class TriggerAction3DSound(TriggerAction):
+    action_type: Literal["3D Sound"]
+    action_params: ActionParam3DSound
+
+
+class TriggerActionUrl(TriggerAction):
+    action_type: Literal["URL"]
+    action_params: ActionParamUrl
+
+
+class TriggerActionInterface(TriggerAction):
+    action_type: Literal["Interface"]
+    action_params: ActionParamInterface
+
+
+AnyTriggerAction = Annotated[
+    TriggerActionStatement
+    | TriggerActionAsset
+    | TriggerActionTimer
+    | TriggerActionInventory
+    | TriggerActionEnable
+    | TriggerActionSetView
+    | TriggerActionCppFunction
+    | TriggerAction3DSound
+    | TriggerActionUrl
+    | TriggerActionInterface,
+    Field(discriminator="action_type"),
+]
+
+TRIGGER_ACTIONS_BY_TYPE: dict[ActionType, type[TriggerAction]] = {
+    "Statement": TriggerActionStatement,
+    "Asset": TriggerActionAsset,
+    "Timer": TriggerActionTimer,
+    "Select Inventory": TriggerActionInventory,
+    "Deselect Inventory": TriggerActionInventory,
+    "Enable": TriggerActionEnable,
+    "Set View": TriggerActionSetView,
+    "C++ Function": TriggerActionCppFunction,
+    "3D Sound": TriggerAction3DSound,
+    "URL": TriggerActionUrl,
+    "Interface": TriggerActionInterface,
+}
+
+
 class Trigger(BaseModel):
     name: str
-    actions: list[TriggerAction]
+    actions: list[AnyTriggerAction]
 
 
 class Variable(BaseModel):
@@ -180,6 +265,8 @@ RStyle = RStyleResource | RStyleFile | RStyleText
 
 
 class Asset(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
     name: str
     description: str | None
     category: str
@@ -189,6 +276,33 @@ class Asset(BaseModel):
     db_id: int
 
 
+class AssetFile(Asset):
+    style: Literal["File"]
+    resource: RStyleFile
+
+
+class AssetResource(Asset):
+    style: Literal["Resource"]
+    resource: RStyleResource
+
+
+class AssetText(Asset):
+    style: Literal["Text"]
+    resource: RStyleText
+
+
+AnyAsset = Annotated[
+    AssetFile | AssetResource | AssetText,
+    Field(discriminator="style"),
+]
+
+ASSETS_BY_STYLE: dict[AssetStyle, type[Asset]] = {
+    "File": AssetFile,
+    "Resource": AssetResource,
+    "Text": AssetText,
+}
+
+
 class AssetName(BaseModel):
     name: str
 
@@ -280,6 +394,27 @@ class Node(BaseModel):
     def print_tree(self):
         self._print(indent=0)
 
+    def walk(self) -> Iterator[Self]:
+        """Iterate over node and all its subtree in tree order"""
+        yield self
+        for c in self.childrens:
+            yield from c.walk()
+
+    def all_triggers(self) -> Iterator[tuple[str, Trigger]]:
+        """
+        Triggers of node together with triggers of its view hotspots.
+        First item is owner of trigger: '' for node itself or 'exploration 0', 'character 1' etc
+        """
+        for t in self.triggers:
+            yield "", t
+        if self.view_navigation is not None:
+            for i, e in enumerate(self.view_navigation.explorations):
+                for t in e.triggers:
+                    yield f"exploration {i}", t
+            for i, c in enumerate(self.view_navigation.characters):
+                for t in c.triggers:
+                    yield f"character {i}", t
+
     @staticmethod
     def find_node(root_node: "Node", path: str) -> "Node":
         n = root_node
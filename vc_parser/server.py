@@ -0,0 +1,233 @@
+"""
+Long-lived project server on Unix socket. Snapshot and assets are loaded and validated once,
+nodes are indexed by path, inverted indexes of `query.py` are built in memory. Files are
+polled and also checked before every request, changed ones are reloaded in a thread and
+swapped in at once, while requests are served from the old data. Protocol is described in
+`vc_parser/client.py`
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import logging
+import os
+import signal
+import socket
+import time
+from pathlib import Path
+from typing import Any
+
+from vc_parser.client import HEADER, SOCKET_PATH, decode_size, encode_frame
+from vc_parser.database import load_assets
+from vc_parser.index import build_index, stamp_snapshot
+from vc_parser.loader import load_raw, raw_records, walk_raw
+from vc_parser.query import INDEX_KINDS
+from vc_parser.schemas import Node
+
+logger = logging.getLogger("server")
+
+# (size, mtime_ns) of file
+FileStamp = tuple[int, int]
+
+
+def file_stamp(path: Path | None) -> FileStamp | None:
+    if path is None:
+        return None
+    st = os.stat(path)
+    return st.st_size, st.st_mtime_ns
+
+
+class Project:
+    """Snapshot as raw JSON indexed by node path, assets by name and inverted indexes"""
+
+    def __init__(self, snapshot: Path, assets: Path | None = None):
+        self.stamps = (file_stamp(snapshot), file_stamp(assets))
+        raw = load_raw(snapshot)
+        root = Node.model_validate(raw)
+        # Served data is the raw JSON, validated tree is needed only for the index
+        self.index = build_index(root, stamp_snapshot(snapshot))
+        del root
+        self.root: dict[str, Any] = raw
+        self.nodes: dict[str, dict[str, Any]] = {n["path"]: n for n in walk_raw(raw)}
+        self.assets: dict[str, dict[str, Any]] = {}
+        if assets is not None:
+            self.assets = {a.name: a.model_dump() for a in load_assets(assets)}
+        self.loaded = time.time()
+
+    def get(self, path: str) -> dict[str, Any]:
+        n = self.nodes.get(path)
+        if n is None:
+            raise KeyError(f"Unknown node path {path!r}")
+        return n
+
+    def info(self) -> dict[str, Any]:
+        return {
+            "snapshot": self.index.source.model_dump(),
+            "nodes": len(self.nodes),
+            "assets": len(self.assets),
+            "loaded": self.loaded,
+        }
+
+    def handle(self, request: dict[str, Any]) -> Any:
+        match request.get("op"):
+            case "node":
+                n = self.get(request["path"])
+                res = {k: v for k, v in n.items() if k != "childrens"}
+                res["children"] = [c["path"] for c in n["childrens"]]
+                return res
+            case "subtree":
+                return self.get(request["path"])
+            case "children":
+                return [c["path"] for c in self.get(request["path"])["childrens"]]
+            case "records":
+                top = self.root if request.get("path") is None else self.get(request["path"])
+                return [[n["path"], r] for n in walk_raw(top) for r in raw_records(n, request["kind"])]
+            case "asset":
+                return self.assets.get(request["name"])
+            case "query":
+                if request["kind"] not in INDEX_KINDS:
+                    raise ValueError(f"Unknown index {request['kind']!r}")
+                return [r.model_dump() for r in self.index.query(request["kind"], request["key"])]
+            case op:
+                raise ValueError(f"Unknown op {op!r}")
+
+
+class ProjectServer:
+    def __init__(self, snapshot: Path, assets: Path | None = None, poll: float = 1.0):
+        self.snapshot = snapshot
+        self.assets = assets
+        self.poll = poll
+        self.project = Project(snapshot, assets)
+        self.reloads = 0
+        # Stamps whose load failed, they are retried only after files change again
+        self.failed: tuple[FileStamp | None, FileStamp | None] | None = None
+        self.lock = asyncio.Lock()
+
+    def stamps(self) -> tuple[FileStamp | None, FileStamp | None]:
+        return file_stamp(self.snapshot), file_stamp(self.assets)
+
+    async def refresh(self, force: bool = False):
+        """Reload project if its files changed since load"""
+        try:
+            stamps = self.stamps()
+        except FileNotFoundError:
+            # File is being replaced, previous data is served until it appears
+            if force:
+                raise
+            return
+        if not force and stamps in (self.project.stamps, self.failed):
+            return
+        async with self.lock:
+            stamps = self.stamps()
+            if not force and stamps in (self.project.stamps, self.failed):
+                # Reloaded by another request while waiting
+                return
+            start = time.perf_counter()
+            try:
+                self.project = await asyncio.to_thread(Project, self.snapshot, self.assets)
+            except Exception as e:
+                # File may be in the middle of writing, the next write changes its stamp
+                self.failed = stamps
+                logger.warning("Reload failed, serving previous data: %s: %s", type(e).__name__, e)
+                if force:
+                    raise
+                return
+            self.failed = None
+            self.reloads += 1
+            logger.info("Reloaded %d nodes in %.2fs", len(self.project.nodes), time.perf_counter() - start)
+
+    async def watch(self):
+        while True:
+            await asyncio.sleep(self.poll)
+            await self.refresh()
+
+    async def respond(self, request: dict[str, Any]) -> Any:
+        op = request.get("op")
+        if op == "reload":
+            await self.refresh(force=True)
+        else:
+            await self.refresh()
+        if op in ("ping", "reload"):
+            return {**self.project.info(), "reloads": self.reloads}
+        return self.project.handle(request)
+
+    async def serve_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                try:
+                    header = await reader.readexactly(HEADER.size)
+                except asyncio.IncompleteReadError:
+                    break
+                body = await reader.readexactly(decode_size(header))
+                try:
+                    response = {"ok": True, "result": await self.respond(json_loads(body))}
+                except Exception as e:  # noqa: BLE001 errors of request are sent to client
+                    response = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+                writer.write(encode_frame(response))
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+            with contextlib.suppress(ConnectionError):
+                await writer.wait_closed()
+
+    async def serve(self, socket_path: str):
+        server = await asyncio.start_unix_server(self.serve_client, path=socket_path)
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, stop.set)
+        watcher = asyncio.create_task(self.watch())
+        logger.info("Serving %d nodes on %s", len(self.project.nodes), socket_path)
+        try:
+            async with server:
+                await stop.wait()
+        finally:
+            watcher.cancel()
+            with contextlib.suppress(FileNotFoundError):
+                os.unlink(socket_path)
+
+
+def json_loads(body: bytes) -> dict[str, Any]:
+    request = json.loads(body)
+    if not isinstance(request, dict):
+        raise TypeError("Request must be JSON object")
+    return request
+
+
+def prepare_socket(socket_path: str):
+    """Remove socket file left by stopped server, fail if a server is listening on it"""
+    if not os.path.exists(socket_path):
+        return
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as s:
+        try:
+            s.connect(socket_path)
+        except ConnectionRefusedError:
+            os.unlink(socket_path)
+            return
+    raise RuntimeError(f"Server is already running on {socket_path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve parsed project from memory over Unix socket")
+    parser.add_argument("-t", type=str, help="Snapshot file. Default data/tree.json", default="data/tree.json")
+    parser.add_argument("-a", type=str, help="Assets file of ASSETS parse", default=None)
+    parser.add_argument("-s", type=str, help=f"Socket path. Default {SOCKET_PATH}", default=SOCKET_PATH)
+    parser.add_argument("-p", type=float, help="Seconds between checks of files. Default 1", default=1.0)
+    args = parser.parse_args()
+
+    try:
+        prepare_socket(args.s)
+    except RuntimeError as e:
+        parser.error(str(e))
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+    start = time.perf_counter()
+    server = ProjectServer(Path(args.t), Path(args.a) if args.a else None, args.p)
+    logger.info("Loaded in %.2fs", time.perf_counter() - start)
+    asyncio.run(server.serve(args.s))
+
+
+if __name__ == "__main__":
+    main()
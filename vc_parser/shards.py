@@ -0,0 +1,152 @@
+import argparse
+import json
+import re
+import time
+from functools import lru_cache
+from pathlib import Path
+
+from pydantic import BaseModel
+
+from vc_parser.schemas import Node, NodePath
+
+MANIFEST_FILE = "manifest.json"
+SHARD_FILE = "node.json"
+# Characters not allowed in Windows file names
+_INVALID_RE = re.compile(r'[<>:"/\\|?*\x00-\x1f]')
+_RESERVED = {"con", "prn", "aux", "nul", *(f"com{i}" for i in range(1, 10)), *(f"lpt{i}" for i in range(1, 10))}
+
+
+class ShardManifest(BaseModel):
+    """
+    Index of sharded tree. Nodes shallower than `split_depth` are stored alone with
+    their children listed here, nodes at `split_depth` are stored with their subtree.
+    None stores every node alone
+    """
+
+    split_depth: int | None
+    # Shard root path -> shard file relative to directory
+    shards: dict[NodePath, str]
+    # Children of nodes stored without subtree
+    children: dict[NodePath, list[NodePath]]
+    # Path of node inside shard subtree -> path of shard root
+    owners: dict[NodePath, NodePath]
+
+    def owner(self, path: NodePath) -> NodePath:
+        return self.owners.get(path, path)
+
+
+def dir_name(name: str, taken: set[str]) -> str:
+    """Directory name for node name, unique among `taken` names of its siblings"""
+    base = _INVALID_RE.sub("_", name).strip(" .") or "_"
+    if base.lower() in _RESERVED or base.lower() == SHARD_FILE:
+        base += "_"
+    res, i = base, 2
+    while res.lower() in taken:
+        res = f"{base} ({i})"
+        i += 1
+    taken.add(res.lower())
+    return res
+
+
+def export_shards(root: Node, directory: Path, split_depth: int | None = 1) -> ShardManifest:
+    """Write tree as directories mirroring node paths with a shard file per stored node and manifest"""
+    manifest = ShardManifest(split_depth=split_depth, shards={}, children={}, owners={})
+
+    def write(n: Node, rel: Path, depth: int):
+        (directory / rel).mkdir(parents=True, exist_ok=True)
+        manifest.shards[n.path] = (rel / SHARD_FILE).as_posix()
+        if split_depth is not None and depth >= split_depth:
+            for c in n.walk():
+                if c is not n:
+                    manifest.owners[c.path] = n.path
+            (directory / rel / SHARD_FILE).write_text(n.model_dump_json())
+            return
+        manifest.children[n.path] = [c.path for c in n.childrens]
+        (directory / rel / SHARD_FILE).write_text(n.model_copy(update={"childrens": []}).model_dump_json())
+        taken: set[str] = set()
+        for c in n.childrens:
+            write(c, rel / dir_name(c.name, taken), depth + 1)
+
+    write(root, Path(dir_name(root.name, set())), 0)
+    (directory / MANIFEST_FILE).write_text(manifest.model_dump_json())
+    return manifest
+
+
+class ShardedTree:
+    """
+    Loader of sharded tree which reads shards on demand.
+    The last `cache_size` shards are kept, least recently used ones are evicted
+    """
+
+    def __init__(self, directory: Path, cache_size: int = 16):
+        self.directory = directory
+        with open(directory / MANIFEST_FILE, "rb") as f:
+            self.manifest = ShardManifest.model_validate_json(f.read())
+        self.root_path = next(iter(self.manifest.shards))
+        self._shard = lru_cache(maxsize=cache_size)(self._read)
+
+    def _read(self, shard: NodePath) -> dict[NodePath, Node]:
+        """Nodes of shard by path"""
+        with open(self.directory / self.manifest.shards[shard], "rb") as f:
+            n = Node.model_validate_json(f.read())
+        return {x.path: x for x in n.walk()}
+
+    def __contains__(self, path: NodePath) -> bool:
+        return path in self.manifest.shards or path in self.manifest.owners
+
+    def node(self, path: NodePath) -> Node:
+        """
+        Node as stored in its shard: with subtree inside a shard
+        and without children above split depth, see `children`
+        """
+        if path not in self:
+            raise KeyError(path)
+        return self._shard(self.manifest.owner(path))[path]
+
+    def children(self, path: NodePath) -> list[NodePath]:
+        if path in self.manifest.children:
+            return self.manifest.children[path]
+        return [c.path for c in self.node(path).childrens]
+
+    def subtree(self, path: NodePath) -> Node:
+        """Node with whole subtree, loading only shards below it"""
+        n = self.node(path)
+        if path not in self.manifest.children:
+            return n
+        return n.model_copy(update={"childrens": [self.subtree(c) for c in self.manifest.children[path]]})
+
+    def root(self) -> Node:
+        return self.subtree(self.root_path)
+
+    def cache_info(self):
+        return self._shard.cache_info()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export parsed project as sharded directory or load subtree from it")
+    sub = parser.add_subparsers(dest="command", required=True)
+    export = sub.add_parser("export", help="Write sharded directory")
+    export.add_argument("-t", type=str, help="Snapshot file. Default data/tree.json", default="data/tree.json")
+    export.add_argument("-o", type=str, help="Output directory. Default data/tree", default="data/tree")
+    export.add_argument("--depth", type=int, help="Depth of shard roots, 1 is a shard per chapter. Default 1", default=1)
+    export.add_argument("--per-node", action="store_true", help="Store every node in its own file")
+    load = sub.add_parser("load", help="Load subtree from sharded directory")
+    load.add_argument("path", type=str, help="Node path")
+    load.add_argument("-d", type=str, help="Sharded directory. Default data/tree", default="data/tree")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    if args.command == "export":
+        with open(args.t) as f:
+            root = Node.model_validate(json.load(f))
+        manifest = export_shards(root, Path(args.o), None if args.per_node else args.depth)
+        print(f"{len(manifest.shards)} shards in {args.o} in {(time.perf_counter() - start) * 1000:.1f}ms")
+    else:
+        tree = ShardedTree(Path(args.d))
+        n = tree.subtree(args.path)
+        elapsed = time.perf_counter() - start
+        print(f"{sum(1 for _ in n.walk())} nodes from {tree.cache_info().currsize} shards in {elapsed * 1000:.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+import argparse
+import json
+import re
+import sys
+from collections.abc import Iterable, Iterator
+from functools import cache
+from typing import IO, TYPE_CHECKING, Any, Literal, get_args
+
+if TYPE_CHECKING:
+    from pydantic import TypeAdapter
+
+    from vc_parser.schemas import NodePath
+
+RecordKind = Literal["variables", "triggers", "actions", "asset_names", "view_navigation"]
+RECORD_KINDS: tuple[RecordKind, ...] = get_args(RecordKind)
+
+# Keys of `Node` as written by `json.dump(node.model_dump())`: node's own variables and
+# triggers are before its path, everything after the path belongs to it.
+# Node path is followed by asset names, unlike `path` of Enable action params.
+# Quotes inside JSON strings are escaped, so the pattern can't match inside a string value
+NODE_KEY_RE = re.compile(r'"(variables|triggers|asset_names|view_navigation|path)": ')
+AFTER_PATH = ', "asset_names": '
+# Longest key match, tail of buffer shorter than this may hold an incomplete key
+MAX_KEY = len('"view_navigation": ')
+
+_decoder = json.JSONDecoder()
+
+
+def _view_triggers(v: dict) -> Iterator[dict]:
+    """Triggers of view hotspots in the same order as `Node.all_triggers`"""
+    for e in v["explorations"]:
+        yield from e["triggers"]
+    for c in v["characters"]:
+        yield from c["triggers"]
+
+
+def iter_raw(fp: IO[str], kinds: Iterable[RecordKind], chunk_size: int = 1 << 16) -> Iterator[tuple["NodePath", RecordKind, Any]]:
+    """
+    Yield `(path, kind, record)` of tree.json as decoded JSON without building nodes.
+    Only values of requested kinds and view navigations, which contain the same keys, are decoded.
+    Buffer holds one value and one chunk
+    """
+    kinds = set(kinds)
+    decoded = set(kinds) | {"path", "view_navigation"}
+    if "actions" in kinds:
+        decoded.add("triggers")
+    buf = ""
+    pos = 0
+    eof = False
+    # Node's variables and triggers wait for its path
+    pending: list[tuple[RecordKind, Any]] = []
+    path = None
+    while True:
+        m = NODE_KEY_RE.search(buf, pos)
+        if m is None:
+            if eof:
+                break
+            keep = max(pos, len(buf) - MAX_KEY)
+        elif m[1] not in decoded:
+            pos = m.end()
+            continue
+        else:
+            try:
+                value, end = _decoder.raw_decode(buf, m.end())
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                keep = m.start()
+            else:
+                keep = None
+                if m[1] == "path" and not buf.startswith(AFTER_PATH, end):
+                    if len(buf) - end < len(AFTER_PATH) and not eof:
+                        keep = m.start()
+                    else:
+                        # `path` of Enable action params in skipped triggers
+                        pos = end
+                        continue
+        if keep is not None:
+            # Incomplete value is decoded again after reading, so reads grow with it
+            chunk = fp.read(max(chunk_size, len(buf) - keep))
+            eof = not chunk
+            buf = buf[keep:] + chunk
+            pos = 0
+            continue
+        pos = end
+        key = m[1]
+        if key == "path":
+            path = value
+            for kind, record in pending:
+                yield path, kind, record
+            pending.clear()
+        elif key in ("variables", "triggers"):
+            if key in kinds:
+                pending.extend((key, r) for r in value)
+            if key == "triggers" and "actions" in kinds:
+                pending.extend(("actions", a) for t in value for a in t["actions"])
+        elif key == "asset_names":
+            if key in kinds:
+                for name in value:
+                    yield path, key, name
+        elif value is not None:
+            if key in kinds:
+                yield path, key, value
+            if "triggers" in kinds or "actions" in kinds:
+                for t in _view_triggers(value):
+                    if "triggers" in kinds:
+                        yield path, "triggers", t
+                    if "actions" in kinds:
+                        for a in t["actions"]:
+                            yield path, "actions", a
+
+
+@cache
+def _adapter(kind: RecordKind) -> "TypeAdapter | None":
+    # Models are imported on first validation, raw records need only standard library
+    from pydantic import TypeAdapter
+
+    from vc_parser.schemas import AnyTriggerAction, Trigger, Variable, ViewNavigation
+
+    match kind:
+        case "variables":
+            return TypeAdapter(Variable)
+        case "triggers":
+            return TypeAdapter(Trigger)
+        case "actions":
+            return TypeAdapter(AnyTriggerAction)
+        case "view_navigation":
+            return TypeAdapter(ViewNavigation)
+    return None
+
+
+def _validate(kind: RecordKind, record: Any) -> Any:
+    adapter = _adapter(kind)
+    return record if adapter is None else adapter.validate_python(record)
+
+
+def iter_records(fp: IO[str], kind: RecordKind, validate: bool = True, chunk_size: int = 1 << 16) -> Iterator[tuple["NodePath", Any]]:
+    """
+    Yield `(path, record)` of one kind from tree.json, the same records as walking
+    validated `Node`. They come in file order: records of one node are in order,
+    but children are before their parent. Triggers and actions include ones of
+    view hotspots as in `Node.all_triggers`. Records are validated models unless `validate` is False
+    """
+    for path, k, record in iter_raw(fp, (kind,), chunk_size):
+        yield path, _validate(k, record) if validate else record
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stream records of parsed project as JSON lines")
+    parser.add_argument("kind", type=str, choices=RECORD_KINDS, help="Records to stream")
+    parser.add_argument("-t", type=str, help="Snapshot file. Default data/tree.json", default="data/tree.json")
+    args = parser.parse_args()
+
+    with open(args.t) as f:
+        for path, record in iter_records(f, args.kind, validate=False):
+            sys.stdout.write(json.dumps({"path": path, "record": record}) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+import argparse
+import json
+import time
+from pathlib import Path
+
+from pydantic import BaseModel
+
+from vc_parser.cache import CACHE_DIR, FileCache, trigger_actions_key
+from vc_parser.database import load_assets
+from vc_parser.schemas import (
+    Asset,
+    AssetName,
+    Node,
+    NodePath,
+    Trigger,
+    TriggerAction,
+    Variable,
+    ViewNavigation,
+)
+
+
+def cache_records(root: Node) -> dict[type[BaseModel], dict[NodePath, list[BaseModel]]]:
+    """
+    Records of cache stores under the keys NODES parse uses for them.
+    Fingerprints can't be restored: they hold list box texts which aren't in snapshot.
+    Incremental parse trusts cached nodes without fingerprint and stores them on first run
+    """
+    res: dict[type[BaseModel], dict[NodePath, list[BaseModel]]] = {
+        k: {} for k in (AssetName, Variable, Trigger, TriggerAction, ViewNavigation)
+    }
+    for n in root.walk():
+        res[AssetName][n.path] = [AssetName(name=x) for x in n.asset_names]
+        res[Variable][n.path] = n.variables
+        res[Trigger][n.path] = n.triggers
+        for i, t in enumerate(n.triggers):
+            res[TriggerAction][trigger_actions_key(n.path, i, t.name)] = t.actions
+        if n.view_navigation is not None:
+            res[ViewNavigation][n.path] = [n.view_navigation]
+    return res
+
+
+def warm_start(root: Node, assets: list[Asset] | None = None, overwrite: bool = False) -> dict[str, int]:
+    """
+    Fill cache stores from snapshot and ASSETS parse output. Keys already in cache
+    are kept unless `overwrite`. Every store is saved once. Returns added keys by store file
+    """
+    records = cache_records(root)
+    if assets is not None:
+        records[Asset] = {a.name: [a] for a in assets}
+    CACHE_DIR.mkdir(exist_ok=True)
+    res = {}
+    for klass, data in records.items():
+        store = FileCache.load(klass)
+        added = {k: v for k, v in data.items() if overwrite or not store.has_key(k)}
+        if added:
+            store.data.update(added)
+            store.save()
+        res[str(FileCache.get_file_path(klass))] = len(added)
+    return res
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fill parser cache from existing snapshot, so NODES parse reads only new content")
+    parser.add_argument("-t", type=str, help="Snapshot file. Default data/tree.json", default="data/tree.json")
+    parser.add_argument("-a", type=str, help="Assets file written by ASSETS parse. Default None", default=None)
+    parser.add_argument("--overwrite", action="store_true", help="Replace records already in cache. Default False")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    with open(args.t) as f:
+        root = Node.model_validate(json.load(f))
+    assets = load_assets(Path(args.a)) if args.a is not None else None
+    for path, added in warm_start(root, assets, args.overwrite).items():
+        print(f"{path}: {added} keys added")
+    print(f"in {(time.perf_counter() - start) * 1000:.1f}ms")
+
+
+if __name__ == "__main__":
+    main()